@@ -0,0 +1,103 @@
+import gc
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+
+import click
+import jsonpickle
+
+from toolhub.integrations.rapidapi import catalog
+from toolhub.integrations.rapidapi import function as rapidapi_function
+from toolhub.integrations.rapidapi import loader
+from toolhub.lib import function
+
+_SENDGRID_FILE = os.path.join(os.path.dirname(loader.__file__), "sendgrid.json")
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # NOTE: peak rather than current RSS, e.g. on macOS (in bytes there).
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _synthetic_catalog(path: str, n: int) -> None:
+    """Writes a catalog of n functions, replicating the sendgrid API over APIs."""
+    with open(_SENDGRID_FILE, "r") as f:
+        fns = list(jsonpickle.decode(f.read())["Email"]["sendgrid"])
+
+    def _functions():
+        for i in range(n):
+            fn = fns[i % len(fns)]
+            api = f"sendgrid_{i // len(fns)}"
+            yield rapidapi_function.RapidAPIFunction(
+                spec=function.FunctionSpec(
+                    name=f"Email-{api}-{fn.endpoint}",
+                    parameters=fn.spec.parameters,
+                    return_=fn.spec.return_,
+                    description=fn.spec.description,
+                ),
+                category="Email",
+                api=api,
+                endpoint=fn.endpoint,
+                method=fn.method,
+                root_url=f"{api}.p.rapidapi.com",
+                url_f_string=fn.url_f_string.replace(
+                    fn.root_url, f"{api}.p.rapidapi.com"
+                ),
+                required_params=fn.required_params,
+                conditional_params=fn.conditional_params,
+            )
+
+    catalog.write(path, _functions())
+
+
+@click.command()
+@click.option(
+    "--catalog-path",
+    default=None,
+    help="Catalog to load; defaults to the RapidAPI catalog, else a synthetic one.",
+)
+@click.option("--n", default=16_000, help="Number of functions of a synthetic catalog.")
+def run(catalog_path: str | None, n: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if catalog_path is None and os.path.exists(loader.CATALOG_FILE):
+            catalog_path = loader.CATALOG_FILE
+        if catalog_path is None:
+            catalog_path = os.path.join(tmp_dir, "functions.sqlite")
+            _synthetic_catalog(catalog_path, n)
+
+        gc.collect()
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        catalog_ = catalog.Catalog(catalog_path)
+        fns = catalog_.functions()
+        load_s = time.perf_counter() - start
+        gc.collect()
+        rss_after = _rss_bytes()
+        catalog_.close()
+        del fns
+        gc.collect()
+
+        # NOTE: a second load, traced, for the size of the Python objects alone.
+        tracemalloc.start()
+        catalog_ = catalog.Catalog(catalog_path)
+        fns = catalog_.functions()
+        traced_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        catalog_.close()
+
+    print(f"functions={len(fns)} load={load_s:.3f}s")
+    print(
+        f"rss={(rss_after - rss_before) / 2**20:.1f}MiB"
+        f" python={traced_bytes / 2**20:.1f}MiB"
+        f" ({traced_bytes / len(fns):.0f}B per function)"
+    )
+
+
+if __name__ == "__main__":
+    run()
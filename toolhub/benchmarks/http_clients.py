@@ -0,0 +1,31 @@
+import click
+import httpx
+
+from toolhub.benchmarks import utils
+from toolhub.integrations import http_clients
+
+
+@click.command()
+@click.option("--n", default=500, help="Number of calls per mode.")
+def run(n: int) -> None:
+    server = utils.stub_server({"result": "ok"})
+    url = utils.stub_url(server) + "/api/v1/convert"
+    params = {"from": "MXN", "to": "USD", "amount": 100}
+
+    # Before: a new connection per call, as with the module-level httpx.request.
+    before = utils.timed(
+        lambda: httpx.request("GET", url, params=params, cookies={}), n
+    )
+    # After: the shared keep-alive client of the origin.
+    after = utils.timed(
+        lambda: http_clients.client(url).request("GET", url, params=params), n
+    )
+    http_clients.close()
+    server.shutdown()
+
+    print(f"httpx.request        {utils.summary(before)}")
+    print(f"http_clients.client  {utils.summary(after)}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,135 @@
+import json
+import pathlib
+import random
+import statistics
+import time
+from typing import Any
+
+import click
+
+from toolhub.lib import bounded_json
+from toolhub.lib import projection
+
+_CRUNCHBASE_SPEC = (
+    pathlib.Path(__file__).parent.parent
+    / "integrations/openapi/apis/crunchbase/crunchbase_v4.json"
+)
+
+
+def _example(
+    schemas: dict[str, Any], schema: dict[str, Any], rng: random.Random, n_items: int
+) -> Any:
+    """Returns: a random value of schema, with n_items items per array."""
+    if ref := schema.get("$ref"):
+        schema = schemas[ref.rsplit("/", 1)[-1]]
+    if all_of := schema.get("allOf"):
+        return _example(schemas, all_of[0], rng, n_items)
+    if enum := schema.get("enum"):
+        return rng.choice(enum)
+    type_ = schema.get("type", "object")
+    if type_ == "object":
+        return {
+            name: _example(schemas, s, rng, max(1, n_items // 10))
+            for name, s in (schema.get("properties") or {}).items()
+        }
+    if type_ == "array":
+        return [
+            _example(schemas, schema.get("items", {}), rng, n_items)
+            for _ in range(n_items)
+        ]
+    if type_ == "integer":
+        return rng.randrange(10**6)
+    if type_ == "number":
+        return rng.random() * 10**6
+    if type_ == "boolean":
+        return rng.random() < 0.5
+    words = rng.choices(["data", "cloud", "health", "ai", "market", "labs"], k=12)
+    return " ".join(words)[: rng.randrange(8, 80)]
+
+
+def crunchbase_payload(n_entities: int) -> Any:
+    """Returns: an organizations search result, generated from the API's schema."""
+    schemas = json.loads(_CRUNCHBASE_SPEC.read_text())["components"]["schemas"]
+    return _example(
+        schemas,
+        schemas["OrganizationSearchResults"],
+        random.Random(0),
+        n_entities,
+    )
+
+
+def rapidapi_payload(n_items: int) -> Any:
+    """Returns: a paged list of records, in the style of many RapidAPI APIs."""
+    rng = random.Random(0)
+    return {
+        "status": "OK",
+        "request_id": "6f1c2b7e",
+        "data": [
+            {
+                "id": i,
+                "title": f"Listing {i} " + "lorem ipsum " * rng.randrange(1, 40),
+                "price": {"amount": rng.random() * 1000, "currency": "USD"},
+                "tags": [f"tag{j}" for j in range(rng.randrange(20))],
+                "_meta": {"score": rng.random(), "source": "index"},
+                "links": {"self": f"https://example.com/listings/{i}"},
+            }
+            for i in range(n_items)
+        ],
+        "_links": {"next": "https://example.com/listings?page=2"},
+    }
+
+
+def _report(label: str, render: Any, payload: Any, n: int) -> None:
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        output = render(payload)
+        latencies.append(time.perf_counter() - start)
+    mean_s = statistics.mean(latencies)
+    valid = True
+    try:
+        json.loads(output)
+    except ValueError:
+        valid = False
+    print(
+        f"  {label:<12} {mean_s * 1e3:8.3f}ms/result {1 / mean_s:9.0f} results/s"
+        f" output={len(output)} chars ~{projection.estimate_tokens(output)} tokens"
+        f" valid_json={valid}"
+    )
+
+
+@click.command()
+@click.option("--n", default=200, help="Number of renders per payload.")
+@click.option("--n-items", default=100, help="Items of the generated payloads.")
+@click.option("--max-tokens", default=256, help="Token budget of the outputs.")
+@click.option(
+    "--payload",
+    "payload_paths",
+    multiple=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    help="Recorded JSON payload; repeatable. Replaces the generated payloads.",
+)
+def run(
+    n: int, n_items: int, max_tokens: int, payload_paths: tuple[pathlib.Path, ...]
+) -> None:
+    if payload_paths:
+        payloads = {p.name: json.loads(p.read_text()) for p in payload_paths}
+    else:
+        payloads = {
+            "crunchbase": crunchbase_payload(n_items),
+            "rapidapi": rapidapi_payload(n_items),
+        }
+    projector = projection.Projector(max_tokens=max_tokens)
+    max_chars = max_tokens * 4
+    for name, payload in payloads.items():
+        size = len(json.dumps(payload, separators=(",", ":")))
+        print(f"{name}: {size} chars")
+        # Before: the first keys and items, until the character budget is spent.
+        _report("cut", lambda p: bounded_json.dumps(p, max_chars), payload, n)
+        # After: sampled items of every array, without links and private fields.
+        _report("projection", projector.render, payload, n)
+        print(f"    {projector.render(payload)[:300]}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,71 @@
+import json
+import os
+import time
+
+import click
+import jsonpickle
+
+from toolhub.benchmarks import utils
+from toolhub.integrations.openapi import provider as openapi_provider
+from toolhub.integrations.rapidapi import loader
+from toolhub.lib import retrieval
+from toolhub.standard_providers import random_provider
+
+_QUERIES_FILE = os.path.join(os.path.dirname(__file__), "tool_retrieval_queries.json")
+_SENDGRID_FILE = os.path.join(os.path.dirname(loader.__file__), "sendgrid.json")
+
+
+def _labelled_functions() -> list:
+    """Returns: the functions the queries are labelled with."""
+    with open(_SENDGRID_FILE, "r") as f:
+        category_to_api_to_functions = jsonpickle.decode(f.read())
+    return (
+        list(category_to_api_to_functions["Email"]["sendgrid"])
+        + openapi_provider.Provider.standard().functions()
+        + random_provider.Provider().functions()
+    )
+
+
+@click.command()
+@click.option("--k", default=10, help="Number of tools retrieved per query.")
+@click.option(
+    "--catalog/--no-catalog",
+    default=False,
+    help="Add the whole RapidAPI catalog as distractors.",
+)
+@click.option(
+    "--embeddings/--no-embeddings",
+    default=False,
+    help="Fuse BM25 with sentence-transformers embeddings.",
+)
+def run(k: int, catalog: bool, embeddings: bool) -> None:
+    with open(_QUERIES_FILE, "r") as f:
+        queries = json.load(f)
+
+    fns = {fn.spec.name: fn for fn in _labelled_functions()}
+    if catalog:
+        for fn in loader.load_functions_collections()[0]:
+            fns.setdefault(fn.spec.name, fn)
+    embedding_backend = retrieval.SentenceTransformersBackend() if embeddings else None
+
+    start = time.perf_counter()
+    index = retrieval.ToolIndex.build(fns.values(), embedding_backend)
+    build_s = time.perf_counter() - start
+
+    recalls = []
+    for q in queries:
+        retrieved = set(index.search(q["query"], k))
+        recalls.append(len(retrieved & set(q["relevant"])) / len(q["relevant"]))
+        if not recalls[-1]:
+            print(f"missed: {q['query']!r}")
+    latencies = utils.timed(
+        lambda: [index.search(q["query"], k) for q in queries], n=20
+    )
+
+    print(f"functions={len(fns)} queries={len(queries)} build={build_s:.3f}s")
+    print(f"recall@{k}={sum(recalls) / len(recalls):.3f}")
+    print(f"search    {utils.summary([t / len(queries) for t in latencies])} per query")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,68 @@
+import http.server
+import json
+import statistics
+import threading
+import time
+from typing import Any, Callable
+
+
+class _StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    payload: bytes = b"{}"
+    delay_s: float = 0.0
+
+    def do_GET(self):
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.payload)))
+        self.end_headers()
+        self.wfile.write(self.payload)
+
+    do_POST = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+
+def stub_server(
+    payload: Any = None, delay_s: float = 0.0
+) -> http.server.ThreadingHTTPServer:
+    """Returns: a running local HTTP/1.1 server replying payload to any request."""
+    handler = type(
+        "_Handler",
+        (_StubHandler,),
+        dict(payload=json.dumps(payload or {}).encode(), delay_s=delay_s),
+    )
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stub_url(server: http.server.ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def timed(fn: Callable[[], Any], n: int, warmup: int = 1) -> list[float]:
+    """Returns: the latency of each of n calls of fn, in seconds."""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def summary(latencies: list[float]) -> str:
+    ordered = sorted(latencies)
+    return (
+        f"mean={statistics.mean(ordered) * 1e3:.3f}ms"
+        f" p50={ordered[len(ordered) // 2] * 1e3:.3f}ms"
+        f" p99={ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e3:.3f}ms"
+    )
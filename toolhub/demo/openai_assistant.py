@@ -1,13 +1,17 @@
+import asyncio
 import click
-import time
-from datetime import date, timedelta
+from datetime import date
 
 import openai
+from openai.types.beta.threads.required_action_function_tool_call import (
+    RequiredActionFunctionToolCall,
+)
 
 from toolhub.demo import utils
+from toolhub.integrations import http_clients
 from toolhub.lib import auth
-from toolhub.lib import hub
 from toolhub.lib import registry
+from toolhub.openai import assistant_runner
 from toolhub.openai import assistant_utils
 from toolhub.openai import openai_assistant_hub
 
@@ -19,22 +23,15 @@ _INSTRUCTIONS = "You are a helpful assistant who uses tools to perform tasks."
 
 _MAX_TOOL_ITERATIONS = 7
 
-_TERMINAL_RUN_STATUSES = (
-    "cancelled",
-    "failed",
-    "completed",
-    "expired",
-)
-_REQUIRES_ACTION_RUN_STATUS = "requires_action"
-_WAITING_RUN_STATUSES = (
-    "queued",
-    "in_progress",
-    "cancelling",
-)
 
-_MAX_POLL_ITERATIONS = 5
-_POLL_BASE_INTERVAL = timedelta(seconds=2)
-_POLL_MULTIPLIER = 2
+def _print_tool_outputs(
+    tool_calls: list[RequiredActionFunctionToolCall],
+    tool_outputs: list[openai_assistant_hub.ToolOutput],
+) -> None:
+    print_str = "tool calls:\n"
+    for tc, output in zip(tool_calls, tool_outputs):
+        print_str += f"{tc.function}\n>\t{repr(output['output'])}\n"
+    print(print_str)
 
 
 class Agent:
@@ -62,6 +59,21 @@ class Agent:
                 model=_GPT_MODEL,
             )
 
+    async def _run(self, auth_ctx: auth.AuthContext, thread_id: str) -> None:
+        # NOTE: the async clients are bound to the event loop of the run.
+        client = utils.async_openai_client(self.client.api_key)
+        runner = assistant_runner.AssistantRunner(
+            self.hub,
+            client,
+            max_tool_iterations=_MAX_TOOL_ITERATIONS,
+            on_tool_outputs=_print_tool_outputs,
+        )
+        try:
+            await runner.run(auth_ctx, thread_id, self.assistant.id)
+        finally:
+            await client.close()
+            await http_clients.aclose()
+
     def __call__(
         self,
         auth_ctx: auth.AuthContext,
@@ -80,53 +92,7 @@ class Agent:
             content=task,
         )
 
-        run = self.client.beta.threads.runs.create(
-            thread_id=thread.id,
-            assistant_id=self.assistant.id,
-            tools=self.hub.tools_spec(),
-        )
-        run_id = run.id
-
-        for _ in range(_MAX_TOOL_ITERATIONS):
-            run = self.client.beta.threads.runs.retrieve(
-                thread_id=thread.id, run_id=run_id
-            )
-            if run.status in _TERMINAL_RUN_STATUSES:
-                break
-            if run.status == _REQUIRES_ACTION_RUN_STATUS and (
-                tool_calls := run.required_action.submit_tool_outputs.tool_calls
-            ):
-                tool_outputs = []
-                print_str = "tool calls:\n"
-                for tc, result in zip(
-                    tool_calls, self.hub.call_tools(auth_ctx, tool_calls)
-                ):
-                    if isinstance(result, hub.ToolCallErrors):
-                        errors_fmt = "\n".join(str(e) for e in result.errors)
-                        output = openai_assistant_hub.ToolOutput(
-                            tool_call_id=tc.id,
-                            output=f"Failure:\n{errors_fmt}",
-                        )
-                    else:
-                        output = result
-                    tool_outputs.append(output)
-                    print_str += f"{tc.function}\n>\t{repr(output['output'])}\n"
-
-                self.client.beta.threads.runs.submit_tool_outputs(
-                    thread_id=thread.id,
-                    run_id=run_id,
-                    tool_outputs=tool_outputs,
-                )
-                print(print_str)
-            else:
-                assert run.status in _WAITING_RUN_STATUSES
-                for p in range(_MAX_POLL_ITERATIONS):
-                    time.sleep(_POLL_BASE_INTERVAL.seconds * _POLL_MULTIPLIER**p)
-                    run = self.client.beta.threads.runs.retrieve(
-                        thread_id=thread.id, run_id=run_id
-                    )
-                    if run.status not in _WAITING_RUN_STATUSES:
-                        break
+        asyncio.run(self._run(auth_ctx, thread.id))
 
         print(
             "\n".join(
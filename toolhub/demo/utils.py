@@ -8,7 +8,7 @@ from toolhub.integrations.rapidapi import provider as rapidapi_provider
 from toolhub.standard_providers import random_provider
 
 
-def openai_client(openai_key=None) -> openai.OpenAI:
+def _openai_key(openai_key: str | None) -> str:
     if not openai_key:
         try:
             openai_key = settings.openai.api_key
@@ -16,7 +16,15 @@ def openai_client(openai_key=None) -> openai.OpenAI:
             openai_key = None  # replace with your OpenAI API key
 
     assert openai_key, f"Please define your OpenAI API key in {__file__}."
-    return openai.OpenAI(api_key=openai_key)
+    return openai_key
+
+
+def openai_client(openai_key=None) -> openai.OpenAI:
+    return openai.OpenAI(api_key=_openai_key(openai_key))
+
+
+def async_openai_client(openai_key=None) -> openai.AsyncOpenAI:
+    return openai.AsyncOpenAI(api_key=_openai_key(openai_key))
 
 
 def registry_(
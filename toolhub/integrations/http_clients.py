@@ -0,0 +1,203 @@
+# Shared, keep-alive HTTP clients for the HTTP-based integrations, pooled per
+# origin so that consecutive calls to the same API reuse their connections.
+# Limits are configured in the `http` section of settings.yml.
+import asyncio
+import atexit
+import http.cookiejar
+import importlib.util
+import os
+import threading
+import weakref
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from toolhub.config import settings
+from toolhub.lib import bounded_json
+
+_DEFAULT_MAX_CONNECTIONS = 100
+_DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+_DEFAULT_KEEPALIVE_EXPIRY_S = 30.0
+_DEFAULT_MAX_BODY_BYTES = 1 << 20
+# As the tool outputs: error messages are rendered for the LLM.
+_DEFAULT_MAX_ERROR_BODY_CHARS = 1024
+# Headers that no longer describe a body once it has been read and decoded.
+_BODY_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+_TRUNCATED = "toolhub.truncated"
+
+_lock = threading.Lock()
+_clients: dict[str, httpx.Client] = {}
+_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]
+] = weakref.WeakKeyDictionary()
+
+
+class StatusError(RuntimeError):
+    """A non-2xx response of an upstream API."""
+
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _client_kwargs() -> dict:
+    config = settings.get("http", {})
+    return dict(
+        limits=httpx.Limits(
+            max_connections=config.get("max_connections", _DEFAULT_MAX_CONNECTIONS),
+            max_keepalive_connections=config.get(
+                "max_keepalive_connections", _DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            keepalive_expiry=config.get(
+                "keepalive_expiry_s", _DEFAULT_KEEPALIVE_EXPIRY_S
+            ),
+        ),
+        # NOTE: HTTP/2 requires the optional h2 package (httpx[http2]).
+        http2=bool(config.get("http2", True))
+        and importlib.util.find_spec("h2") is not None,
+        verify=True,
+        # NOTE: clients are shared across auth contexts; never persist cookies.
+        cookies=http.cookiejar.CookieJar(
+            policy=http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+        ),
+    )
+
+
+def client(url: str) -> httpx.Client:
+    """Returns: the shared client for the origin of url."""
+    origin = _origin(url)
+    if c := _clients.get(origin):
+        return c
+    with _lock:
+        if not (c := _clients.get(origin)):
+            c = _clients[origin] = httpx.Client(**_client_kwargs())
+        return c
+
+
+def async_client(url: str) -> httpx.AsyncClient:
+    """Returns: the shared client for the origin of url, on the running loop."""
+    loop = asyncio.get_running_loop()
+    origin = _origin(url)
+    with _lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        if not (c := loop_clients.get(origin)):
+            c = loop_clients[origin] = httpx.AsyncClient(**_client_kwargs())
+        return c
+
+
+def _max_body_bytes() -> int:
+    return settings.get("http", {}).get("max_body_bytes", _DEFAULT_MAX_BODY_BYTES)
+
+
+def _read_response(
+    response: httpx.Response, chunks: list[bytes], max_bytes: int
+) -> httpx.Response:
+    content = b"".join(chunks)
+    return httpx.Response(
+        response.status_code,
+        headers=[
+            (k, v)
+            for k, v in response.headers.multi_items()
+            if k.lower() not in _BODY_HEADERS
+        ],
+        # NOTE: decoded chunks, e.g. of gzipped bodies, may overshoot the budget.
+        content=content[:max_bytes],
+        request=response.request,
+        extensions={**response.extensions, _TRUNCATED: len(content) > max_bytes},
+    )
+
+
+def request(method: str, url: str, **kwargs) -> httpx.Response:
+    """Returns: the response of a request on the shared client of url, with the
+    body streamed up to `http.max_body_bytes`; see `truncated`."""
+    max_bytes = _max_body_bytes()
+    chunks: list[bytes] = []
+    size = 0
+    with client(url).stream(method, url, **kwargs) as response:
+        for chunk in response.iter_bytes():
+            chunks.append(chunk)
+            if (size := size + len(chunk)) > max_bytes:
+                # NOTE: closing the stream drops the rest of the body.
+                break
+        return _read_response(response, chunks, max_bytes)
+
+
+async def arequest(method: str, url: str, **kwargs) -> httpx.Response:
+    """Async counterpart of `request`."""
+    max_bytes = _max_body_bytes()
+    chunks: list[bytes] = []
+    size = 0
+    async with async_client(url).stream(method, url, **kwargs) as response:
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            if (size := size + len(chunk)) > max_bytes:
+                break
+        return _read_response(response, chunks, max_bytes)
+
+
+def truncated(response: httpx.Response) -> bool:
+    """Returns: whether the body of a response of `request` was cut."""
+    return response.extensions.get(_TRUNCATED, False)
+
+
+def _max_error_body_chars() -> int:
+    return settings.get("http", {}).get(
+        "max_error_body_chars", _DEFAULT_MAX_ERROR_BODY_CHARS
+    )
+
+
+def response_content(response: httpx.Response) -> Any:
+    """Returns: the JSON value of the body of a response of `request`, or its text
+    if it isn't JSON. A cut body is parsed as far as it goes (see
+    `bounded_json.loads_prefix`), or else returned as text with a note.
+
+    Raises: StatusError for non-2xx responses, with the start of their body.
+    """
+    if (code := response.status_code) and (code // 100 != 2):
+        body = bounded_json.dumps(response.text, _max_error_body_chars())
+        raise StatusError(f"error({code}) {body}", code)
+    if truncated(response):
+        try:
+            return bounded_json.loads_prefix(response.text)
+        except ValueError:
+            return response.text + "... response truncated"
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+def close() -> None:
+    """Closes the shared sync clients; subsequent calls open new ones."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for c in clients:
+        c.close()
+
+
+async def aclose() -> None:
+    """Closes the shared async clients of the running loop."""
+    with _lock:
+        loop_clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for c in loop_clients.values():
+        await c.aclose()
+
+
+def _reset_after_fork() -> None:
+    # NOTE: connections must not be shared with the parent process; drop them
+    # without closing, the parent still owns the sockets.
+    global _lock
+    _lock = threading.Lock()
+    _clients.clear()
+    _async_clients.clear()
+
+
+atexit.register(close)
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,161 @@
+# Bulk counterpart of the Crunchbase organization lookup: the lookups of a batch
+# by UUID run as a single organization search with an identifier predicate, and
+# the search results are scattered back to each lookup.
+import functools
+import json
+import re
+from typing import Any, Callable
+
+from toolhub.integrations import http_clients
+from toolhub.integrations.openapi import client
+from toolhub.lib import auth
+from toolhub.lib import function
+
+LOOKUP_ENDPOINT = "/entities/organizations/{entity_id}"
+SEARCH_ENDPOINT = "/searches/organizations"
+# The search's maximum limit is 2000.
+_MAX_CALLS = 1000
+_UUID = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
+)
+# NOTE: searches require field ids, lookups don't: without any, a lookup returns
+# the identifier (see the API's lookup example).
+_DEFAULT_FIELD_IDS = ("identifier",)
+
+
+def _field_ids(params: dict[str, Any]) -> tuple[str, ...]:
+    """Returns: the field ids of a lookup, given as a JSON array or as a
+    comma-separated list."""
+    if not (field_ids := params.get("field_ids")):
+        return _DEFAULT_FIELD_IDS
+    try:
+        ids = json.loads(field_ids)
+    except ValueError:
+        ids = field_ids.split(",")
+    if isinstance(ids, str):
+        ids = [ids]
+    return tuple(dict.fromkeys(str(i).strip() for i in ids))
+
+
+def accepts(params: dict[str, Any]) -> bool:
+    """Returns: whether a lookup can be served by a search, i.e. is by UUID and
+    without cards."""
+    return bool(
+        _UUID.fullmatch(str(params.get("entity_id", ""))) and not params.get("card_ids")
+    )
+
+
+def _searches(params_list: list[dict[str, Any]]) -> dict[tuple[str, ...], list[int]]:
+    """Returns: the indices of the lookups per search, i.e. per field ids."""
+    searches: dict[tuple[str, ...], list[int]] = {}
+    for i, params in enumerate(params_list):
+        searches.setdefault(_field_ids(params), []).append(i)
+    return searches
+
+
+def _search_body(field_ids: tuple[str, ...], uuids: list[str]) -> str:
+    return json.dumps(
+        {
+            "field_ids": list(field_ids),
+            "query": [
+                {
+                    "type": "predicate",
+                    "field_id": "identifier",
+                    "operator_id": "includes",
+                    "values": uuids,
+                }
+            ],
+            "limit": len(uuids),
+        }
+    )
+
+
+def _scatter(
+    content: dict[str, Any],
+    params_list: list[dict[str, Any]],
+    indices: list[int],
+    results: list[Any],
+) -> None:
+    """Sets the result of each lookup of a search, as the lookup returns it: the
+    properties of its field ids, without cards."""
+    # NOTE: search results carry the uuid besides the requested properties.
+    entities = {
+        str(entity.get("uuid", "")).lower(): entity
+        for entity in content.get("entities") or ()
+    }
+    for i in indices:
+        uuid = params_list[i]["entity_id"].lower()
+        if (entity := entities.get(uuid)) is None:
+            results[i] = http_clients.StatusError(
+                f"error(404) no organization {uuid}", 404
+            )
+        else:
+            results[i] = {"properties": entity.get("properties", {})}
+
+
+def _request_kwargs(
+    auth_ctx: auth.StandardAuthContext,
+    api: str,
+    base_url: str,
+    field_ids: tuple[str, ...],
+    uuids: list[str],
+) -> dict[str, Any]:
+    return dict(
+        api=api,
+        base_url=base_url,
+        endpoint=SEARCH_ENDPOINT,
+        method="post",
+        auth_ctx=auth_ctx,
+        params={},
+        request_body=_search_body(field_ids, uuids),
+        function_name=f"{api}_searches_organizations_post",
+    )
+
+
+def _lookup_organizations(
+    auth_ctx: auth.StandardAuthContext, api: str, base_url: str
+) -> Callable[[list[dict[str, Any]]], list[Any]]:
+    def _impl(params_list: list[dict[str, Any]]) -> list[Any]:
+        results: list[Any] = [None] * len(params_list)
+        for field_ids, indices in _searches(params_list).items():
+            uuids = [params_list[i]["entity_id"] for i in indices]
+            content = client.request(
+                **_request_kwargs(auth_ctx, api, base_url, field_ids, uuids)
+            )
+            _scatter(content, params_list, indices, results)
+        return results
+
+    return _impl
+
+
+def _alookup_organizations(
+    auth_ctx: auth.StandardAuthContext, api: str, base_url: str
+) -> Callable:
+    async def _impl(params_list: list[dict[str, Any]]) -> list[Any]:
+        results: list[Any] = [None] * len(params_list)
+        for field_ids, indices in _searches(params_list).items():
+            uuids = [params_list[i]["entity_id"] for i in indices]
+            content = await client.arequest(
+                **_request_kwargs(auth_ctx, api, base_url, field_ids, uuids)
+            )
+            _scatter(content, params_list, indices, results)
+        return results
+
+    return _impl
+
+
+def bulk_counterparts(api: str, base_url: str) -> dict[tuple[str, str], function.Bulk]:
+    """Returns: the bulk counterparts of the API's functions, per (endpoint,
+    method)."""
+    return {
+        (LOOKUP_ENDPOINT, "get"): function.Bulk(
+            callable_=functools.partial(
+                _lookup_organizations, api=api, base_url=base_url
+            ),
+            acallable_=functools.partial(
+                _alookup_organizations, api=api, base_url=base_url
+            ),
+            accepts=accepts,
+            max_calls=_MAX_CALLS,
+        )
+    }
@@ -1,15 +1,18 @@
+import functools
 import httpx
 import string
 from typing import Any
+from urllib.parse import urlsplit
 
 from toolhub.config import settings
+from toolhub.integrations import http_clients
+from toolhub.integrations import retries
 from toolhub.lib import auth
+from toolhub.lib import deadline
 from toolhub.lib.utils import not_none
 
 
-# openapi-python-client doesn't yet support Basic auth, using workaround mentioned:
-# https://github.com/openapi-generators/openapi-python-client/issues/525
-def request(
+def _request_kwargs(
     api: str,
     base_url: str,
     endpoint: str,
@@ -33,12 +36,9 @@ def request(
     required_args = [name for _, name, _, _ in f.parse(url) if name]
     url = url.format(**{a: available_args.pop(a) for a in required_args})
 
-    response = httpx.request(
-        verify=True,
+    return dict(
         method=method,
         headers=headers,
-        cookies={},
-        timeout=settings.get("openapi", {}).get("timeout_s", 5.0),
         params=params,
         data=(
             request_body
@@ -48,7 +48,73 @@ def request(
         url=url,
     )
 
-    if (code := response.status_code) and (code // 100 != 2):
-        raise RuntimeError(f"error({code}) {response.content}")
-    content = response.json()
-    return content
+
+def _timeout_s() -> float | None:
+    # NOTE: per attempt, capped by the time left before the call's deadline.
+    return deadline.timeout_s(settings.get("openapi", {}).get("timeout_s", 5.0))
+
+
+def _send(kwargs: dict[str, Any]) -> httpx.Response:
+    return http_clients.request(**kwargs, timeout=_timeout_s())
+
+
+async def _asend(kwargs: dict[str, Any]) -> httpx.Response:
+    return await http_clients.arequest(**kwargs, timeout=_timeout_s())
+
+
+# openapi-python-client doesn't yet support Basic auth, using workaround mentioned:
+# https://github.com/openapi-generators/openapi-python-client/issues/525
+def request(
+    api: str,
+    base_url: str,
+    endpoint: str,
+    method: str,
+    auth_ctx: auth.StandardAuthContext,
+    params: dict[str, Any],
+    request_body: str | None,
+    function_name: str | None = None,
+) -> dict[str, Any]:
+    kwargs = _request_kwargs(
+        api=api,
+        base_url=base_url,
+        endpoint=endpoint,
+        method=method,
+        auth_ctx=auth_ctx,
+        params=params,
+        request_body=request_body,
+    )
+    response = retries.send(
+        urlsplit(base_url).hostname or base_url,
+        method,
+        functools.partial(_send, kwargs),
+        function_name,
+    )
+    return http_clients.response_content(response)
+
+
+async def arequest(
+    api: str,
+    base_url: str,
+    endpoint: str,
+    method: str,
+    auth_ctx: auth.StandardAuthContext,
+    params: dict[str, Any],
+    request_body: str | None,
+    function_name: str | None = None,
+) -> dict[str, Any]:
+    kwargs = _request_kwargs(
+        api=api,
+        base_url=base_url,
+        endpoint=endpoint,
+        method=method,
+        auth_ctx=auth_ctx,
+        params=params,
+        request_body=request_body,
+    )
+    response = await retries.asend(
+        urlsplit(base_url).hostname or base_url,
+        method,
+        functools.partial(_asend, kwargs),
+        function_name,
+    )
+    return http_clients.response_content(response)
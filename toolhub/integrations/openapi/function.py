@@ -53,6 +53,7 @@ def _callable(
     base_url: str,
     endpoint: str,
     method: str,
+    function_name: str | None = None,
 ) -> Callable:
     # NOTE: separate parameter namespace for client.request and the endpoint.
     def _impl(request_body: str | None = None, **params):
@@ -64,12 +65,38 @@ def _callable(
             auth_ctx=auth_ctx,
             params=params,
             request_body=request_body,
+            function_name=function_name,
         )
 
     return _impl
 
 
-def make_function(spec: OpenAPIFunctionSpec, base_url: str) -> function.Function:
+def _acallable(
+    auth_ctx: auth.StandardAuthContext,
+    api: str,
+    base_url: str,
+    endpoint: str,
+    method: str,
+    function_name: str | None = None,
+) -> Callable:
+    async def _impl(request_body: str | None = None, **params):
+        return await client.arequest(
+            api=api,
+            base_url=base_url,
+            endpoint=endpoint,
+            method=method,
+            auth_ctx=auth_ctx,
+            params=params,
+            request_body=request_body,
+            function_name=function_name,
+        )
+
+    return _impl
+
+
+def make_function(
+    spec: OpenAPIFunctionSpec, base_url: str, bulk: function.Bulk | None = None
+) -> function.Function:
     return function.Function(
         spec=spec,
         callable_=functools.partial(
@@ -78,5 +105,15 @@ def make_function(spec: OpenAPIFunctionSpec, base_url: str) -> function.Function
             base_url=base_url,
             endpoint=spec.endpoint,
             method=spec.method,
+            function_name=spec.name,
+        ),
+        acallable_=functools.partial(
+            _acallable,
+            api=spec.api,
+            base_url=base_url,
+            endpoint=spec.endpoint,
+            method=spec.method,
+            function_name=spec.name,
         ),
+        bulk=bulk,
     )
@@ -1,18 +1,23 @@
+from __future__ import annotations
+
 import json
 import pathlib
 import re
-from typing import Any, Union
-
-
-import openapi_python_client
-from openapi_python_client import cli
-from openapi_python_client.parser import properties
-from openapi_python_client.parser.properties import model_property
-from openapi_python_client.schema.openapi_schema_pydantic import reference
-from openapi_python_client.schema.openapi_schema_pydantic import schema
+from typing import TYPE_CHECKING, Any, Union
 
 from toolhub.lib import function
 from toolhub.integrations.openapi import function as openapi_function
+from toolhub.integrations.openapi import spec_cache
+
+# NOTE: openapi_python_client is slow to import and build; it's only needed when
+# the parsed function specs are not cached.
+if TYPE_CHECKING:
+    from openapi_python_client.parser import properties
+    from openapi_python_client.parser.properties import model_property
+    from openapi_python_client.schema.openapi_schema_pydantic import reference
+    from openapi_python_client.schema.openapi_schema_pydantic import schema
+
+    _TEndpoint = dict[str, Union[schema.Schema, properties.EnumProperty]]
 
 _MODEL_SPEC_RE = re.compile(r"^#?/components/schemas/(.*)")
 _DESCRIBE_RESPONSE_MAX_ENUM_VALUES = 2
@@ -20,8 +25,6 @@ _DESCRIBE_RESPONSE_MAX_SCHEMA_FIELDS = 20
 _DESCRIBE_RESPONSE_MAX_DEPTH = 7
 _DESCRIBE_RESPONSE_MAX_LENGTH = 1024
 
-_TEndpoint = dict[str, Union[schema.Schema, properties.EnumProperty]]
-
 
 def _name_for_type(s: str) -> str:
     if m := _MODEL_SPEC_RE.match(s):
@@ -42,11 +45,24 @@ class Parser:
         request_body_descriptions_path: pathlib.Path | None = None,
     ):
         self.api = api
+        self.schema_url = schema_url
+        self.schema_path = schema_path
+        self.request_body_descriptions_path = request_body_descriptions_path
+
+        if request_body_descriptions_path:
+            with request_body_descriptions_path.open("r") as f:
+                self.request_body_descriptions = json.load(f)
+        else:
+            self.request_body_descriptions = {}
+
+    def _load_project(self) -> None:
+        import openapi_python_client
+        from openapi_python_client import cli
 
         project = openapi_python_client._get_project_for_url_or_path(
             config=cli._process_config(
-                url=schema_url,
-                path=schema_path,
+                url=self.schema_url,
+                path=self.schema_path,
                 config_path=None,
                 meta_type=openapi_python_client.MetaType.NONE,
                 file_encoding="utf-8",
@@ -62,11 +78,6 @@ class Parser:
             for _, tag in project.openapi.endpoint_collections_by_tag.items()
             for endpoint in tag.endpoints
         }
-        if request_body_descriptions_path:
-            with request_body_descriptions_path.open("r") as f:
-                self.request_body_descriptions = json.load(f)
-        else:
-            self.request_body_descriptions = {}
 
     def _filter_endpoint(
         self, endpoint: dict[str, Union[schema.Schema, properties.EnumProperty]]
@@ -86,6 +97,8 @@ class Parser:
         self,
         model: model_property.ModelProperty,
     ) -> _TEndpoint | None:
+        from openapi_python_client.schema.openapi_schema_pydantic import reference
+
         _properties = model.data.properties
         # If the results are an array, return the array type
         if "results" in _properties:
@@ -122,6 +135,9 @@ class Parser:
         remaining_depth: int,
         v: reference.Reference | schema.Schema,
     ) -> str:
+        from openapi_python_client.schema.openapi_schema_pydantic import reference
+        from openapi_python_client.schema.openapi_schema_pydantic import schema
+
         if remaining_depth == 0:
             return ""
         if isinstance(v, reference.Reference):
@@ -204,6 +220,8 @@ class Parser:
         return description[:_DESCRIBE_RESPONSE_MAX_LENGTH] + "..."
 
     def _response_description(self, endpoint: _TEndpoint) -> str | None:
+        from openapi_python_client.parser import properties
+
         if not endpoint.responses or not (r := endpoint.responses[0]) or not r.prop:
             return None
         if isinstance(r.prop, properties.ModelProperty):
@@ -279,9 +297,27 @@ class Parser:
             description=(endpoint.summary or endpoint.description),
         )
 
+    def _cache_key(self) -> str | None:
+        if not self.schema_path:
+            return None
+        return spec_cache.key(
+            parser_name=f"{type(self).__module__}.{type(self).__qualname__}",
+            api=self.api,
+            schema_path=self.schema_path,
+            request_body_descriptions_path=self.request_body_descriptions_path,
+        )
+
     def fn_specs(self) -> list[openapi_function.OpenAPIFunctionSpec]:
+        cache_key = self._cache_key()
+        if cache_key and (fn_specs := spec_cache.load(cache_key)) is not None:
+            return fn_specs
+
+        self._load_project()
         fn_specs = []
         for endpoint in self.endpoints.values():
             if fn_spec := self._fn_spec(endpoint):
                 fn_specs.append(fn_spec)
+
+        if cache_key:
+            spec_cache.save(cache_key, fn_specs)
         return fn_specs
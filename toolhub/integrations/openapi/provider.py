@@ -6,10 +6,12 @@ import pathlib
 
 from toolhub.lib import function
 from toolhub.lib import provider
+from toolhub.lib import store
 
 from toolhub.integrations.openapi import parser
 from toolhub.integrations.openapi.function import make_function
 from toolhub.integrations.openapi.apis.alpaca import alpaca
+from toolhub.integrations.openapi.apis.crunchbase import bulk as crunchbase_bulk
 from toolhub.integrations.openapi.apis.crunchbase import crunchbase
 
 
@@ -18,6 +20,10 @@ class ApiLoader:
     api: str
     base_url: str
     parser_: parser.Parser
+    # Bulk counterparts of the API's functions, per (endpoint, method).
+    bulk_counterparts: dict[tuple[str, str], function.Bulk] = dataclasses.field(
+        default_factory=dict
+    )
 
 
 def standard_api_loader(
@@ -25,6 +31,7 @@ def standard_api_loader(
     schema_path: pathlib.Path,
     request_body_descriptions_path: Optional[pathlib.Path],
     base_url: str,
+    bulk_counterparts: dict[tuple[str, str], function.Bulk] | None = None,
 ) -> ApiLoader:
     return ApiLoader(
         api,
@@ -34,19 +41,88 @@ def standard_api_loader(
             schema_path=schema_path,
             request_body_descriptions_path=request_body_descriptions_path,
         ),
+        bulk_counterparts or {},
+    )
+
+
+def standard_api_loaders() -> list[ApiLoader]:
+    return [
+        standard_api_loader(
+            api,
+            schema_path,
+            request_body_descriptions_path,
+            base_url,
+            bulk_counterparts,
+        )
+        for (
+            api,
+            schema_path,
+            request_body_descriptions_path,
+            base_url,
+            bulk_counterparts,
+        ) in (
+            (
+                crunchbase.API,
+                crunchbase.SCHEMA_PATH,
+                crunchbase.REQUEST_BODY_DESCRIPTIONS_PATH,
+                crunchbase.BASE_URL,
+                crunchbase_bulk.bulk_counterparts(
+                    crunchbase.API, crunchbase.BASE_URL
+                ),
+            ),
+            (
+                alpaca.API,
+                alpaca.SCHEMA_PATH,
+                alpaca.REQUEST_BODY_DESCRIPTIONS_PATH,
+                alpaca.BASE_URL,
+                None,
+            ),
+            # NOTE: add new standard OpenAPI APIs here.
+        )
+    ]
+
+
+def _store_key(api_loader: ApiLoader) -> str:
+    parser_ = api_loader.parser_
+    return (
+        f"openapi:{api_loader.api}:{parser_.schema_path or parser_.schema_url}"
+        f":{api_loader.base_url}"
+    )
+
+
+def _shared_functions(api_loader: ApiLoader) -> list[function.Function]:
+    """Returns: the functions of the API, parsed once per process."""
+    return store.get(
+        _store_key(api_loader),
+        lambda: [
+            make_function(
+                spec,
+                api_loader.base_url,
+                api_loader.bulk_counterparts.get((spec.endpoint, spec.method)),
+            )
+            for spec in api_loader.parser_.fn_specs()
+        ],
     )
 
 
 class Provider(provider.Provider):
+    """Provides the functions of OpenAPI APIs, optionally filtered by name.
+
+    The functions of each API are parsed once per process and shared by all the
+    providers of the API.
+    """
+
     def __init__(self, api_loaders: list[ApiLoader], filter_function_names: Optional[List[str]] = None):
+        if filter_function_names is not None:
+            filter_function_names = set(filter_function_names)
         self._functions = []
         self._collections = []
         for api_loader in api_loaders:
-            fns = []
-            for spec in api_loader.parser_.fn_specs():
-                fn = make_function(spec, api_loader.base_url)
-                if filter_function_names is None or fn.spec.name in filter_function_names:
-                    fns.append(fn)
+            fns = [
+                fn
+                for fn in _shared_functions(api_loader)
+                if filter_function_names is None or fn.spec.name in filter_function_names
+            ]
 
             self._functions += fns
 
@@ -63,31 +139,14 @@ class Provider(provider.Provider):
     def collections(self) -> list[function.FunctionCollection]:
         return self._collections
 
+    @classmethod
+    def preload(cls) -> None:
+        """Parses the standard APIs into the process-wide store, e.g. before forking
+        worker processes."""
+        for api_loader in standard_api_loaders():
+            _shared_functions(api_loader)
+
     @classmethod
     def standard(cls, filter_function_names: Optional[List[str]] = None) -> Provider:
-        return cls(
-            [
-                standard_api_loader(
-                    api,
-                    schema_path,
-                    request_body_descriptions_path,
-                    base_url,
-                )
-                for api, schema_path, request_body_descriptions_path, base_url in (
-                    (
-                        crunchbase.API,
-                        crunchbase.SCHEMA_PATH,
-                        crunchbase.REQUEST_BODY_DESCRIPTIONS_PATH,
-                        crunchbase.BASE_URL,
-                    ),
-                    (
-                        alpaca.API,
-                        alpaca.SCHEMA_PATH,
-                        alpaca.REQUEST_BODY_DESCRIPTIONS_PATH,
-                        alpaca.BASE_URL,
-                    ),
-                    # NOTE: add new standard OpenAPI APIs here.
-                )
-            ], filter_function_names
+        return cls(standard_api_loaders(), filter_function_names)
 
-        )
@@ -0,0 +1,85 @@
+# On-disk cache of the function specs parsed from OpenAPI schemas, so that a warm
+# start doesn't need to build (or even import) openapi-python-client.
+import hashlib
+import logging
+import os
+import pathlib
+import pickle
+from typing import Any
+
+import toolhub
+from toolhub.config import settings
+
+log = logging.getLogger(__name__)
+
+# NOTE: bump when the pickled function spec classes change incompatibly.
+_FORMAT_VERSION = 2
+_DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "toolhub",
+    "openapi",
+)
+
+
+def _cache_dir() -> str | None:
+    config = settings.get("openapi", {})
+    if not config.get("spec_cache", True):
+        return None
+    return config.get("spec_cache_dir") or _DEFAULT_CACHE_DIR
+
+
+def key(
+    parser_name: str,
+    api: str,
+    schema_path: pathlib.Path,
+    request_body_descriptions_path: pathlib.Path | None,
+) -> str | None:
+    """Returns: the cache key of the function specs parsed from the files, or None
+    if caching is disabled.
+
+    The key changes whenever the content of either file, the parser or the version
+    of toolhub changes.
+    """
+    if not _cache_dir():
+        return None
+    hasher = hashlib.sha256()
+    for part in (
+        str(_FORMAT_VERSION),
+        toolhub.__version__,
+        parser_name,
+        api,
+    ):
+        hasher.update(part.encode())
+        hasher.update(b"\0")
+    for path in (schema_path, request_body_descriptions_path):
+        hasher.update(path.read_bytes() if path else b"")
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+def _path(key: str) -> str:
+    return os.path.join(_cache_dir() or "", f"{key}.pickle")
+
+
+def load(key: str) -> Any | None:
+    """Returns: the cached value of key, or None if absent or unreadable."""
+    try:
+        with open(_path(key), "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        log.warning(f"ignoring unreadable OpenAPI spec cache entry {key}: {e}")
+        return None
+
+
+def save(key: str, value: Any) -> None:
+    path = _path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.warning(f"failed to write OpenAPI spec cache entry {key}: {e}")
@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+from collections import defaultdict
+import json
+import os
+import sqlite3
+import sys
+from typing import Any, Iterable, Type
+
+import click
+import jsonpickle
+
+from toolhub.lib import function
+from toolhub.integrations.rapidapi import function as rapidapi_function
+
+# NOTE: bump when the schema or the encoding of rows changes.
+FORMAT_VERSION = 1
+
+_TYPES: dict[str, Type] = {
+    type_.__name__: type_ for type_ in (bool, int, float, str, list, dict)
+}
+
+_SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE functions (
+    name TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    api TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    method TEXT NOT NULL,
+    root_url TEXT NOT NULL,
+    url_f_string TEXT NOT NULL,
+    required_params TEXT NOT NULL,
+    conditional_params TEXT NOT NULL,
+    description TEXT,
+    parameters TEXT NOT NULL,
+    return_type TEXT,
+    return_description TEXT
+);
+CREATE INDEX functions_root_url ON functions (root_url);
+CREATE INDEX functions_collection ON functions (category, api);
+"""
+
+_COLUMNS = (
+    "name",
+    "category",
+    "api",
+    "endpoint",
+    "method",
+    "root_url",
+    "url_f_string",
+    "required_params",
+    "conditional_params",
+    "description",
+    "parameters",
+    "return_type",
+    "return_description",
+)
+
+
+def collection_name(category: str, api: str) -> str:
+    return f"{category}.{api}"
+
+
+def _type_name(type_: Type) -> str:
+    if _TYPES.get(name := type_.__name__) is not type_:
+        raise ValueError(f"unsupported catalog parameter type {type_}")
+    return name
+
+
+def _row(fn: rapidapi_function.RapidAPIFunction) -> tuple[Any, ...]:
+    spec = fn.spec
+    return (
+        spec.name,
+        fn.category,
+        fn.api,
+        fn.endpoint,
+        fn.method,
+        fn.root_url,
+        fn.url_f_string,
+        json.dumps(sorted(fn.required_params)),
+        json.dumps(sorted(fn.conditional_params)),
+        spec.description,
+        json.dumps(
+            [
+                [p.name, _type_name(p.type_), p.description, p.required]
+                for p in spec.parameters
+            ]
+        ),
+        _type_name(spec.return_.type_) if spec.return_ else None,
+        spec.return_.description if spec.return_ else None,
+    )
+
+
+def _function(row: sqlite3.Row) -> rapidapi_function.RapidAPIFunction:
+    return rapidapi_function.RapidAPIFunction(
+        spec=function.FunctionSpec(
+            name=row["name"],
+            parameters=[
+                function.ParameterSpec(
+                    name=sys.intern(name),
+                    type_=_TYPES[type_name],
+                    description=description,
+                    required=required,
+                )
+                for name, type_name, description, required in json.loads(
+                    row["parameters"]
+                )
+            ],
+            return_=(
+                function.ReturnSpec(
+                    type_=_TYPES[row["return_type"]],
+                    description=row["return_description"],
+                )
+                if row["return_type"]
+                else None
+            ),
+            description=row["description"],
+        ),
+        category=row["category"],
+        api=row["api"],
+        endpoint=row["endpoint"],
+        method=row["method"],
+        root_url=row["root_url"],
+        url_f_string=row["url_f_string"],
+        required_params=json.loads(row["required_params"]),
+        conditional_params=json.loads(row["conditional_params"]),
+    )
+
+
+class Writer:
+    """Writes a new catalog incrementally, e.g. while its functions are being built;
+    the catalog at path is replaced atomically on commit.
+
+    Use as a context manager, which commits on success and aborts on errors.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp_path = f"{path}.tmp"
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+        self._connection = sqlite3.connect(self._tmp_path)
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+        self.set_meta("format_version", str(FORMAT_VERSION))
+
+    def add(self, functions: Iterable[rapidapi_function.RapidAPIFunction]) -> None:
+        with self._connection:
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO functions ({', '.join(_COLUMNS)})"
+                f" VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                (_row(fn) for fn in functions),
+            )
+
+    def copy_categories(self, path: str, categories: Iterable[str]) -> None:
+        """Copies the functions of categories from the catalog at path as is."""
+        categories = list(categories)
+        self._connection.execute("ATTACH DATABASE ? AS source", (path,))
+        try:
+            with self._connection:
+                self._connection.execute(
+                    f"INSERT OR REPLACE INTO functions ({', '.join(_COLUMNS)})"
+                    f" SELECT {', '.join(_COLUMNS)} FROM source.functions"
+                    f" WHERE category IN ({', '.join('?' for _ in categories)})",
+                    categories,
+                )
+        finally:
+            self._connection.execute("DETACH DATABASE source")
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def commit(self) -> None:
+        try:
+            self._connection.execute("VACUUM")
+        finally:
+            self._connection.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._connection.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self) -> Writer:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+def write(path: str, functions: Iterable[rapidapi_function.RapidAPIFunction]) -> None:
+    """Writes the functions to a new catalog at path, replacing it atomically."""
+    with Writer(path) as writer:
+        writer.add(functions)
+
+
+class Catalog:
+    """Read access to a catalog of RapidAPI functions written by `write`.
+
+    Functions are indexed by name, hostname (root_url) and collection, and only
+    the functions selected by a query are materialized.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._connection.row_factory = sqlite3.Row
+        (format_version,) = self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'format_version'"
+        ).fetchone()
+        if int(format_version) != FORMAT_VERSION:
+            raise RuntimeError(
+                f"catalog {path} has format version {format_version}, expected"
+                f" {FORMAT_VERSION}; please rebuild it"
+            )
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def meta(self, prefix: str = "") -> dict[str, str]:
+        """Returns: the metadata entries whose key starts with prefix."""
+        return dict(
+            self._connection.execute(
+                "SELECT key, value FROM meta WHERE substr(key, 1, ?) = ?",
+                (len(prefix), prefix),
+            ).fetchall()
+        )
+
+    def _where(
+        self,
+        hostnames: Iterable[str] | None,
+        collections: Iterable[str] | None,
+        names: Iterable[str] | None,
+    ) -> tuple[str, list[str]]:
+        if hostnames is None and collections is None and names is None:
+            return "", []
+        conditions = []
+        args: list[str] = []
+        if hostnames is not None and (hostnames := list(hostnames)):
+            conditions.append(f"root_url IN ({', '.join('?' for _ in hostnames)})")
+            args += hostnames
+        for collection in collections or ():
+            category, api = collection.rsplit(".", 1)
+            conditions.append("(category = ? AND api = ?)")
+            args += [category, api]
+        if names is not None and (names := list(names)):
+            conditions.append(f"name IN ({', '.join('?' for _ in names)})")
+            args += names
+        return f" WHERE {' OR '.join(conditions) or '0'}", args
+
+    def functions(
+        self,
+        hostnames: Iterable[str] | None = None,
+        collections: Iterable[str] | None = None,
+        names: Iterable[str] | None = None,
+    ) -> list[rapidapi_function.RapidAPIFunction]:
+        """Returns: the functions matching any of the filters; all if none is set."""
+        where, args = self._where(hostnames, collections, names)
+        return [
+            _function(row)
+            for row in self._connection.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM functions{where} ORDER BY name",
+                args,
+            )
+        ]
+
+    def names(
+        self,
+        hostnames: Iterable[str] | None = None,
+        collections: Iterable[str] | None = None,
+        names: Iterable[str] | None = None,
+    ) -> list[str]:
+        """Returns: the names of the functions matching any of the filters; all if
+        none is set."""
+        where, args = self._where(hostnames, collections, names)
+        return [
+            row["name"]
+            for row in self._connection.execute(
+                f"SELECT name FROM functions{where} ORDER BY name", args
+            )
+        ]
+
+    def routes(self, hostnames: Iterable[str]) -> list[tuple[str, str, str]]:
+        """Returns: (name, root_url, url_f_string) of the functions of hostnames."""
+        where, args = self._where(hostnames, None, None)
+        return [
+            (row["name"], row["root_url"], row["url_f_string"])
+            for row in self._connection.execute(
+                f"SELECT name, root_url, url_f_string FROM functions{where}", args
+            )
+        ]
+
+
+def collections(
+    functions: Iterable[rapidapi_function.RapidAPIFunction],
+) -> list[function.FunctionCollection]:
+    """Returns: the collection of each category and api of functions."""
+    collection_to_names: dict[str, set[str]] = defaultdict(set)
+    for fn in functions:
+        collection_to_names[collection_name(fn.category, fn.api)].add(fn.spec.name)
+    return [
+        function.FunctionCollection(name=name, description=None, function_names=names)
+        for name, names in collection_to_names.items()
+    ]
+
+
+@click.command()
+@click.option("--source", required=True, help="jsonpickle functions.json to convert.")
+@click.option("--dest", required=True, help="Path of the catalog to write.")
+def run(source: str, dest: str) -> None:
+    with open(source, "r") as f:
+        category_to_api_to_functions = jsonpickle.decode(f.read())
+    write(
+        dest,
+        (
+            fn
+            for api_to_functions in category_to_api_to_functions.values()
+            for fns in api_to_functions.values()
+            for fn in fns
+        ),
+    )
+
+
+if __name__ == "__main__":
+    run()
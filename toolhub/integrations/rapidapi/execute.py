@@ -1,3 +1,4 @@
+import functools
 import json
 import os
 from typing import Any
@@ -5,19 +6,26 @@ from typing import Any
 import click
 import httpx
 
+from toolhub.integrations import http_clients
+from toolhub.integrations import rate_limits
+from toolhub.integrations import retries
+from toolhub.config import settings
 from toolhub.lib import auth
+from toolhub.lib import deadline
 from toolhub.lib.utils import not_none
 
+_DEFAULT_TIMEOUT_S = 5.0
 
-def execute(
+
+def _request_kwargs(
     method: str,
     root_url: str,
     url_f_string: str,
-    required_params: set[str],
-    conditional_params: set[str],
+    required_params: frozenset[str],
+    conditional_params: frozenset[str],
     auth_ctx: auth.AuthContext,
     params: dict[str, Any],
-) -> Any:
+) -> dict[str, Any]:
     url = url_f_string.format(**params)
 
     assert isinstance(auth_ctx, auth.StandardAuthContext)
@@ -36,18 +44,77 @@ def execute(
         if ((k in required_params) or (v and k in conditional_params))
     }
 
-    response = httpx.request(
+    return dict(
         method=method,
         url=url,
         headers=headers,
         params=params,
-        verify=True,
-        cookies={},
     )
 
-    if (code := response.status_code) and (code // 100 != 2):
-        raise RuntimeError(f"error({code}) {response.text}")
-    try:
-        return response.json()
-    except Exception:
-        return response.text
+
+def _timeout_s() -> float | None:
+    # NOTE: per attempt, capped by the time left before the call's deadline.
+    return deadline.timeout_s(
+        settings.get("rapidapi", {}).get("timeout_s", _DEFAULT_TIMEOUT_S)
+    )
+
+
+def _send(root_url: str, kwargs: dict[str, Any]) -> httpx.Response:
+    with rate_limits.limit(root_url):
+        return http_clients.request(**kwargs, timeout=_timeout_s())
+
+
+async def _asend(root_url: str, kwargs: dict[str, Any]) -> httpx.Response:
+    async with rate_limits.alimit(root_url):
+        return await http_clients.arequest(**kwargs, timeout=_timeout_s())
+
+
+def execute(
+    method: str,
+    root_url: str,
+    url_f_string: str,
+    required_params: frozenset[str],
+    conditional_params: frozenset[str],
+    auth_ctx: auth.AuthContext,
+    params: dict[str, Any],
+    function_name: str | None = None,
+) -> Any:
+    kwargs = _request_kwargs(
+        method=method,
+        root_url=root_url,
+        url_f_string=url_f_string,
+        required_params=required_params,
+        conditional_params=conditional_params,
+        auth_ctx=auth_ctx,
+        params=params,
+    )
+    # NOTE: each attempt waits for the rate limits; backoffs don't hold a slot.
+    response = retries.send(
+        root_url, method, functools.partial(_send, root_url, kwargs), function_name
+    )
+    return http_clients.response_content(response)
+
+
+async def aexecute(
+    method: str,
+    root_url: str,
+    url_f_string: str,
+    required_params: frozenset[str],
+    conditional_params: frozenset[str],
+    auth_ctx: auth.AuthContext,
+    params: dict[str, Any],
+    function_name: str | None = None,
+) -> Any:
+    kwargs = _request_kwargs(
+        method=method,
+        root_url=root_url,
+        url_f_string=url_f_string,
+        required_params=required_params,
+        conditional_params=conditional_params,
+        auth_ctx=auth_ctx,
+        params=params,
+    )
+    response = await retries.asend(
+        root_url, method, functools.partial(_asend, root_url, kwargs), function_name
+    )
+    return http_clients.response_content(response)
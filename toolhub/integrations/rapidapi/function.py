@@ -1,6 +1,6 @@
-import dataclasses
 import functools
-from typing import Callable
+import sys
+from typing import Any, Callable, Iterable
 
 from toolhub.integrations.rapidapi import execute
 from toolhub.lib import auth
@@ -12,8 +12,9 @@ def _callable(
     method: str,
     root_url: str,
     url_f_string: str,
-    required_params: set[str],
-    conditional_params: set[str],
+    required_params: frozenset[str],
+    conditional_params: frozenset[str],
+    function_name: str | None = None,
 ) -> Callable:
     # NOTE: separate parameter namespace for execute.execute and the endpoint.
     def _impl(**params):
@@ -25,13 +26,57 @@ def _callable(
             conditional_params=conditional_params,
             auth_ctx=auth_ctx,
             params=params,
+            function_name=function_name,
+        )
+
+    return _impl
+
+
+def _acallable(
+    auth_ctx: auth.AuthContext,
+    method: str,
+    root_url: str,
+    url_f_string: str,
+    required_params: frozenset[str],
+    conditional_params: frozenset[str],
+    function_name: str | None = None,
+) -> Callable:
+    async def _impl(**params):
+        return await execute.aexecute(
+            method=method,
+            root_url=root_url,
+            url_f_string=url_f_string,
+            required_params=required_params,
+            conditional_params=conditional_params,
+            auth_ctx=auth_ctx,
+            params=params,
+            function_name=function_name,
         )
 
     return _impl
 
 
-@dataclasses.dataclass
 class RapidAPIFunction(function.Function):
+    """A RapidAPI endpoint.
+
+    Compact, as the catalog holds tens of thousands: slotted, with interned
+    strings shared across the functions of an API, frozensets of parameters, and
+    callables built on first use.
+    """
+
+    __slots__ = (
+        "category",
+        "api",
+        "endpoint",
+        "method",
+        "root_url",
+        "url_f_string",
+        "required_params",
+        "conditional_params",
+        "_callable",
+        "_acallable",
+    )
+
     category: str
     api: str
     endpoint: str
@@ -39,8 +84,8 @@ class RapidAPIFunction(function.Function):
 
     root_url: str
     url_f_string: str
-    required_params: set[str]
-    conditional_params: set[str]
+    required_params: frozenset[str]
+    conditional_params: frozenset[str]
 
     def __init__(
         self,
@@ -51,30 +96,53 @@ class RapidAPIFunction(function.Function):
         method: str,
         root_url: str,
         url_f_string: str,
-        required_params: set[str],
-        conditional_params: set[str],
+        required_params: Iterable[str],
+        conditional_params: Iterable[str],
     ):
-        super().__init__(
-            spec=spec,
-            callable_=functools.partial(
-                _callable,
-                method=method,
-                root_url=root_url,
-                url_f_string=url_f_string,
-                required_params=required_params,
-                conditional_params=conditional_params,
-            ),
-        )
-
-        self.category = category
-        self.api = api
+        self.spec = spec
+        self.category = sys.intern(category)
+        self.api = sys.intern(api)
         self.endpoint = endpoint
-        self.method = method
+        self.method = sys.intern(method)
 
-        self.root_url = root_url
+        self.root_url = sys.intern(root_url)
         self.url_f_string = url_f_string
-        self.required_params = required_params
-        self.conditional_params = conditional_params
+        self.required_params = frozenset(sys.intern(p) for p in required_params)
+        self.conditional_params = frozenset(sys.intern(p) for p in conditional_params)
+        self._callable = None
+        self._acallable = None
+
+    def _kwargs(self) -> dict[str, Any]:
+        return dict(
+            method=self.method,
+            root_url=self.root_url,
+            url_f_string=self.url_f_string,
+            required_params=self.required_params,
+            conditional_params=self.conditional_params,
+            function_name=self.spec.name,
+        )
+
+    @property
+    def callable_(self) -> Callable[[auth.AuthContext], Callable]:
+        # NOTE: unset when restored without __init__, e.g. by jsonpickle.
+        if getattr(self, "_callable", None) is None:
+            self._callable = functools.partial(_callable, **self._kwargs())
+        return self._callable
+
+    @callable_.setter
+    def callable_(self, value: Callable[[auth.AuthContext], Callable]) -> None:
+        # NOTE: e.g. restored from a legacy jsonpickle catalog.
+        self._callable = value
+
+    @property
+    def acallable_(self) -> Callable[[auth.AuthContext], Callable]:
+        if getattr(self, "_acallable", None) is None:
+            self._acallable = functools.partial(_acallable, **self._kwargs())
+        return self._acallable
+
+    @acallable_.setter
+    def acallable_(self, value: Callable[[auth.AuthContext], Callable] | None) -> None:
+        self._acallable = value
 
     def __eq__(self, other):
         if not isinstance(other, RapidAPIFunction):
@@ -1,34 +1,175 @@
+import hashlib
 import jsonpickle
 import os
 
-from typing import Any
+from typing import Any, Iterable
 from toolhub.lib import auth
 from toolhub.lib import function
+from toolhub.lib import retrieval
+from toolhub.integrations.rapidapi import catalog
+from toolhub.integrations.rapidapi import function as rapidapi_function
+from toolhub.integrations.rapidapi import routes
+from toolhub.integrations.rapidapi import utils as rapidapi_utils
 
 # TODO: use package resources.
 _PARENT_DIR = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
+# Legacy jsonpickle catalog; used only when CATALOG_FILE does not exist.
 FUNCTIONS_FILE = os.path.join(_PARENT_DIR, "functions.json")
+CATALOG_FILE = os.path.join(_PARENT_DIR, "functions.sqlite")
+TOOL_INDEX_FILE = os.path.join(_PARENT_DIR, "functions.index")
 
 
-def load_functions_collections() -> (
-    tuple[
-        list[function.Function[Any, Any, auth.StandardAuthContext]],
-        list[function.FunctionCollection],
-    ]
+def load_legacy_functions() -> (
+    list[function.Function[Any, Any, auth.StandardAuthContext]]
 ):
+    """Returns: the functions of the legacy FUNCTIONS_FILE."""
     with open(FUNCTIONS_FILE, "r") as f:
         category_to_api_to_functions = jsonpickle.decode(f.read())
+    return [
+        fn
+        for api_to_functions in category_to_api_to_functions.values()
+        for fns in api_to_functions.values()
+        for fn in fns
+    ]
+
+
+class FunctionIndex:
+    """Selects functions held in memory by hostname, collection, name or endpoint
+    URL; as `catalog.Catalog` does for the functions of a catalog file.
+
+    Route tries are built on the first selection by endpoint URL of each host.
+    """
+
+    def __init__(self, functions: Iterable[rapidapi_function.RapidAPIFunction]):
+        self.name_to_fn: dict[str, rapidapi_function.RapidAPIFunction] = {}
+        self._hostname_to_names: dict[str, list[str]] = {}
+        self._collection_to_names: dict[str, list[str]] = {}
+        self._hostname_to_trie: dict[str, routes.RouteTrie] = {}
+        for fn in functions:
+            if (name := fn.spec.name) in self.name_to_fn:
+                continue
+            self.name_to_fn[name] = fn
+            self._hostname_to_names.setdefault(fn.root_url, []).append(name)
+            self._collection_to_names.setdefault(
+                catalog.collection_name(fn.category, fn.api), []
+            ).append(name)
+
+    def _trie(self, hostname: str) -> routes.RouteTrie:
+        if (trie := self._hostname_to_trie.get(hostname)) is None:
+            trie = self._hostname_to_trie[hostname] = routes.RouteTrie(
+                (name, self.name_to_fn[name].url_f_string)
+                for name in self._hostname_to_names.get(hostname, ())
+            )
+        return trie
+
+    def select(
+        self,
+        hostnames: Iterable[str] | None = None,
+        collections: Iterable[str] | None = None,
+        names: Iterable[str] | None = None,
+        endpoint_urls: Iterable[str] | None = None,
+    ) -> set[str]:
+        """Returns: the names of the functions matching any of the filters.
+
+        Args:
+            endpoint_urls: sanitized endpoint URLs.
+        """
+        selected = {name for name in names or () if name in self.name_to_fn}
+        for hostname in hostnames or ():
+            selected.update(self._hostname_to_names.get(hostname, ()))
+        for collection in collections or ():
+            selected.update(self._collection_to_names.get(collection, ()))
+        for url in endpoint_urls or ():
+            selected.update(self._trie(rapidapi_utils.url_hostname(url)).match(url))
+        return selected
+
 
-    functions = []
-    collections = []
-    for category, api_to_functions in category_to_api_to_functions.items():
-        for api, fns in api_to_functions.items():
-            functions += fns
-            collections.append(
-                function.FunctionCollection(
-                    name=f"{category}.{api}",
-                    description=None,
-                    function_names={fn.spec.name for fn in fns},
-                )
+def with_endpoint_names(
+    catalog_: catalog.Catalog,
+    names: Iterable[str] | None,
+    endpoint_urls: Iterable[str] | None,
+) -> Iterable[str] | None:
+    """Returns: names, and the names of the functions of catalog_ matching
+    endpoint_urls, if any; to filter catalog_ by name.
+
+    Args:
+        endpoint_urls: sanitized endpoint URLs.
+    """
+    if endpoint_urls is None:
+        return names
+    # NOTE: read only the routes of the endpoints' hosts.
+    return set(names or ()) | routes.match_endpoint_urls(
+        catalog_.routes({rapidapi_utils.url_hostname(url) for url in endpoint_urls}),
+        endpoint_urls,
+    )
+
+
+def load_functions_collections(
+    hostnames: Iterable[str] | None = None,
+    collections: Iterable[str] | None = None,
+    names: Iterable[str] | None = None,
+    endpoint_urls: Iterable[str] | None = None,
+) -> tuple[
+    list[function.Function[Any, Any, auth.StandardAuthContext]],
+    list[function.FunctionCollection],
+]:
+    """Returns: the functions matching any of the filters (all if none is set),
+    and their collections.
+
+    Args:
+        hostnames: RapidAPI hostnames, matched against the functions' root_url.
+        endpoint_urls: endpoint URLs, matched against the functions' URL f-strings.
+    """
+    if endpoint_urls is not None:
+        endpoint_urls = [rapidapi_utils.sanitize_url(url) for url in endpoint_urls]
+    unfiltered = (
+        hostnames is None
+        and collections is None
+        and names is None
+        and endpoint_urls is None
+    )
+
+    if not os.path.exists(CATALOG_FILE):
+        functions = load_legacy_functions()
+        if not unfiltered:
+            selected = FunctionIndex(functions).select(
+                hostnames, collections, names, endpoint_urls
             )
-    return functions, collections
+            functions = [fn for fn in functions if fn.spec.name in selected]
+        return functions, catalog.collections(functions)
+
+    catalog_ = catalog.Catalog(CATALOG_FILE)
+    try:
+        # NOTE: materialize only the matching functions.
+        functions = catalog_.functions(
+            hostnames=hostnames,
+            collections=collections,
+            names=with_endpoint_names(catalog_, names, endpoint_urls),
+        )
+    finally:
+        catalog_.close()
+    return functions, catalog.collections(functions)
+
+
+def _file_digest(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def load_tool_index(
+    embedding_backend: retrieval.EmbeddingBackend | None = None,
+) -> retrieval.ToolIndex:
+    """Returns: the retrieval index of all the functions of the catalog.
+
+    The index is built once per catalog file, and persisted to TOOL_INDEX_FILE.
+    """
+    path = CATALOG_FILE if os.path.exists(CATALOG_FILE) else FUNCTIONS_FILE
+    return retrieval.load_or_build(
+        TOOL_INDEX_FILE,
+        _file_digest(path),
+        lambda: load_functions_collections()[0],
+        embedding_backend,
+    )
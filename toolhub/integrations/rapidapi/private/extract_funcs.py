@@ -0,0 +1,195 @@
+# Extracts the function infos of the ToolBench tools/ tree into
+# function_infos.json, as extract_funcs.sh, but sharded across ast-grep processes
+# and incremental: the infos of each api.py are cached by mtime and content hash,
+# so that only the files changed since the previous run are scanned again.
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+from typing import Any, Iterator
+
+import click
+
+from toolhub.integrations.rapidapi.private import generate_functions_json
+
+log = logging.getLogger(__name__)
+
+_PARENT_DIR = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
+_RULE_FILE = os.path.join(_PARENT_DIR, "ast-grep.yaml")
+_FUNCTION_INFOS_FILE = os.path.join(_PARENT_DIR, "function_infos.json")
+_CACHE_FILE = os.path.join(_PARENT_DIR, "function_infos.cache.sqlite")
+_API_FILE = "api.py"
+_SHARD_SIZE = 200
+
+
+def _api_files(tools_dir: str) -> Iterator[str]:
+    """Yields: the path of each <category>/<api>/api.py, relative to tools_dir."""
+    for category in sorted(os.scandir(tools_dir), key=lambda e: e.name):
+        if not category.is_dir():
+            continue
+        for api in sorted(os.scandir(category.path), key=lambda e: e.name):
+            if os.path.isfile(os.path.join(api.path, _API_FILE)):
+                yield f"{category.name}/{api.name}/{_API_FILE}"
+
+
+def _namespace(path: str) -> str:
+    return generate_functions_json.namespace(generate_functions_json._PREFIX + path)
+
+
+def _digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class _Cache:
+    """The function infos of each api.py, with its mtime, size and digest."""
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY,"
+                " mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL,"
+                " digest TEXT NOT NULL, infos TEXT NOT NULL)"
+            )
+        self.entries = {
+            path: (mtime_ns, size, digest, infos)
+            for path, mtime_ns, size, digest, infos in self._connection.execute(
+                "SELECT path, mtime_ns, size, digest, infos FROM files"
+            )
+        }
+
+    def put(self, rows: list[tuple[str, int, int, str, str]]) -> None:
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, digest, infos)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        for path, mtime_ns, size, digest, infos in rows:
+            self.entries[path] = (mtime_ns, size, digest, infos)
+
+    def retain(self, paths: set[str]) -> None:
+        """Drops the entries of the files that no longer exist."""
+        if stale := [(path,) for path in self.entries if path not in paths]:
+            with self._connection:
+                self._connection.executemany("DELETE FROM files WHERE path = ?", stale)
+            for (path,) in stale:
+                del self.entries[path]
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def _scan_shard(tools_dir: str, paths: list[str]) -> dict[str, dict[str, Any]]:
+    """Returns: the function infos of each of paths, scanned by one ast-grep."""
+    path_to_infos: dict[str, dict[str, Any]] = {path: {} for path in paths}
+    process = subprocess.run(
+        [
+            "ast-grep",
+            "scan",
+            "--rule",
+            _RULE_FILE,
+            "--json=stream",
+            "--threads",
+            "1",
+            *paths,
+        ],
+        cwd=tools_dir,
+        capture_output=True,
+        text=True,
+    )
+    # NOTE: ast-grep exits with 1 when a rule matches with error severity.
+    if process.returncode not in (0, 1):
+        raise RuntimeError(f"ast-grep failed: {process.stderr}")
+    for line in process.stdout.splitlines():
+        data = json.loads(line)
+        path = os.path.normpath(data["file"])
+        if parsed := generate_functions_json.parse_match(data):
+            generate_functions_json.add_function(
+                path_to_infos[path], _namespace(path), *parsed
+            )
+    return path_to_infos
+
+
+def extract(
+    tools_dir: str,
+    output: str = _FUNCTION_INFOS_FILE,
+    cache_path: str = _CACHE_FILE,
+    max_workers: int | None = None,
+) -> None:
+    """Writes the function infos of the api.py files of tools_dir to output,
+    scanning only the files that changed since they were cached."""
+    cache = _Cache(cache_path)
+    try:
+        paths = list(_api_files(tools_dir))
+        to_scan: list[tuple[str, int, int, str]] = []
+        refreshed = []
+        for path in paths:
+            stat = os.stat(os.path.join(tools_dir, path))
+            entry = cache.entries.get(path)
+            if entry and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                continue
+            digest = _digest(os.path.join(tools_dir, path))
+            if entry and entry[2] == digest:
+                # NOTE: touched but unchanged; only refresh its mtime.
+                refreshed.append(
+                    (path, stat.st_mtime_ns, stat.st_size, digest, entry[3])
+                )
+            else:
+                to_scan.append((path, stat.st_mtime_ns, stat.st_size, digest))
+        cache.put(refreshed)
+        log.info(f"scanning {len(to_scan)} of {len(paths)} files")
+
+        # NOTE: the work is done by the ast-grep processes; threads drive them.
+        shards = [
+            to_scan[i : i + _SHARD_SIZE] for i in range(0, len(to_scan), _SHARD_SIZE)
+        ]
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or os.cpu_count()
+        ) as executor:
+            futures = [
+                executor.submit(_scan_shard, tools_dir, [s[0] for s in shard])
+                for shard in shards
+            ]
+            for shard, future in zip(shards, futures):
+                path_to_infos = future.result()
+                cache.put(
+                    [
+                        (path, mtime_ns, size, digest, json.dumps(path_to_infos[path]))
+                        for path, mtime_ns, size, digest in shard
+                    ]
+                )
+        cache.retain(set(paths))
+
+        function_infos = {
+            _namespace(path): json.loads(cache.entries[path][3]) for path in paths
+        }
+    finally:
+        cache.close()
+
+    tmp_output = f"{output}.tmp"
+    with open(tmp_output, "w") as f:
+        json.dump(function_infos, f)
+    os.replace(tmp_output, output)
+
+
+@click.command()
+@click.option(
+    "--tools-dir",
+    required=True,
+    help="The ToolBench data/toolenv/tools directory.",
+)
+@click.option("--output", default=_FUNCTION_INFOS_FILE, help="function_infos.json.")
+@click.option("--cache", default=_CACHE_FILE, help="Cache of the per-file infos.")
+@click.option("--max-workers", default=None, type=int, help="ast-grep processes.")
+def run(tools_dir: str, output: str, cache: str, max_workers: int | None) -> None:
+    logging.basicConfig(level=logging.INFO)
+    extract(tools_dir, output, cache, max_workers)
+
+
+if __name__ == "__main__":
+    run()
@@ -1,67 +1,90 @@
 import sys
 import json
 import logging
+from typing import Any, Iterable
 
 log = logging.getLogger(__name__)
 
-if len(sys.argv) < 2:
-    print("Please provide a file path as a command-line argument.")
-    sys.exit(1)
-
-file_path = sys.argv[1]
-
 _PREFIX = "data/toolenv/tools/"
 _SUFFIX = "/api.py"
 
-registry: dict = {}
 
-with open(file_path, "r") as file:
-    for line in file:
-        data = json.loads(line)
-        fname = data["file"]
-        assert fname.startswith(_PREFIX)
-        assert fname.endswith(_SUFFIX)
-        namespace = fname[len(_PREFIX) : -len(_SUFFIX)].replace("/", ".")
-        if namespace not in registry:
-            registry[namespace] = {}
-        single = data["metaVariables"]["single"]
-        name = single["NAME"]["text"]
-        rootUrl = json.loads(single["ROOT_URL"]["text"])
-        assert single["URL_FSTRING"]["text"].startswith("f")
-        urlFstring = json.loads(single["URL_FSTRING"]["text"][1:])
-        qstring = (
-            single["QUERYSTRING_DICT"]["text"]
-            .replace("'", '"')
-            .replace(":", ': "')
-            .replace(",", '",')
-            .replace("}", '"_DUMMY": null}')
-            .replace("\t", "")
+def namespace(fname: str) -> str:
+    """Returns: the category.api namespace of a ToolBench tools/ api.py path."""
+    assert fname.startswith(_PREFIX)
+    assert fname.endswith(_SUFFIX)
+    return fname[len(_PREFIX) : -len(_SUFFIX)].replace("/", ".")
+
+
+def parse_match(data: dict[str, Any]) -> tuple[str, dict[str, Any]] | None:
+    """Returns: the name and info of the function of an ast-grep match, or None if
+    its querystring can't be parsed."""
+    single = data["metaVariables"]["single"]
+    name = single["NAME"]["text"]
+    rootUrl = json.loads(single["ROOT_URL"]["text"])
+    assert single["URL_FSTRING"]["text"].startswith("f")
+    urlFstring = json.loads(single["URL_FSTRING"]["text"][1:])
+    qstring = (
+        single["QUERYSTRING_DICT"]["text"]
+        .replace("'", '"')
+        .replace(":", ': "')
+        .replace(",", '",')
+        .replace("}", '"_DUMMY": null}')
+        .replace("\t", "")
+    )
+    try:
+        querystringDict = json.loads(qstring)
+    except Exception as e:
+        log.error(
+            f"Error parsing querystring of {name} from {data['file']}: {qstring!r}: {e}"
         )
-        try:
-            querystringDict = json.loads(qstring)
-        except Exception as e:
-            log.error(
-                f"Error parsing querystring of {name} from {namespace}: {qstring!r}: {e}"
-            )
-            continue
-        requiredParams = [k.strip() for k in querystringDict if k != "_DUMMY"]
-        queryStringExtra = data["metaVariables"]["multi"]["QUERYSTRING_EXTRA"]
-        conditionalParams: list[str] = []
-        for qse in queryStringExtra:
-            t = qse["text"]
-            assert isinstance(t, str)
-            assert t.startswith("if ")
-            assert (colon := t.find(":")) > 0
-            pname = t[3:colon].strip()
-            assert pname.replace("_", "").isalnum(), f"Invalid name {name!r}"
-            conditionalParams.append(pname)
-        info = {
-            "rootUrl": rootUrl,
-            "urlFstring": urlFstring,
-            "requiredParams": requiredParams,
-            "conditionalParams": conditionalParams,
-        }
-        if name in registry[namespace] and registry[namespace][name] != info:
-            log.error(f"Non-identical duplicate function {name} in {namespace}")
-        registry[namespace][name] = info
-print(json.dumps(registry))
+        return None
+    requiredParams = [k.strip() for k in querystringDict if k != "_DUMMY"]
+    queryStringExtra = data["metaVariables"]["multi"]["QUERYSTRING_EXTRA"]
+    conditionalParams: list[str] = []
+    for qse in queryStringExtra:
+        t = qse["text"]
+        assert isinstance(t, str)
+        assert t.startswith("if ")
+        assert (colon := t.find(":")) > 0
+        pname = t[3:colon].strip()
+        assert pname.replace("_", "").isalnum(), f"Invalid name {name!r}"
+        conditionalParams.append(pname)
+    info = {
+        "rootUrl": rootUrl,
+        "urlFstring": urlFstring,
+        "requiredParams": requiredParams,
+        "conditionalParams": conditionalParams,
+    }
+    return name, info
+
+
+def add_function(
+    infos: dict[str, Any], namespace_: str, name: str, info: dict[str, Any]
+) -> None:
+    """Adds the info of a function to the infos of its namespace."""
+    if name in infos and infos[name] != info:
+        log.error(f"Non-identical duplicate function {name} in {namespace_}")
+    infos[name] = info
+
+
+def generate(lines: Iterable[str]) -> dict[str, dict[str, Any]]:
+    """Returns: the function infos of each namespace, from ast-grep JSON lines."""
+    registry: dict = {}
+    for line in lines:
+        data = json.loads(line)
+        namespace_ = namespace(data["file"])
+        if namespace_ not in registry:
+            registry[namespace_] = {}
+        if parsed := parse_match(data):
+            add_function(registry[namespace_], namespace_, *parsed)
+    return registry
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Please provide a file path as a command-line argument.")
+        sys.exit(1)
+
+    with open(sys.argv[1], "r") as file:
+        print(json.dumps(generate(file)))
@@ -1,20 +1,32 @@
-from collections import defaultdict
+import concurrent.futures
+import csv
 import hashlib
 import json
-import jsonpickle
+import logging
 import os
 import re
-from typing import Any, Optional
+import sys
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
 
-import pandas as pd
+import click
 
 from toolhub.config import settings
+from toolhub.integrations.rapidapi import catalog
 from toolhub.integrations.rapidapi import loader
 from toolhub.integrations.rapidapi import function as rapidapi_function
 from toolhub.lib import function
 
 _PARENT_DIR = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
 _FUNCTION_INFOS_FILE = os.path.join(_PARENT_DIR, "function_infos.json")
+# NOTE: bump when building functions from the same rows changes, to rebuild all
+# the categories.
+_BUILD_VERSION = 1
+_CATEGORY_DIGEST_PREFIX = "category_digest:"
+_BATCH_SIZE = 256
+
+log = logging.getLogger(__name__)
+T = TypeVar("T")
+R = TypeVar("R")
 
 
 def standardize_category(category: str) -> str:
@@ -94,9 +106,17 @@ def _parse_parameter(
     )
 
 
-def load_function_documents():
-    documents_df = pd.read_csv(settings.rapidapi.toolbench_data_path, sep="\t")
-    return documents_df["document_content"].apply(json.loads)
+def _document_rows(path: str) -> Iterator[str]:
+    """Yields: the raw JSON document of each row of the ToolBench TSV, streaming."""
+    csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+    with open(path, "r", newline="") as f:
+        for row in csv.DictReader(f, delimiter="\t"):
+            yield row["document_content"]
+
+
+def load_function_documents() -> Iterator[dict[str, Any]]:
+    for raw_doc in _document_rows(settings.rapidapi.toolbench_data_path):
+        yield json.loads(raw_doc)
 
 
 def load_function_infos() -> dict[str, dict[str, dict[str, Any]]]:
@@ -145,70 +165,208 @@ def create_function_spec(
     )
 
 
-def build_functions() -> dict[tuple[str, str], set[rapidapi_function.RapidAPIFunction]]:
-    function_documents = load_function_documents()
-    function_infos = load_function_infos()
-
-    category_to_api_to_functions = defaultdict(lambda: defaultdict(set))
-    for doc in function_documents:
-        category = str(doc["category_name"])
-        api = str(doc["tool_name"])
-        endpoint = str(doc["api_name"])
-        description = str(doc["api_description"])
-        required_parameters = list(doc["required_parameters"])
-        optional_parameters = list(doc["optional_parameters"])
-        method = str(doc["method"])
-
-        category = standardize_category(category)
-        api = standardize(api)
-        endpoint = change_name(standardize(endpoint))
-
-        info = function_infos[f"{category}.{api}"].get(endpoint)
-        if not info:
-            continue
-
-        root_url = info["rootUrl"]
-        url_f_string = info["urlFstring"]
-        required_params = info["requiredParams"]
-        conditional_params = info["conditionalParams"]
-
-        function_spec = create_function_spec(
-            category,
-            api,
-            endpoint,
-            description,
-            required_parameters,
-            optional_parameters,
-        )
-        if not function_spec:
-            continue
-        rapid_api_function = rapidapi_function.RapidAPIFunction(
-            spec=function_spec,
-            category=category,
-            api=api,
-            endpoint=endpoint,
-            method=method,
-            root_url=root_url,
-            url_f_string=url_f_string,
-            required_params=required_params,
-            conditional_params=conditional_params,
+def _build_function(
+    doc: dict[str, Any],
+    function_infos: dict[str, dict[str, dict[str, Any]]],
+) -> Optional[rapidapi_function.RapidAPIFunction]:
+    """Returns: the function of a ToolBench document, if it is supported."""
+    category = str(doc["category_name"])
+    api = str(doc["tool_name"])
+    endpoint = str(doc["api_name"])
+    description = str(doc["api_description"])
+    required_parameters = list(doc["required_parameters"])
+    optional_parameters = list(doc["optional_parameters"])
+    method = str(doc["method"])
+
+    category = standardize_category(category)
+    api = standardize(api)
+    endpoint = change_name(standardize(endpoint))
+
+    info = function_infos[f"{category}.{api}"].get(endpoint)
+    if not info:
+        return None
+
+    function_spec = create_function_spec(
+        category,
+        api,
+        endpoint,
+        description,
+        required_parameters,
+        optional_parameters,
+    )
+    if not function_spec:
+        return None
+    return rapidapi_function.RapidAPIFunction(
+        spec=function_spec,
+        category=category,
+        api=api,
+        endpoint=endpoint,
+        method=method,
+        root_url=info["rootUrl"],
+        url_f_string=info["urlFstring"],
+        required_params=info["requiredParams"],
+        conditional_params=info["conditionalParams"],
+    )
+
+
+# Function infos of a worker process of the build, loaded once per worker.
+_worker_function_infos: dict[str, dict[str, dict[str, Any]]] = {}
+
+
+def _init_worker(function_infos_path: str) -> None:
+    global _worker_function_infos
+    with open(function_infos_path, "r") as f:
+        _worker_function_infos = json.load(f)
+
+
+def _build_batch(raw_docs: list[str]) -> list[rapidapi_function.RapidAPIFunction]:
+    return [
+        fn
+        for raw_doc in raw_docs
+        if (fn := _build_function(json.loads(raw_doc), _worker_function_infos))
+    ]
+
+
+def _bounded_map(
+    executor: concurrent.futures.Executor,
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_in_flight: int,
+) -> Iterator[R]:
+    """Yields: fn of each of items, in order, with at most max_in_flight items
+    submitted at once; unlike Executor.map, which submits all the items."""
+    futures: list[concurrent.futures.Future] = []
+    for item in items:
+        futures.append(executor.submit(fn, item))
+        if len(futures) >= max_in_flight:
+            yield futures.pop(0).result()
+    for future in futures:
+        yield future.result()
+
+
+def _batches(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _category_digests(
+    data_path: str, function_infos_path: str
+) -> tuple[dict[str, str], list[str]]:
+    """Returns: the digest of the source of each category, and the category of
+    each row.
+
+    The source of a category is its rows and the function infos of its APIs.
+    """
+    row_categories = []
+    category_to_hasher: dict[str, Any] = {}
+    for raw_doc in _document_rows(data_path):
+        category = sys.intern(
+            standardize_category(str(json.loads(raw_doc)["category_name"]))
         )
-        category_to_api_to_functions[category][api].add(rapid_api_function)
-    return {
-        category: dict(api_to_functions)
-        for category, api_to_functions in category_to_api_to_functions.items()
-    }
+        row_categories.append(category)
+        if (hasher := category_to_hasher.get(category)) is None:
+            hasher = category_to_hasher[category] = hashlib.sha256(
+                f"{_BUILD_VERSION}\0".encode()
+            )
+        hasher.update(raw_doc.encode())
+        hasher.update(b"\0")
+
+    with open(function_infos_path, "r") as f:
+        function_infos = json.load(f)
+    for collection, infos in sorted(function_infos.items()):
+        category = collection.rsplit(".", 1)[0]
+        if hasher := category_to_hasher.get(category):
+            hasher.update(collection.encode())
+            hasher.update(json.dumps(infos, sort_keys=True).encode())
+    return (
+        {category: h.hexdigest() for category, h in category_to_hasher.items()},
+        row_categories,
+    )
 
 
-def build_and_save_function_collections():
-    functions = build_functions()
-    functions_json = jsonpickle.encode(functions)
-    with open(loader.FUNCTIONS_FILE, "w") as f:
-        f.write(functions_json)
+def build_catalog(
+    path: str,
+    data_path: str,
+    function_infos_path: str = _FUNCTION_INFOS_FILE,
+    max_workers: int | None = None,
+    incremental: bool = True,
+) -> None:
+    """Builds the catalog at path from the ToolBench TSV at data_path, streaming.
+
+    Rows are read incrementally and built into functions by a pool of processes,
+    in bounded batches, and the functions are written to the catalog as they are
+    built. With incremental, the functions of the categories whose source is
+    unchanged since the previous catalog at path are copied from it as is.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    digests, row_categories = _category_digests(data_path, function_infos_path)
+
+    unchanged: set[str] = set()
+    if incremental and os.path.exists(path):
+        try:
+            previous = catalog.Catalog(path)
+        except Exception as e:
+            log.warning(f"rebuilding all categories, unreadable catalog {path}: {e}")
+        else:
+            previous_digests = previous.meta(_CATEGORY_DIGEST_PREFIX)
+            previous.close()
+            unchanged = {
+                category
+                for category, digest in digests.items()
+                if previous_digests.get(_CATEGORY_DIGEST_PREFIX + category) == digest
+            }
+    log.info(f"building {len(digests) - len(unchanged)} of {len(digests)} categories")
+
+    changed_rows = (
+        raw_doc
+        for raw_doc, category in zip(_document_rows(data_path), row_categories)
+        if category not in unchanged
+    )
+    with catalog.Writer(path) as writer:
+        if unchanged:
+            writer.copy_categories(path, unchanged)
+        if len(unchanged) < len(digests):
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(function_infos_path,),
+            ) as executor:
+                for fns in _bounded_map(
+                    executor,
+                    _build_batch,
+                    _batches(changed_rows, _BATCH_SIZE),
+                    max_in_flight=2 * max_workers,
+                ):
+                    writer.add(fns)
+        for category, digest in digests.items():
+            writer.set_meta(_CATEGORY_DIGEST_PREFIX + category, digest)
 
 
-def run() -> None:
-    build_and_save_function_collections()
+def build_and_save_function_collections():
+    build_catalog(loader.CATALOG_FILE, settings.rapidapi.toolbench_data_path)
+
+
+@click.command()
+@click.option("--max-workers", default=None, type=int, help="Build processes.")
+@click.option(
+    "--incremental/--full",
+    default=True,
+    help="Only rebuild the categories whose source rows changed.",
+)
+def run(max_workers: int | None, incremental: bool) -> None:
+    logging.basicConfig(level=logging.INFO)
+    build_catalog(
+        loader.CATALOG_FILE,
+        settings.rapidapi.toolbench_data_path,
+        max_workers=max_workers,
+        incremental=incremental,
+    )
 
 
 if __name__ == "__main__":
@@ -1,93 +1,73 @@
 from __future__ import annotations
 
-from collections import defaultdict
-import re
+import threading
 
 from toolhub.lib import function
 from toolhub.lib import provider
 
-from toolhub.integrations.rapidapi import function as rapidapi_function
-from toolhub.integrations.rapidapi import loader
+from toolhub.integrations.rapidapi import shared_catalog
 from toolhub.integrations.rapidapi import utils as rapidapi_utils
 
 
-def _match_f_string(f_string: str, string: str) -> bool:
-    pattern = re.sub(r"{[^{}]*}", "(.*)", f_string)
-    return bool(re.fullmatch(pattern, string))
+class Provider(provider.Provider):
+    """Provides the RapidAPI functions of the catalog, filtered by API hostnames
+    and/or endpoint URLs (all functions if neither is set).
 
+    Providers are views of the process-wide `shared_catalog.shared()`: functions
+    are read lazily on first use, with the filters pushed down into the read, and
+    each function is materialized once however many providers select it.
+    """
 
-class Provider(provider.Provider):
     def __init__(
         self,
         filter_rapidapi_api_hostnames: list[str] | str | None = None,
         filter_rapidapi_endpoint_urls: list[str] | str | None = None,
     ):
-        functions, collections = loader.load_functions_collections()
-
         if isinstance(filter_rapidapi_api_hostnames, str):
             filter_rapidapi_api_hostnames = [filter_rapidapi_api_hostnames]
         if isinstance(filter_rapidapi_endpoint_urls, str):
             filter_rapidapi_endpoint_urls = [filter_rapidapi_endpoint_urls]
 
-        rapidapi_api_hostnames = None
-        if filter_rapidapi_api_hostnames:
-            rapidapi_api_hostnames = {
+        self._hostnames = None
+        self._endpoint_urls = None
+        if filter_rapidapi_api_hostnames or filter_rapidapi_endpoint_urls:
+            self._hostnames = {
                 rapidapi_utils.url_hostname(url)
-                for url in filter_rapidapi_api_hostnames
+                for url in filter_rapidapi_api_hostnames or ()
             }
+            self._endpoint_urls = list(filter_rapidapi_endpoint_urls or ())
 
-        rapidapi_hostname_to_function_urls = None
-        if filter_rapidapi_endpoint_urls:
-            rapidapi_hostname_to_function_urls = defaultdict(list)
-            for url in (
-                rapidapi_utils.sanitize_url(url)
-                for url in filter_rapidapi_endpoint_urls
-            ):
-                rapidapi_hostname_to_function_urls[
-                    rapidapi_utils.url_hostname(url)
-                ].append(url)
+        self._lock = threading.Lock()
+        self._functions: list[function.Function] | None = None
+        self._collections: list[function.FunctionCollection] | None = None
 
-        name_to_fn = {
-            fn.spec.name: fn
-            for fn in functions
-            if (
-                not (filter_rapidapi_api_hostnames or filter_rapidapi_endpoint_urls)
-                or (
-                    rapidapi_api_hostnames
-                    and isinstance(fn, rapidapi_function.RapidAPIFunction)
-                    and (fn.root_url in rapidapi_api_hostnames)
-                )
-                or (
-                    rapidapi_hostname_to_function_urls
-                    and isinstance(fn, rapidapi_function.RapidAPIFunction)
-                    and (
-                        urls := rapidapi_hostname_to_function_urls.get(fn.root_url, [])
-                    )
-                    and any(_match_f_string(fn.url_f_string, url) for url in urls)
-                )
+    def _load(self) -> None:
+        with self._lock:
+            if self._functions is not None:
+                return
+            functions, collections = shared_catalog.shared().functions(
+                hostnames=self._hostnames,
+                endpoint_urls=self._endpoint_urls,
             )
-        }
-
-        self._functions = list(name_to_fn.values())
-        self._collections = [
-            c
-            for c in (
-                function.FunctionCollection(
-                    name=c.name,
-                    description=c.description,
-                    function_names=(c.function_names & name_to_fn.keys()),
-                )
-                for c in collections
-            )
-            if c.function_names
-        ]
+            self._collections = collections
+            self._functions = functions
 
     def functions(self) -> list[function.Function]:
+        if self._functions is None:
+            self._load()
         return self._functions
 
     def collections(self) -> list[function.FunctionCollection]:
+        if self._functions is None:
+            self._load()
         return self._collections
 
+    @classmethod
+    def preload(cls) -> None:
+        """Loads all the functions of the catalog into the process-wide store, e.g.
+        before forking worker processes."""
+        shared_catalog.shared().preload()
+
     @classmethod
     def standard(
         cls,
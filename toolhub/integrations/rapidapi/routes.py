@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import re
+from typing import Iterable
+
+from toolhub.integrations.rapidapi import utils as rapidapi_utils
+
+_PLACEHOLDER_RE = re.compile(r"{[^{}]*}")
+
+
+def _segments(url: str) -> list[str]:
+    return rapidapi_utils.sanitize_url(url).split("/")
+
+
+def _segment_pattern(segment: str) -> re.Pattern | None:
+    if not _PLACEHOLDER_RE.search(segment):
+        return None
+    return re.compile(
+        "(.*)".join(re.escape(part) for part in _PLACEHOLDER_RE.split(segment))
+    )
+
+
+class _Node:
+    __slots__ = ("literals", "patterns", "tails", "names")
+
+    def __init__(self):
+        self.literals: dict[str, _Node] = {}
+        self.patterns: dict[str, tuple[re.Pattern, _Node]] = {}
+        # Last segments with placeholders, matched against the rest of the path.
+        self.tails: dict[str, tuple[re.Pattern, list[str]]] = {}
+        self.names: list[str] = []
+
+
+class RouteTrie:
+    """Matches URLs against the URL f-strings of functions, e.g.
+    https://host/v1/{id} matches https://host/v1/42.
+
+    Routes are split into path segments once; a segment with placeholders is
+    compiled to a regex once, and matches within that segment. The last segment
+    of a route matches the rest of the path, e.g. https://host/files/{path}
+    matches https://host/files/a/b.pdf.
+    """
+
+    def __init__(self, routes: Iterable[tuple[str, str]] = ()):
+        self._root = _Node()
+        for name, url_f_string in routes:
+            self.add(name, url_f_string)
+
+    def add(self, name: str, url_f_string: str) -> None:
+        node = self._root
+        segments = _segments(url_f_string)
+        for i, segment in enumerate(segments):
+            if (pattern := _segment_pattern(segment)) is None:
+                node = node.literals.setdefault(segment, _Node())
+            elif i == len(segments) - 1:
+                if segment not in node.tails:
+                    node.tails[segment] = (pattern, [])
+                node.tails[segment][1].append(name)
+                return
+            else:
+                if segment not in node.patterns:
+                    node.patterns[segment] = (pattern, _Node())
+                node = node.patterns[segment][1]
+        node.names.append(name)
+
+    def match(self, url: str) -> list[str]:
+        """Returns: the names of the routes matching url."""
+        names: list[str] = []
+        segments = _segments(url)
+        stack = [(self._root, 0)]
+        while stack:
+            node, i = stack.pop()
+            if i == len(segments):
+                names += node.names
+                continue
+            if node.tails:
+                rest = "/".join(segments[i:])
+                for pattern, tail_names in node.tails.values():
+                    if pattern.fullmatch(rest):
+                        names += tail_names
+            segment = segments[i]
+            if child := node.literals.get(segment):
+                stack.append((child, i + 1))
+            for pattern, child in node.patterns.values():
+                if pattern.fullmatch(segment):
+                    stack.append((child, i + 1))
+        return names
+
+
+def match_endpoint_urls(
+    routes: Iterable[tuple[str, str, str]],
+    endpoint_urls: Iterable[str],
+) -> set[str]:
+    """Returns: the names of the routes matching any of endpoint_urls.
+
+    Args:
+        routes: (name, root_url, url_f_string) of each function.
+    """
+    hostname_to_urls: dict[str, list[str]] = {}
+    for url in endpoint_urls:
+        hostname_to_urls.setdefault(rapidapi_utils.url_hostname(url), []).append(url)
+
+    hostname_to_trie: dict[str, RouteTrie] = {}
+    for name, root_url, url_f_string in routes:
+        if root_url in hostname_to_urls:
+            hostname_to_trie.setdefault(root_url, RouteTrie()).add(name, url_f_string)
+
+    return {
+        name
+        for hostname, trie in hostname_to_trie.items()
+        for url in hostname_to_urls[hostname]
+        for name in trie.match(url)
+    }
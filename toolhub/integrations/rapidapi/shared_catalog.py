@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Iterable
+
+from toolhub.lib import function
+from toolhub.lib import store
+from toolhub.integrations.rapidapi import catalog
+from toolhub.integrations.rapidapi import function as rapidapi_function
+from toolhub.integrations.rapidapi import loader
+from toolhub.integrations.rapidapi import utils as rapidapi_utils
+
+
+class SharedCatalog:
+    """The functions of the RapidAPI catalog, materialized at most once per process
+    and shared by all the providers that select them.
+
+    Selections are pushed down into the catalog, and only the selected functions
+    that were not materialized yet are read. After `preload`, all the functions
+    are in memory and selections no longer read the catalog; preload before
+    forking worker processes to share the functions copy-on-write.
+    """
+
+    def __init__(self, path: str = loader.CATALOG_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._catalog: catalog.Catalog | None = None
+        self._name_to_fn: dict[str, rapidapi_function.RapidAPIFunction] = {}
+        # Set by preload: the index of all the functions.
+        self._index: loader.FunctionIndex | None = None
+
+    def _check_pid(self) -> None:
+        # NOTE: SQLite connections and locks must not be used across a fork; the
+        # materialized functions are kept.
+        if (pid := os.getpid()) != self._pid:
+            self._lock = threading.Lock()
+            self._catalog = None
+            self._pid = pid
+
+    def _catalog_(self) -> catalog.Catalog:
+        if self._catalog is None:
+            self._catalog = catalog.Catalog(self.path)
+        return self._catalog
+
+    def _materialize(self, names: Iterable[str]) -> None:
+        if missing := [name for name in names if name not in self._name_to_fn]:
+            for fn in self._catalog_().functions(names=missing):
+                self._name_to_fn[fn.spec.name] = fn
+
+    def preload(self) -> None:
+        """Materializes and indexes all the functions of the catalog."""
+        self._check_pid()
+        with self._lock:
+            if self._index is not None:
+                return
+            if os.path.exists(self.path):
+                self._materialize(self._catalog_().names())
+                functions = self._name_to_fn.values()
+            else:
+                functions = loader.load_legacy_functions()
+            self._index = loader.FunctionIndex(functions)
+            self._name_to_fn = self._index.name_to_fn
+
+    def _select_in_catalog(
+        self,
+        hostnames: Iterable[str] | None,
+        collections: Iterable[str] | None,
+        names: Iterable[str] | None,
+        endpoint_urls: Iterable[str] | None,
+    ) -> set[str]:
+        catalog_ = self._catalog_()
+        selected = catalog_.names(
+            hostnames=hostnames,
+            collections=collections,
+            names=loader.with_endpoint_names(catalog_, names, endpoint_urls),
+        )
+        self._materialize(selected)
+        return set(selected)
+
+    def functions(
+        self,
+        hostnames: Iterable[str] | None = None,
+        collections: Iterable[str] | None = None,
+        names: Iterable[str] | None = None,
+        endpoint_urls: Iterable[str] | None = None,
+    ) -> tuple[
+        list[rapidapi_function.RapidAPIFunction], list[function.FunctionCollection]
+    ]:
+        """Returns: the shared functions matching any of the filters (all if none is
+        set), and their collections; as `loader.load_functions_collections`."""
+        if endpoint_urls is not None:
+            endpoint_urls = [rapidapi_utils.sanitize_url(url) for url in endpoint_urls]
+        unfiltered = (
+            hostnames is None
+            and collections is None
+            and names is None
+            and endpoint_urls is None
+        )
+        if unfiltered or not os.path.exists(self.path):
+            self.preload()
+
+        self._check_pid()
+        with self._lock:
+            if unfiltered:
+                selected = set(self._name_to_fn)
+            elif self._index is not None:
+                selected = self._index.select(
+                    hostnames, collections, names, endpoint_urls
+                )
+            else:
+                selected = self._select_in_catalog(
+                    hostnames, collections, names, endpoint_urls
+                )
+            functions = [self._name_to_fn[name] for name in sorted(selected)]
+        return functions, catalog.collections(functions)
+
+
+def shared() -> SharedCatalog:
+    """Returns: the process-wide shared catalog."""
+    return store.get(f"rapidapi:{loader.CATALOG_FILE}", SharedCatalog)
@@ -0,0 +1,321 @@
+# Per-host rate limits and concurrency limits of the HTTP-based integrations, so
+# that bursts of parallel calls are queued instead of exceeding the quotas of
+# e.g. RapidAPI plans. Calls wait in order of arrival, both for a concurrency
+# slot and for a token of the host's bucket. Limits are configured in the
+# `http.rate_limits` section of settings.yml; hosts without limits are not
+# governed at all.
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import os
+import threading
+import time
+from typing import AsyncIterator, Iterator
+
+from toolhub.config import settings
+from toolhub.lib import deadline
+
+
+@dataclasses.dataclass(frozen=True)
+class Limits:
+    # Sustained calls per second; unlimited if None.
+    rate_per_s: float | None = None
+    # Calls that may start at once after an idle period.
+    burst: int = 1
+    # Calls in flight at the same time; unlimited if None.
+    max_concurrency: int | None = None
+
+
+@dataclasses.dataclass
+class HostStats:
+    calls: int = 0
+    # Calls that had to wait for a slot or a token.
+    queued: int = 0
+    wait_s: float = 0.0
+    max_wait_s: float = 0.0
+    in_flight: int = 0
+    waiting: int = 0
+
+
+class _TokenBucket:
+    """A token bucket where each call reserves the next token in order of arrival,
+    and then waits for it without holding any lock."""
+
+    def __init__(self, rate_per_s: float, burst: int):
+        assert rate_per_s > 0, ValueError(f"rate_per_s must be positive: {rate_per_s}")
+        assert burst >= 1, ValueError(f"burst must be positive: {burst}")
+        self._interval_s = 1 / rate_per_s
+        self._burst = burst
+        self._lock = threading.Lock()
+        # When the next token is available.
+        self._next = time.monotonic()
+
+    def reserve(self, max_delay_s: float | None = None) -> float | None:
+        """Returns: the delay until the reserved token is available; None, without
+        reserving any, if it's beyond max_delay_s."""
+        with self._lock:
+            now = time.monotonic()
+            # NOTE: tokens accrue while idle, up to burst.
+            self._next = max(self._next, now - (self._burst - 1) * self._interval_s)
+            delay = self._next - now
+            if max_delay_s is not None and delay > max_delay_s:
+                return None
+            self._next += self._interval_s
+        return max(0.0, delay)
+
+
+def _grant(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class _FifoSemaphore:
+    """A semaphore shared by threads and event loops, which hands released slots to
+    the waiters in order of arrival."""
+
+    def __init__(self, value: int):
+        assert value >= 1, ValueError(f"max_concurrency must be positive: {value}")
+        self._lock = threading.Lock()
+        self._value = value
+        self._waiters: collections.deque[
+            threading.Event | asyncio.Future
+        ] = collections.deque()
+
+    def acquire(self) -> bool:
+        """Returns: whether the call had to wait.
+
+        Raises: DeadlineExceeded if the call's deadline passes while waiting.
+        """
+        with self._lock:
+            if self._value and not self._waiters:
+                self._value -= 1
+                return False
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+        if waiter.wait(timeout=deadline.remaining_s()):
+            return True
+        with self._lock:
+            granted = waiter not in self._waiters
+            if not granted:
+                self._waiters.remove(waiter)
+        # NOTE: the slot may have been handed over as the wait timed out.
+        if granted:
+            self.release()
+        raise deadline.DeadlineExceeded(
+            "call ran out of time waiting for a concurrency slot"
+        )
+
+    async def aacquire(self) -> bool:
+        """Returns: whether the call had to wait."""
+        with self._lock:
+            if self._value and not self._waiters:
+                self._value -= 1
+                return False
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter not in self._waiters
+                if not granted:
+                    self._waiters.remove(waiter)
+            # NOTE: the slot may have been handed over before the cancellation.
+            if granted:
+                self.release()
+            raise
+        return True
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self._value += 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+            return
+        try:
+            waiter.get_loop().call_soon_threadsafe(_grant, waiter)
+        except RuntimeError:
+            # NOTE: the waiter's loop is closed; hand the slot to the next one.
+            self.release()
+
+
+def _reserve(bucket: _TokenBucket) -> float:
+    """Returns: the delay until the call's token is available.
+
+    Raises: DeadlineExceeded right away, without taking a token, rather than wait
+    past the call's deadline.
+    """
+    if (delay_s := bucket.reserve(deadline.remaining_s())) is None:
+        raise deadline.DeadlineExceeded(
+            "call would exceed its deadline waiting for the rate limit"
+        )
+    return delay_s
+
+
+class _HostLimiter:
+    def __init__(self, limits: Limits):
+        self.limits = limits
+        self._bucket = (
+            _TokenBucket(limits.rate_per_s, limits.burst)
+            if limits.rate_per_s is not None
+            else None
+        )
+        self._semaphore = (
+            _FifoSemaphore(limits.max_concurrency)
+            if limits.max_concurrency is not None
+            else None
+        )
+        self._stats_lock = threading.Lock()
+        self._stats = HostStats()
+
+    def stats(self) -> HostStats:
+        with self._stats_lock:
+            return dataclasses.replace(self._stats)
+
+    def _enqueue(self) -> float:
+        with self._stats_lock:
+            self._stats.waiting += 1
+        return time.monotonic()
+
+    def _start(self, start: float, queued: bool) -> None:
+        wait_s = time.monotonic() - start
+        with self._stats_lock:
+            stats = self._stats
+            stats.waiting -= 1
+            stats.in_flight += 1
+            stats.calls += 1
+            stats.queued += queued
+            stats.wait_s += wait_s
+            stats.max_wait_s = max(stats.max_wait_s, wait_s)
+
+    def _done(self) -> None:
+        with self._stats_lock:
+            self._stats.in_flight -= 1
+
+    @contextlib.contextmanager
+    def limit(self) -> Iterator[None]:
+        start = self._enqueue()
+        queued = False
+        try:
+            if self._semaphore:
+                queued = self._semaphore.acquire()
+            try:
+                if self._bucket and (delay := _reserve(self._bucket)):
+                    queued = True
+                    time.sleep(delay)
+            except BaseException:
+                if self._semaphore:
+                    self._semaphore.release()
+                raise
+        except BaseException:
+            with self._stats_lock:
+                self._stats.waiting -= 1
+            raise
+        self._start(start, queued)
+        try:
+            yield
+        finally:
+            self._done()
+            if self._semaphore:
+                self._semaphore.release()
+
+    @contextlib.asynccontextmanager
+    async def alimit(self) -> AsyncIterator[None]:
+        start = self._enqueue()
+        queued = False
+        try:
+            if self._semaphore:
+                queued = await self._semaphore.aacquire()
+            try:
+                if self._bucket and (delay := _reserve(self._bucket)):
+                    queued = True
+                    await asyncio.sleep(delay)
+            except BaseException:
+                if self._semaphore:
+                    self._semaphore.release()
+                raise
+        except BaseException:
+            with self._stats_lock:
+                self._stats.waiting -= 1
+            raise
+        self._start(start, queued)
+        try:
+            yield
+        finally:
+            self._done()
+            if self._semaphore:
+                self._semaphore.release()
+
+
+_lock = threading.Lock()
+# None for the hosts without limits.
+_limiters: dict[str, _HostLimiter | None] = {}
+
+
+def _limits(host: str) -> Limits | None:
+    config = settings.get("http", {}).get("rate_limits", {})
+    # NOTE: hostnames contain dots, which dynaconf would read as nested keys.
+    hosts = {h.lower(): c for h, c in (config.get("hosts") or {}).items()}
+    merged = {**(config.get("default") or {}), **(hosts.get(host) or {})}
+    if merged.get("rate_per_s") is None and merged.get("max_concurrency") is None:
+        return None
+    return Limits(
+        rate_per_s=merged.get("rate_per_s"),
+        burst=merged.get("burst", 1),
+        max_concurrency=merged.get("max_concurrency"),
+    )
+
+
+def _limiter(host: str) -> _HostLimiter | None:
+    host = host.lower()
+    try:
+        return _limiters[host]
+    except KeyError:
+        pass
+    with _lock:
+        if host not in _limiters:
+            limits = _limits(host)
+            _limiters[host] = _HostLimiter(limits) if limits else None
+        return _limiters[host]
+
+
+def limit(host: str) -> contextlib.AbstractContextManager:
+    """Returns: a context that waits for the limits of host, e.g. the root_url of a
+    RapidAPI function, and holds its concurrency slot while the call runs."""
+    if limiter := _limiter(host):
+        return limiter.limit()
+    return contextlib.nullcontext()
+
+
+def alimit(host: str) -> contextlib.AbstractAsyncContextManager:
+    """Returns: the async counterpart of limit."""
+    if limiter := _limiter(host):
+        return limiter.alimit()
+    return contextlib.nullcontext()
+
+
+def metrics() -> dict[str, dict]:
+    """Returns: the queueing counters of each host with limits."""
+    with _lock:
+        limiters = [(host, lim) for host, lim in _limiters.items() if lim]
+    return {host: dataclasses.asdict(lim.stats()) for host, lim in limiters}
+
+
+def reset() -> None:
+    """Drops all limiters, e.g. to apply changed settings."""
+    with _lock:
+        _limiters.clear()
+
+
+def _reset_after_fork() -> None:
+    # NOTE: the parent's queues and locks must not be shared with the child.
+    global _lock
+    _lock = threading.Lock()
+    _limiters.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
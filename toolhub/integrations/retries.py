@@ -0,0 +1,305 @@
+# Retries of the HTTP calls of the HTTP-based integrations, so that transient
+# upstream failures (e.g. 429s, 503s, connection errors) don't fail the tool call.
+# Only idempotent methods are retried by default, with exponential backoff and
+# jitter, honoring Retry-After, within an overall deadline. Slow safe requests
+# (GET, HEAD, OPTIONS) can also be hedged: a second request is sent if the first
+# doesn't complete in time, and the first usable response wins. Policies are
+# configured in the `http.retries` section of settings.yml, per host and per
+# function.
+import asyncio
+import concurrent.futures
+import contextvars
+import dataclasses
+import email.utils
+import functools
+import os
+import threading
+import time
+from typing import Awaitable, Callable
+
+import httpx
+import tenacity
+
+from toolhub.config import settings
+from toolhub.lib import deadline
+
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+# NOTE: idempotent writes (PUT, DELETE) may be retried once they have failed, but
+# not hedged, which would send them twice while the first is still in flight.
+HEDGED_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+_DEFAULT_STATUSES = frozenset((429, 502, 503, 504))
+_MAX_HEDGE_WORKERS = 32
+
+Request = Callable[[], httpx.Response]
+ARequest = Callable[[], Awaitable[httpx.Response]]
+
+
+@dataclasses.dataclass(frozen=True)
+class RetryPolicy:
+    # Attempts of a call, including the first; 1 disables retries.
+    max_attempts: int = 3
+    # Base and max of the exponential backoff, before jitter.
+    backoff_s: float = 0.2
+    max_backoff_s: float = 5.0
+    # Overall budget of a call's attempts and backoffs.
+    deadline_s: float = 15.0
+    methods: frozenset[str] = IDEMPOTENT_METHODS
+    statuses: frozenset[int] = _DEFAULT_STATUSES
+    # Delay after which a request of HEDGED_METHODS is hedged with a second one;
+    # off if None.
+    hedge_after_s: float | None = None
+
+
+@dataclasses.dataclass
+class RetryStats:
+    calls: int = 0
+    retries: int = 0
+    hedges: int = 0
+    # Hedged calls won by the second request.
+    hedge_wins: int = 0
+
+
+_lock = threading.Lock()
+_policies: dict[tuple[str, str | None], RetryPolicy] = {}
+_stats: dict[str, RetryStats] = {}
+_executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+
+def _policy_fields(config: dict) -> dict:
+    fields = dict(config)
+    if "methods" in fields:
+        fields["methods"] = frozenset(m.upper() for m in fields["methods"])
+    if "statuses" in fields:
+        fields["statuses"] = frozenset(fields["statuses"])
+    return fields
+
+
+def policy(host: str, function_name: str | None = None) -> RetryPolicy:
+    """Returns: the retry policy of the calls of function_name to host; function
+    settings override host settings, which override the defaults."""
+    host = host.lower()
+    if p := _policies.get((host, function_name)):
+        return p
+    config = settings.get("http", {}).get("retries", {})
+    # NOTE: hostnames contain dots, which dynaconf would read as nested keys.
+    hosts = {h.lower(): c for h, c in (config.get("hosts") or {}).items()}
+    functions = dict((config.get("functions") or {}).items())
+    p = RetryPolicy(
+        **_policy_fields(
+            {
+                **(config.get("default") or {}),
+                **(hosts.get(host) or {}),
+                **((function_name and functions.get(function_name)) or {}),
+            }
+        )
+    )
+    with _lock:
+        return _policies.setdefault((host, function_name), p)
+
+
+def _record(host: str, **increments: int) -> None:
+    with _lock:
+        stats = _stats.setdefault(host, RetryStats())
+        for field, increment in increments.items():
+            setattr(stats, field, getattr(stats, field) + increment)
+
+
+def metrics() -> dict[str, dict]:
+    """Returns: the retry and hedging counters of each host."""
+    with _lock:
+        return {host: dataclasses.asdict(s) for host, s in _stats.items()}
+
+
+def reset() -> None:
+    """Drops the policies and counters, e.g. to apply changed settings."""
+    with _lock:
+        _policies.clear()
+        _stats.clear()
+
+
+def _retry_after_s(response: httpx.Response) -> float | None:
+    if (value := response.headers.get("Retry-After")) is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value).timestamp()
+        return max(0.0, retry_at - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry(policy_: RetryPolicy, retry_state: tenacity.RetryCallState) -> bool:
+    outcome = retry_state.outcome
+    if outcome.failed:
+        return isinstance(outcome.exception(), httpx.TransportError)
+    return outcome.result().status_code in policy_.statuses
+
+
+def _upstream_delay_s(retry_state: tenacity.RetryCallState) -> float | None:
+    outcome = retry_state.outcome
+    if outcome is None or outcome.failed:
+        return None
+    return _retry_after_s(outcome.result())
+
+
+def _remaining_s(policy_: RetryPolicy, retry_state: tenacity.RetryCallState) -> float:
+    remaining_s = policy_.deadline_s - retry_state.seconds_since_start
+    # NOTE: the call's own deadline, if any, may be earlier.
+    if (call_remaining_s := deadline.remaining_s()) is not None:
+        remaining_s = min(remaining_s, call_remaining_s)
+    return remaining_s
+
+
+def _stop(policy_: RetryPolicy, retry_state: tenacity.RetryCallState) -> bool:
+    if retry_state.attempt_number >= policy_.max_attempts:
+        return True
+    remaining_s = _remaining_s(policy_, retry_state)
+    # NOTE: give up right away if upstream asks to wait beyond the deadline.
+    return remaining_s <= 0 or (_upstream_delay_s(retry_state) or 0.0) > remaining_s
+
+
+def _wait(
+    policy_: RetryPolicy,
+    backoff: tenacity.wait.wait_base,
+    retry_state: tenacity.RetryCallState,
+) -> float:
+    delay_s = _upstream_delay_s(retry_state)
+    if delay_s is None:
+        delay_s = backoff(retry_state)
+    return max(0.0, min(delay_s, _remaining_s(policy_, retry_state)))
+
+
+def _last_outcome(retry_state: tenacity.RetryCallState) -> httpx.Response:
+    # NOTE: the last response (e.g. a 503) or error is handled by the caller as
+    # if the call had not been retried.
+    return retry_state.outcome.result()
+
+
+def _retrying_kwargs(host: str, policy_: RetryPolicy) -> dict:
+    return dict(
+        stop=functools.partial(_stop, policy_),
+        wait=functools.partial(
+            _wait,
+            policy_,
+            tenacity.wait_random_exponential(
+                multiplier=policy_.backoff_s, max=policy_.max_backoff_s
+            ),
+        ),
+        retry=functools.partial(_retry, policy_),
+        before_sleep=lambda _: _record(host, retries=1),
+        retry_error_callback=_last_outcome,
+    )
+
+
+def _usable(
+    policy_: RetryPolicy, future: asyncio.Future | concurrent.futures.Future
+) -> bool:
+    return future.exception() is None and (
+        future.result().status_code not in policy_.statuses
+    )
+
+
+def _hedge_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=_MAX_HEDGE_WORKERS, thread_name_prefix="toolhub-hedge"
+            )
+        return _executor
+
+
+def _hedged(host: str, policy_: RetryPolicy, request: Request) -> httpx.Response:
+    executor = _hedge_executor()
+    first = executor.submit(contextvars.copy_context().run, request)
+    # NOTE: not first.result(timeout=...), whose TimeoutError can't be told apart
+    # from e.g. a DeadlineExceeded raised by the request.
+    done, _ = concurrent.futures.wait([first], timeout=policy_.hedge_after_s)
+    if done:
+        return first.result()
+    _record(host, hedges=1)
+    second = executor.submit(contextvars.copy_context().run, request)
+    # NOTE: the loser can't be cancelled once sent; it completes in the pool.
+    done: list[concurrent.futures.Future] = []
+    for future in concurrent.futures.as_completed((first, second)):
+        done.append(future)
+        if _usable(policy_, future):
+            break
+    if done[-1] is second:
+        _record(host, hedge_wins=1)
+    return done[-1].result()
+
+
+async def _ahedged(
+    host: str, policy_: RetryPolicy, arequest: ARequest
+) -> httpx.Response:
+    first = asyncio.ensure_future(arequest())
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=policy_.hedge_after_s)
+        if done:
+            return first.result()
+        _record(host, hedges=1)
+        tasks.append(second := asyncio.ensure_future(arequest()))
+        pending = set(tasks)
+        while True:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            task = next(iter(done))
+            if not pending or _usable(policy_, task):
+                break
+        if task is second:
+            _record(host, hedge_wins=1)
+        return task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def send(
+    host: str, method: str, request: Request, function_name: str | None = None
+) -> httpx.Response:
+    """Returns: the response of request, an HTTP call to host, sent (and resent)
+    per the retry policy of function_name and host."""
+    policy_ = policy(host, function_name)
+    _record(host, calls=1)
+    method = method.upper()
+    if method in HEDGED_METHODS and policy_.hedge_after_s is not None:
+        request = functools.partial(_hedged, host, policy_, request)
+    if method not in policy_.methods or policy_.max_attempts <= 1:
+        return request()
+    return tenacity.Retrying(**_retrying_kwargs(host, policy_))(request)
+
+
+async def asend(
+    host: str, method: str, arequest: ARequest, function_name: str | None = None
+) -> httpx.Response:
+    """Returns: the async counterpart of send."""
+    policy_ = policy(host, function_name)
+    _record(host, calls=1)
+    method = method.upper()
+    if method in HEDGED_METHODS and policy_.hedge_after_s is not None:
+        arequest = functools.partial(_ahedged, host, policy_, arequest)
+    if method not in policy_.methods or policy_.max_attempts <= 1:
+        return await arequest()
+
+    # NOTE: tenacity awaits the attempts of coroutine functions only.
+    async def attempt() -> httpx.Response:
+        return await arequest()
+
+    return await tenacity.AsyncRetrying(**_retrying_kwargs(host, policy_))(attempt)
+
+
+def _reset_after_fork() -> None:
+    # NOTE: the parent's hedging threads don't exist in the child.
+    global _lock, _executor
+    _lock = threading.Lock()
+    _executor = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,217 @@
+import asyncio
+import functools
+import json
+
+import httpx
+import pytest
+from openai.types.chat import ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion_message_tool_call import Function
+
+from toolhub.integrations import http_clients
+from toolhub.integrations.openapi import function as openapi_function
+from toolhub.integrations.openapi.apis.crunchbase import bulk
+from toolhub.lib import auth
+from toolhub.lib import function
+from toolhub.lib import hub
+from toolhub.lib import registry
+from toolhub.openai import openai_chat_hub
+
+_BASE_URL = "https://crunchbase.example.com/api/v4"
+_AUTH_CTX = auth.StandardAuthContext(openapi=auth.OpenApiAuthContext())
+_ORGANIZATIONS = {
+    f"{i:08d}-0000-0000-0000-000000000000": {
+        "identifier": {"value": f"Organization {i}", "permalink": f"org-{i}"},
+        "short_description": f"Organization {i} makes things.",
+        "rank_org": i,
+        "categories": [{"value": "Software"}],
+    }
+    for i in range(4)
+}
+
+
+def _field_ids(field_ids: str | list[str] | None) -> list[str]:
+    if not field_ids:
+        return ["identifier"]
+    if isinstance(field_ids, list):
+        return field_ids
+    return json.loads(field_ids) if field_ids.startswith("[") else field_ids.split(",")
+
+
+def _properties(uuid: str, field_ids: list[str]) -> dict:
+    organization = _ORGANIZATIONS[uuid]
+    return {f: organization[f] for f in field_ids if f in organization}
+
+
+class _Crunchbase:
+    """Stub of the lookup and search endpoints."""
+
+    def __init__(self):
+        self.requests: list[str] = []
+        self.search_status = 200
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.replace("//", "/")
+        self.requests.append(path)
+        if path.endswith(bulk.SEARCH_ENDPOINT):
+            if self.search_status != 200:
+                return httpx.Response(self.search_status, json={"message": "down"})
+            body = json.loads(request.content)
+            uuids = body["query"][0]["values"]
+            entities = [
+                {"uuid": u, "properties": _properties(u, body["field_ids"])}
+                for u in uuids
+                if u in _ORGANIZATIONS
+            ]
+            return httpx.Response(
+                200, json={"count": len(entities), "entities": entities}
+            )
+        uuid = path.rsplit("/", 1)[-1]
+        if uuid not in _ORGANIZATIONS:
+            return httpx.Response(404, json={"message": "not found"})
+        field_ids = _field_ids(request.url.params.get("field_ids"))
+        return httpx.Response(200, json={"properties": _properties(uuid, field_ids)})
+
+
+@pytest.fixture
+def crunchbase(monkeypatch) -> _Crunchbase:
+    stub = _Crunchbase()
+    monkeypatch.setitem(
+        http_clients._clients,
+        http_clients._origin(_BASE_URL),
+        httpx.Client(transport=httpx.MockTransport(stub)),
+    )
+    return stub
+
+
+def _hub() -> openai_chat_hub.OpenAIChatHub:
+    spec = openapi_function.OpenAPIFunctionSpec(
+        parameters=[
+            function.ParameterSpec("entity_id", str, "UUID or permalink", True),
+            function.ParameterSpec("field_ids", str, "Fields to include", False),
+            function.ParameterSpec("card_ids", str, "Cards to include", False),
+        ],
+        return_=function.ReturnSpec(type_=dict, description=None),
+        description="Lookup an Organization",
+        api="crunchbase",
+        endpoint=bulk.LOOKUP_ENDPOINT,
+        method="get",
+    )
+    fn = openapi_function.make_function(
+        spec,
+        _BASE_URL,
+        bulk=bulk.bulk_counterparts("crunchbase", _BASE_URL)[
+            (bulk.LOOKUP_ENDPOINT, "get")
+        ],
+    )
+    registry_ = registry.Registry([])
+    registry_.register(fn)
+    return openai_chat_hub.OpenAIChatHub(registry_)
+
+
+def _call(i: int, name: str, **arguments) -> ChatCompletionMessageToolCall:
+    return ChatCompletionMessageToolCall(
+        id=f"call_{i}",
+        type="function",
+        function=Function(name=name, arguments=json.dumps(arguments)),
+    )
+
+
+@pytest.mark.parametrize(
+    "field_ids",
+    [None, '["short_description", "rank_org"]', "identifier,categories"],
+)
+def test_bulk_outputs_equal_single_outputs(crunchbase: _Crunchbase, field_ids):
+    hub_ = _hub()
+    name = hub_.registry_.list_()[0].spec.name
+    arguments = [
+        {"entity_id": uuid, **({"field_ids": field_ids} if field_ids else {})}
+        for uuid in [*_ORGANIZATIONS, "ffffffff-0000-0000-0000-000000000000"]
+    ]
+    single_outputs = [
+        hub_.call_tools(_AUTH_CTX, [_call(i, name, **a)])[0]
+        for i, a in enumerate(arguments)
+    ]
+    n_single_requests = len(crunchbase.requests)
+    bulk_outputs = hub_.call_tools(
+        _AUTH_CTX, [_call(i, name, **a) for i, a in enumerate(arguments)]
+    )
+    assert len(crunchbase.requests) == n_single_requests + 1
+    assert crunchbase.requests[-1].endswith(bulk.SEARCH_ENDPOINT)
+    assert bulk_outputs[:-1] == single_outputs[:-1]
+    # NOTE: unknown organizations fail either way, with different messages.
+    assert all(
+        "404" in str(outputs[-1].errors[0])
+        for outputs in (single_outputs, bulk_outputs)
+    )
+
+
+def _acall_tools(
+    crunchbase: _Crunchbase, hub_: openai_chat_hub.OpenAIChatHub, auth_ctx, calls
+) -> list:
+    """Returns: the outputs of hub_.acall_tools, run against the stub."""
+
+    async def main():
+        http_clients._async_clients[asyncio.get_running_loop()] = {
+            http_clients._origin(_BASE_URL): httpx.AsyncClient(
+                transport=httpx.MockTransport(crunchbase)
+            )
+        }
+        return await hub_.acall_tools(auth_ctx, calls)
+
+    return asyncio.run(main())
+
+
+def _comparable(outputs: list) -> list:
+    # NOTE: exceptions only compare equal to themselves.
+    return [
+        [(type(e), str(e)) for e in o.errors]
+        if isinstance(o, hub.ToolCallErrors)
+        else o
+        for o in outputs
+    ]
+
+
+def test_acall_tools_outputs_equal_call_tools_outputs(crunchbase: _Crunchbase):
+    hub_ = _hub()
+    name = hub_.registry_.list_()[0].spec.name
+    calls = [
+        _call(i, name, entity_id=uuid)
+        for i, uuid in enumerate(
+            [*_ORGANIZATIONS, "ffffffff-0000-0000-0000-000000000000"]
+        )
+    ]
+    # NOTE: the unknown function and the invalid arguments fail before any request.
+    calls += [_call(len(calls), "missing"), _call(len(calls) + 1, name)]
+
+    for calls_ in [*([call] for call in calls), calls]:
+        assert _comparable(_acall_tools(crunchbase, hub_, _AUTH_CTX, calls_)) == (
+            _comparable(hub_.call_tools(_AUTH_CTX, calls_))
+        )
+    outputs = _acall_tools(crunchbase, hub_, _AUTH_CTX, calls)
+    assert not any(isinstance(o, hub.ToolCallErrors) for o in outputs[:4])
+    assert all(isinstance(o, hub.ToolCallErrors) for o in outputs[4:])
+
+
+def test_falls_back_to_single_calls_when_the_bulk_call_fails(
+    crunchbase: _Crunchbase,
+):
+    hub_ = _hub()
+    name = hub_.registry_.list_()[0].spec.name
+    calls = [
+        _call(i, name, entity_id=uuid)
+        for i, uuid in enumerate(
+            [*_ORGANIZATIONS, "ffffffff-0000-0000-0000-000000000000"]
+        )
+    ]
+    single_outputs = _comparable(
+        [hub_.call_tools(_AUTH_CTX, [call])[0] for call in calls]
+    )
+    crunchbase.search_status = 503
+    for call_tools in (
+        hub_.call_tools,
+        functools.partial(_acall_tools, crunchbase, hub_),
+    ):
+        crunchbase.requests.clear()
+        assert _comparable(call_tools(_AUTH_CTX, calls)) == single_outputs
+        assert crunchbase.requests[0].endswith(bulk.SEARCH_ENDPOINT)
+        assert len(crunchbase.requests) == 1 + len(calls)
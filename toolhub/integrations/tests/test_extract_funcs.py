@@ -0,0 +1,104 @@
+import json
+import os
+
+import pytest
+
+from toolhub.integrations.rapidapi.private import extract_funcs
+
+
+class _Scanner:
+    """Stand-in for the ast-grep shards: the infos of an api.py are its content."""
+
+    def __init__(self):
+        self.scanned: list[str] = []
+
+    def __call__(self, tools_dir: str, paths: list[str]) -> dict[str, dict]:
+        self.scanned.extend(paths)
+        path_to_infos = {}
+        for path in paths:
+            with open(os.path.join(tools_dir, path)) as f:
+                path_to_infos[path] = {"fn": {"source": f.read()}}
+        return path_to_infos
+
+
+@pytest.fixture
+def scanner(monkeypatch) -> _Scanner:
+    scanner = _Scanner()
+    monkeypatch.setattr(extract_funcs, "_scan_shard", scanner)
+    return scanner
+
+
+def _write(tools_dir, path: str, content: str, mtime_ns: int | None = None) -> None:
+    file = tools_dir / path
+    file.parent.mkdir(parents=True, exist_ok=True)
+    file.write_text(content)
+    if mtime_ns is not None:
+        os.utime(file, ns=(mtime_ns, mtime_ns))
+
+
+def _extract(tmp_path) -> dict:
+    output = tmp_path / "function_infos.json"
+    extract_funcs.extract(
+        str(tmp_path / "tools"), str(output), str(tmp_path / "cache.sqlite")
+    )
+    return json.loads(output.read_text())
+
+
+def test_extract_scans_only_changed_files(tmp_path, scanner: _Scanner):
+    tools_dir = tmp_path / "tools"
+    _write(tools_dir, "Finance/quotes/api.py", "quotes", 10**18)
+    _write(tools_dir, "Social/users/api.py", "users", 10**18)
+    (tools_dir / "Social" / "notes.txt").write_text("not an api")
+    assert _extract(tmp_path) == {
+        "Finance.quotes": {"fn": {"source": "quotes"}},
+        "Social.users": {"fn": {"source": "users"}},
+    }
+    assert scanner.scanned == ["Finance/quotes/api.py", "Social/users/api.py"]
+
+    scanner.scanned.clear()
+    first = _extract(tmp_path)
+    assert scanner.scanned == []
+
+    # NOTE: touched files are hashed, and only rescanned if their content changed.
+    _write(tools_dir, "Finance/quotes/api.py", "quotes", 2 * 10**18)
+    _write(tools_dir, "Social/users/api.py", "users v2", 2 * 10**18)
+    infos = _extract(tmp_path)
+    assert scanner.scanned == ["Social/users/api.py"]
+    assert infos == {**first, "Social.users": {"fn": {"source": "users v2"}}}
+
+    scanner.scanned.clear()
+    _extract(tmp_path)
+    assert scanner.scanned == []
+
+
+def test_extract_drops_deleted_files(tmp_path, scanner: _Scanner):
+    tools_dir = tmp_path / "tools"
+    _write(tools_dir, "Finance/quotes/api.py", "quotes")
+    _write(tools_dir, "Social/users/api.py", "users")
+    _extract(tmp_path)
+    os.remove(tools_dir / "Social" / "users" / "api.py")
+    assert _extract(tmp_path) == {"Finance.quotes": {"fn": {"source": "quotes"}}}
+
+    cache = extract_funcs._Cache(str(tmp_path / "cache.sqlite"))
+    try:
+        assert list(cache.entries) == ["Finance/quotes/api.py"]
+    finally:
+        cache.close()
+
+
+def test_cache_retains_existing_files(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = extract_funcs._Cache(path)
+    cache.put([(f"c/{api}/api.py", 1, 2, api, "{}") for api in ("a", "b", "c")])
+    cache.retain({"c/a/api.py", "c/c/api.py", "c/d/api.py"})
+    assert sorted(cache.entries) == ["c/a/api.py", "c/c/api.py"]
+    cache.close()
+
+    cache = extract_funcs._Cache(path)
+    try:
+        assert cache.entries == {
+            "c/a/api.py": (1, 2, "a", "{}"),
+            "c/c/api.py": (1, 2, "c", "{}"),
+        }
+    finally:
+        cache.close()
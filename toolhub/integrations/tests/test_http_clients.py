@@ -0,0 +1,42 @@
+import json
+
+import httpx
+import pytest
+
+from toolhub.integrations import http_clients
+
+_REQUEST = httpx.Request("GET", "https://api.example.com/items")
+
+
+def _read(status_code: int, body: bytes, max_bytes: int) -> httpx.Response:
+    """Returns: a response as read by `http_clients.request`, within max_bytes."""
+    return http_clients._read_response(
+        httpx.Response(status_code, request=_REQUEST), [body], max_bytes
+    )
+
+
+def test_response_content_of_cut_json():
+    body = json.dumps({"items": [{"id": i} for i in range(100)]}).encode()
+    content = http_clients.response_content(_read(200, body, 100))
+    assert content["items"][0] == {"id": 0}
+    assert len(content["items"]) < 100
+    assert "... response truncated" in json.dumps(content["items"][-2:])
+
+
+@pytest.mark.parametrize("body", [b"<html>" + b"x" * 200, b'"' + b"x" * 200])
+def test_response_content_of_cut_text(body: bytes):
+    content = http_clients.response_content(_read(200, body, 100))
+    assert content == body[:100].decode() + "... response truncated"
+
+
+def test_response_content_of_text():
+    assert http_clients.response_content(_read(200, b"<html>", 100)) == "<html>"
+
+
+def test_response_content_bounds_error_bodies():
+    with pytest.raises(http_clients.StatusError) as e:
+        http_clients.response_content(_read(503, b"x" * 10_000, 1 << 20))
+    assert e.value.status_code == 503
+    assert len(str(e.value)) < 1100
+    assert str(e.value).startswith("error(503) xxx")
+    assert str(e.value).endswith("characters omitted")
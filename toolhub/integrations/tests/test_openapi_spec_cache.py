@@ -0,0 +1,111 @@
+import json
+import types
+
+import pytest
+
+from toolhub.integrations.openapi import parser
+from toolhub.integrations.openapi import spec_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(spec_cache, "_cache_dir", lambda: str(cache_dir))
+    return cache_dir
+
+
+def _write_schema(path, summary):
+    path.write_text(
+        json.dumps(
+            {
+                "openapi": "3.0.0",
+                "info": {"title": "items", "version": "1.0"},
+                "paths": {
+                    "/items": {
+                        "get": {
+                            "operationId": "listItems",
+                            "summary": summary,
+                            "responses": {"200": {"description": "The items."}},
+                        }
+                    }
+                },
+            }
+        )
+    )
+
+
+class _CountingParser(parser.Parser):
+    loads = 0
+
+    def _load_project(self) -> None:
+        type(self).loads += 1
+        super()._load_project()
+
+
+def _descriptions(schema_path):
+    fn_specs = _CountingParser(api="items", schema_path=schema_path).fn_specs()
+    return [fn_spec.description for fn_spec in fn_specs]
+
+
+def test_reuses_fresh_entries_and_rebuilds_stale_ones(tmp_path):
+    _CountingParser.loads = 0
+    schema_path = tmp_path / "items.json"
+    _write_schema(schema_path, "List the items.")
+    assert _descriptions(schema_path) == ["List the items."]
+    assert _descriptions(schema_path) == ["List the items."]
+    assert _CountingParser.loads == 1
+
+    _write_schema(schema_path, "List all the items.")
+    assert _descriptions(schema_path) == ["List all the items."]
+    assert _CountingParser.loads == 2
+
+
+def test_key_changes_with_the_files_and_parser(tmp_path):
+    schema_path = tmp_path / "items.json"
+    _write_schema(schema_path, "List the items.")
+    key = spec_cache.key("p", "items", schema_path, None)
+    assert spec_cache.key("p", "items", schema_path, None) == key
+    assert spec_cache.key("q", "items", schema_path, None) != key
+    descriptions_path = tmp_path / "descriptions.json"
+    descriptions_path.write_text("{}")
+    assert spec_cache.key("p", "items", schema_path, descriptions_path) != key
+    _write_schema(schema_path, "List all the items.")
+    assert spec_cache.key("p", "items", schema_path, None) != key
+
+
+def test_unreadable_entries_are_misses(cache_dir):
+    assert spec_cache.load("missing") is None
+    spec_cache.save("key", ["spec"])
+    assert spec_cache.load("key") == ["spec"]
+    (cache_dir / "key.pickle").write_bytes(b"not a pickle")
+    assert spec_cache.load("key") is None
+
+
+def test_disabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(spec_cache, "_cache_dir", lambda: None)
+    schema_path = tmp_path / "items.json"
+    _write_schema(schema_path, "List the items.")
+    assert spec_cache.key("p", "items", schema_path, None) is None
+
+
+def _model(**properties):
+    return types.SimpleNamespace(data=types.SimpleNamespace(properties=properties))
+
+
+def test_model_properties_flattens_references(tmp_path):
+    from openapi_python_client.schema.openapi_schema_pydantic import reference
+
+    parser_ = parser.Parser(api="items", schema_path=tmp_path / "items.json")
+    parser_.models = {"Address": _model(city="city", zip="zip")}
+    parser_.enums = {"Status": types.SimpleNamespace(values=["open", "closed"])}
+    item = _model(
+        name="name",
+        address=reference.Reference(ref="#/components/schemas/Address"),
+        status=reference.Reference(ref="#/components/schemas/Status"),
+    )
+    assert parser_._model_properties(item) == {
+        "name": "name",
+        "address.city": "city",
+        "address.zip": "zip",
+        "status[open,closed]": parser_.enums["Status"],
+    }
@@ -0,0 +1,201 @@
+import json
+
+import jsonpickle
+import pytest
+
+from toolhub.lib import function
+from toolhub.integrations.rapidapi import catalog
+from toolhub.integrations.rapidapi import function as rapidapi_function
+from toolhub.integrations.rapidapi import loader
+from toolhub.integrations.rapidapi import shared_catalog
+
+
+def _fn(name, category, api, root_url, path):
+    return rapidapi_function.RapidAPIFunction(
+        spec=function.FunctionSpec(
+            name=name,
+            parameters=[],
+            return_=function.ReturnSpec(type_=dict, description=None),
+            description=None,
+        ),
+        category=category,
+        api=api,
+        endpoint=path,
+        method="GET",
+        root_url=root_url,
+        url_f_string=f"https://{root_url}{path}",
+        required_params=(),
+        conditional_params=(),
+    )
+
+
+_FUNCTIONS = [
+    _fn("get_user", "social", "users", "users.p.rapidapi.com", "/v1/users/{id}"),
+    _fn("list_users", "social", "users", "users.p.rapidapi.com", "/v1/users"),
+    _fn("get_post", "social", "posts", "posts.p.rapidapi.com", "/v1/posts/{id}"),
+    _fn("get_quote", "finance", "quotes", "quotes.p.rapidapi.com", "/quote/{ticker}"),
+]
+
+_SELECTIONS = [
+    dict(hostnames=["posts.p.rapidapi.com"]),
+    dict(collections=["social.users"]),
+    dict(names=["get_quote", "missing"]),
+    dict(endpoint_urls=["https://users.p.rapidapi.com/v1/users/42/"]),
+    dict(names=["get_post"], endpoint_urls=["https://quotes.p.rapidapi.com/quote/X"]),
+    dict(hostnames=[], collections=[], names=[]),
+]
+
+
+def _names(functions_collections):
+    functions, collections = functions_collections
+    return (
+        sorted(fn.spec.name for fn in functions),
+        sorted((c.name, sorted(c.function_names)) for c in collections),
+    )
+
+
+@pytest.fixture
+def catalog_path(tmp_path):
+    path = str(tmp_path / "functions.sqlite")
+    catalog.write(path, _FUNCTIONS)
+    return path
+
+
+@pytest.fixture
+def legacy_path(tmp_path):
+    path = tmp_path / "functions.json"
+    category_to_api_to_functions = {}
+    for fn in _FUNCTIONS:
+        category_to_api_to_functions.setdefault(fn.category, {}).setdefault(
+            fn.api, []
+        ).append(fn)
+    path.write_text(jsonpickle.encode(category_to_api_to_functions))
+    return str(path)
+
+
+@pytest.mark.parametrize("selection", _SELECTIONS)
+def test_selections_agree(monkeypatch, tmp_path, catalog_path, legacy_path, selection):
+    monkeypatch.setattr(loader, "CATALOG_FILE", catalog_path)
+    from_catalog = _names(loader.load_functions_collections(**selection))
+
+    monkeypatch.setattr(loader, "CATALOG_FILE", str(tmp_path / "missing.sqlite"))
+    monkeypatch.setattr(loader, "FUNCTIONS_FILE", legacy_path)
+    assert _names(loader.load_functions_collections(**selection)) == from_catalog
+
+    shared = shared_catalog.SharedCatalog(catalog_path)
+    assert _names(shared.functions(**selection)) == from_catalog
+    shared.preload()
+    assert _names(shared.functions(**selection)) == from_catalog
+
+    legacy_shared = shared_catalog.SharedCatalog(str(tmp_path / "missing.sqlite"))
+    assert _names(legacy_shared.functions(**selection)) == from_catalog
+
+
+def test_selections_match(monkeypatch, catalog_path):
+    monkeypatch.setattr(loader, "CATALOG_FILE", catalog_path)
+    functions, _ = loader.load_functions_collections(
+        collections=["social.users"],
+        endpoint_urls=["https://quotes.p.rapidapi.com/quote/X"],
+    )
+    assert sorted(fn.spec.name for fn in functions) == [
+        "get_quote",
+        "get_user",
+        "list_users",
+    ]
+
+
+_CALLABLE = "toolhub.integrations.rapidapi.function._callable"
+# A function as pickled by the catalogs before RapidAPIFunction was slotted: no
+# async callable, and sets of parameters.
+_LEGACY_FUNCTION = json.dumps(
+    {
+        "py/object": "toolhub.integrations.rapidapi.function.RapidAPIFunction",
+        "spec": {
+            "py/object": "toolhub.lib.function.FunctionSpec",
+            "name": "get_user",
+            "parameters": [],
+            "return_": {
+                "py/object": "toolhub.lib.function.ReturnSpec",
+                "type_": {"py/type": "builtins.dict"},
+                "description": None,
+            },
+            "description": None,
+        },
+        "callable_": {
+            "py/reduce": [
+                {"py/type": "functools.partial"},
+                {"py/tuple": [{"py/function": _CALLABLE}]},
+                {
+                    "py/tuple": [
+                        {"py/function": _CALLABLE},
+                        {"py/tuple": []},
+                        {
+                            "method": "GET",
+                            "root_url": "users.p.rapidapi.com",
+                            "url_f_string": "https://users.p.rapidapi.com/v1/users/{id}",
+                            "required_params": {"py/set": ["id"]},
+                            "conditional_params": {"py/set": []},
+                        },
+                        {},
+                    ]
+                },
+            ]
+        },
+        "category": "social",
+        "api": "users",
+        "endpoint": "/v1/users/{id}",
+        "method": "GET",
+        "root_url": "users.p.rapidapi.com",
+        "url_f_string": "https://users.p.rapidapi.com/v1/users/{id}",
+        "required_params": {"py/set": ["id"]},
+        "conditional_params": {"py/set": []},
+    }
+)
+
+
+def _fields(fn):
+    return (
+        fn.spec,
+        fn.category,
+        fn.api,
+        fn.endpoint,
+        fn.method,
+        fn.root_url,
+        fn.url_f_string,
+        set(fn.required_params),
+        set(fn.conditional_params),
+    )
+
+
+def test_function_round_trips_through_jsonpickle():
+    fn = _FUNCTIONS[0]
+    decoded = jsonpickle.decode(jsonpickle.encode(fn))
+    assert not hasattr(decoded, "__dict__")
+    assert decoded == fn
+    assert _fields(decoded) == _fields(fn)
+    assert isinstance(decoded.required_params, frozenset)
+    # NOTE: the callables are built on first use, from the decoded fields.
+    for callable_ in (decoded.callable_, decoded.acallable_):
+        assert callable_.keywords["url_f_string"] == fn.url_f_string
+        assert callable_.keywords["function_name"] == "get_user"
+    assert callable(decoded.callable_(None))
+
+
+def test_legacy_function_decodes():
+    fn = jsonpickle.decode(_LEGACY_FUNCTION)
+    assert fn == _FUNCTIONS[0]
+    assert _fields(fn)[1:] == (
+        "social",
+        "users",
+        "/v1/users/{id}",
+        "GET",
+        "users.p.rapidapi.com",
+        "https://users.p.rapidapi.com/v1/users/{id}",
+        {"id"},
+        set(),
+    )
+    # NOTE: the pickled callable is kept; the async one is built on first use.
+    assert fn.callable_.keywords["required_params"] == {"id"}
+    assert "function_name" not in fn.callable_.keywords
+    assert fn.acallable_.keywords["function_name"] == "get_user"
+    assert callable(fn.callable_(None))
@@ -0,0 +1,93 @@
+from toolhub.integrations.rapidapi import routes
+
+_HOST = "https://api.p.rapidapi.com"
+
+
+def _trie() -> routes.RouteTrie:
+    return routes.RouteTrie(
+        [
+            ("list_users", f"{_HOST}/v1/users"),
+            ("get_user", f"{_HOST}/v1/users/{{id}}"),
+            ("get_me", f"{_HOST}/v1/users/me"),
+            ("user_posts", f"{_HOST}/v1/users/{{id}}/posts"),
+            ("get_file", f"{_HOST}/v1/files/{{name}}.{{ext}}"),
+            ("search", f"{_HOST}/v1/search/"),
+        ]
+    )
+
+
+def test_matches_literal_routes():
+    assert _trie().match(f"{_HOST}/v1/users") == ["list_users"]
+
+
+def test_matches_placeholders_within_a_segment():
+    trie = _trie()
+    assert trie.match(f"{_HOST}/v1/users/42") == ["get_user"]
+    # NOTE: as before the trie, a trailing placeholder spans segments too.
+    assert sorted(trie.match(f"{_HOST}/v1/users/42/posts")) == [
+        "get_user",
+        "user_posts",
+    ]
+    assert trie.match(f"{_HOST}/v1/files/report.pdf") == ["get_file"]
+    assert trie.match(f"{_HOST}/v1/files/report") == []
+
+
+def test_matches_literal_and_templated_routes_alike():
+    assert sorted(_trie().match(f"{_HOST}/v1/users/me")) == ["get_me", "get_user"]
+
+
+def test_trailing_placeholders_match_the_rest_of_the_path():
+    trie = routes.RouteTrie(
+        [
+            ("get_object", f"{_HOST}/v1/objects/{{path}}"),
+            ("get_file", f"{_HOST}/v1/files/{{name}}.{{ext}}"),
+            ("object_tags", f"{_HOST}/v1/objects/{{id}}/tags"),
+        ]
+    )
+    assert trie.match(f"{_HOST}/v1/objects/a") == ["get_object"]
+    assert trie.match(f"{_HOST}/v1/objects/a/b/c") == ["get_object"]
+    assert trie.match(f"{_HOST}/v1/files/a/b.pdf") == ["get_file"]
+    assert trie.match(f"{_HOST}/v1/files/a/b") == []
+    # NOTE: placeholders before the last segment match a single segment.
+    assert sorted(trie.match(f"{_HOST}/v1/objects/a/tags")) == [
+        "get_object",
+        "object_tags",
+    ]
+    assert trie.match(f"{_HOST}/v1/objects") == []
+
+
+def test_sanitizes_urls():
+    trie = _trie()
+    assert trie.match(f" {_HOST}/v1/search/ ") == ["search"]
+    assert trie.match(f"{_HOST}/v1/search") == ["search"]
+
+
+def test_does_not_match_other_paths():
+    trie = _trie()
+    assert trie.match(f"{_HOST}/v1") == []
+    assert trie.match(f"{_HOST}/v1/users/42/comments") == ["get_user"]
+    assert trie.match(f"{_HOST}/v1/users/4/2/posts") == ["get_user"]
+    assert trie.match(f"{_HOST}/v2/users/42") == []
+    assert trie.match("https://other.p.rapidapi.com/v1/users") == []
+
+
+def test_placeholders_are_not_regexes():
+    trie = routes.RouteTrie([("dotted", f"{_HOST}/v1/a.b/{{id}}")])
+    assert trie.match(f"{_HOST}/v1/a.b/1") == ["dotted"]
+    assert trie.match(f"{_HOST}/v1/aXb/1") == []
+
+
+def test_match_endpoint_urls_matches_routes_of_the_urls_hosts():
+    routes_ = [
+        ("get_user", "api.p.rapidapi.com", f"{_HOST}/v1/users/{{id}}"),
+        ("get_quote", "quotes.p.rapidapi.com", "https://quotes.p.rapidapi.com/q"),
+    ]
+    assert routes.match_endpoint_urls(
+        routes_, [f"{_HOST}/v1/users/1", f"{_HOST}/v2/users/1"]
+    ) == {"get_user"}
+    assert (
+        routes.match_endpoint_urls(
+            routes_, ["https://quotes.p.rapidapi.com/v1/users/1"]
+        )
+        == set()
+    )
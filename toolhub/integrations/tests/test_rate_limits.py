@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from toolhub.lib import deadline
+from toolhub.integrations import rate_limits
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limits.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_spaces_calls_after_burst(clock):
+    bucket = rate_limits._TokenBucket(rate_per_s=10, burst=3)
+    # NOTE: a new bucket starts with a single token.
+    delays = [bucket.reserve() for _ in range(3)]
+    assert delays == pytest.approx([0.0, 0.1, 0.2])
+
+
+def test_bucket_refills_while_idle_up_to_burst(clock):
+    bucket = rate_limits._TokenBucket(rate_per_s=10, burst=3)
+    bucket.reserve()
+    clock.now += 0.15
+    assert bucket.reserve() == 0.0
+    clock.now += 10
+    delays = [bucket.reserve() for _ in range(4)]
+    assert delays == pytest.approx([0.0, 0.0, 0.0, 0.1])
+
+
+def test_bucket_reserves_in_order_of_arrival(clock):
+    bucket = rate_limits._TokenBucket(rate_per_s=2, burst=1)
+    delays = [bucket.reserve() for _ in range(4)]
+    assert delays == pytest.approx([0.0, 0.5, 1.0, 1.5])
+    clock.now += 1.0
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_semaphore_grants_threads_in_order():
+    semaphore = rate_limits._FifoSemaphore(1)
+    assert semaphore.acquire() is False
+    order = []
+
+    def worker(i):
+        assert semaphore.acquire() is True
+        order.append(i)
+        semaphore.release()
+
+    threads = []
+    for i in range(5):
+        thread = threading.Thread(target=worker, args=(i,))
+        thread.start()
+        threads.append(thread)
+        # NOTE: let each thread queue before the next one.
+        while len(semaphore._waiters) <= i:
+            time.sleep(0.001)
+    semaphore.release()
+    for thread in threads:
+        thread.join()
+    assert order == list(range(5))
+    assert semaphore._value == 1
+
+
+def test_semaphore_grants_tasks_in_order():
+    async def main():
+        semaphore = rate_limits._FifoSemaphore(2)
+        assert await semaphore.aacquire() is False
+        assert await semaphore.aacquire() is False
+        order = []
+
+        async def worker(i):
+            await semaphore.aacquire()
+            order.append(i)
+            await asyncio.sleep(0)
+            semaphore.release()
+
+        tasks = [asyncio.create_task(worker(i)) for i in range(5)]
+        await asyncio.sleep(0)
+        assert len(semaphore._waiters) == 5
+        semaphore.release()
+        semaphore.release()
+        await asyncio.gather(*tasks)
+        return order, semaphore._value
+
+    order, value = asyncio.run(main())
+    assert order == list(range(5))
+    assert value == 2
+
+
+def test_cancelled_waiter_passes_its_slot_on():
+    async def main():
+        semaphore = rate_limits._FifoSemaphore(1)
+        await semaphore.aacquire()
+        cancelled = asyncio.create_task(semaphore.aacquire())
+        waiting = asyncio.create_task(semaphore.aacquire())
+        await asyncio.sleep(0)
+        # NOTE: the slot is handed to the first waiter, which is then cancelled.
+        semaphore.release()
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert await waiting is True
+        semaphore.release()
+        return semaphore._value, len(semaphore._waiters)
+
+    assert asyncio.run(main()) == (1, 0)
+
+
+def test_limit_fails_fast_past_the_deadline(clock):
+    limiter = rate_limits._HostLimiter(
+        rate_limits.Limits(rate_per_s=1, burst=1, max_concurrency=1)
+    )
+    with limiter.limit():
+        pass
+    with deadline.scope(0.5):
+        with pytest.raises(deadline.DeadlineExceeded):
+            with limiter.limit():
+                pass
+    stats = limiter.stats()
+    assert (stats.calls, stats.in_flight, stats.waiting) == (1, 0, 0)
+    # NOTE: the semaphore's slot was released, and the token not taken.
+    assert limiter._semaphore._value == 1
+    assert limiter._bucket.reserve() == pytest.approx(1.0)
+
+
+def test_bucket_does_not_reserve_beyond_max_delay(clock):
+    bucket = rate_limits._TokenBucket(rate_per_s=2, burst=1)
+    assert bucket.reserve(0.0) == 0.0
+    assert bucket.reserve(0.4) is None
+    assert bucket.reserve(0.5) == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_semaphore_wait_times_out_at_the_deadline():
+    semaphore = rate_limits._FifoSemaphore(1)
+    semaphore.acquire()
+    start = time.monotonic()
+    with deadline.scope(0.1):
+        with pytest.raises(deadline.DeadlineExceeded):
+            semaphore.acquire()
+    assert time.monotonic() - start < 0.5
+    assert not semaphore._waiters
+    semaphore.release()
+    assert semaphore.acquire() is False
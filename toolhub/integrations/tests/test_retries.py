@@ -0,0 +1,174 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from toolhub.lib import deadline
+from toolhub.integrations import retries
+
+_HOST = "api.example.com"
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    retries.reset()
+    yield
+    retries.reset()
+
+
+def _set_policy(**fields):
+    retries._policies[(_HOST, None)] = retries.RetryPolicy(
+        backoff_s=0.001, max_backoff_s=0.001, **fields
+    )
+
+
+def _responses(*status_codes):
+    """Returns: a request returning responses of status_codes in turn, and the
+    list of its calls."""
+    calls = []
+
+    def request():
+        calls.append(len(calls))
+        return httpx.Response(status_codes[min(len(calls), len(status_codes)) - 1])
+
+    return request, calls
+
+
+def test_retries_idempotent_methods():
+    _set_policy()
+    for method in ("GET", "put", "DELETE"):
+        request, calls = _responses(503, 429, 200)
+        assert retries.send(_HOST, method, request).status_code == 200
+        assert len(calls) == 3
+    assert retries.metrics()[_HOST]["retries"] == 6
+
+
+def test_does_not_retry_other_methods():
+    _set_policy()
+    request, calls = _responses(503, 200)
+    assert retries.send(_HOST, "POST", request).status_code == 503
+    assert len(calls) == 1
+
+
+def test_returns_the_last_response_after_max_attempts():
+    _set_policy(max_attempts=2)
+    request, calls = _responses(503, 502, 200)
+    assert retries.send(_HOST, "GET", request).status_code == 502
+    assert len(calls) == 2
+
+
+def test_retries_transport_errors():
+    _set_policy()
+    calls = []
+
+    def request():
+        calls.append(None)
+        if len(calls) == 1:
+            raise httpx.ConnectError("refused")
+        return httpx.Response(200)
+
+    assert retries.send(_HOST, "GET", request).status_code == 200
+    assert len(calls) == 2
+
+
+def test_gives_up_when_retry_after_exceeds_the_deadline():
+    _set_policy(deadline_s=1.0)
+    calls = []
+
+    def request():
+        calls.append(None)
+        return httpx.Response(429, headers={"Retry-After": "60"})
+
+    assert retries.send(_HOST, "GET", request).status_code == 429
+    assert len(calls) == 1
+
+
+def _slow_first(release: threading.Event):
+    """Returns: a request whose first call waits for release, and the list of its
+    calls."""
+    calls = []
+    lock = threading.Lock()
+
+    def request():
+        with lock:
+            calls.append(None)
+            first = len(calls) == 1
+        if first:
+            release.wait(5)
+            return httpx.Response(200, text="first")
+        return httpx.Response(200, text="second")
+
+    return request, calls
+
+
+def test_hedges_slow_safe_requests():
+    _set_policy(max_attempts=1, hedge_after_s=0.01)
+    release = threading.Event()
+    request, calls = _slow_first(release)
+    try:
+        assert retries.send(_HOST, "GET", request).text == "second"
+    finally:
+        release.set()
+    assert len(calls) == 2
+    stats = retries.metrics()[_HOST]
+    assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_does_not_hedge_idempotent_writes():
+    _set_policy(max_attempts=1, hedge_after_s=0.01)
+    for method in ("PUT", "DELETE"):
+        release = threading.Event()
+        request, calls = _slow_first(release)
+        threading.Timer(0.1, release.set).start()
+        assert retries.send(_HOST, method, request).text == "first"
+        assert len(calls) == 1
+    assert retries.metrics()[_HOST]["hedges"] == 0
+
+
+def test_ahedges_slow_safe_requests_and_not_writes():
+    _set_policy(max_attempts=1, hedge_after_s=0.01)
+
+    async def main(method):
+        calls = []
+
+        async def arequest():
+            calls.append(None)
+            if len(calls) == 1:
+                await asyncio.sleep(0.1)
+                return httpx.Response(200, text="first")
+            return httpx.Response(200, text="second")
+
+        response = await retries.asend(_HOST, method, arequest)
+        return response.text, len(calls)
+
+    assert asyncio.run(main("HEAD")) == ("second", 2)
+    assert asyncio.run(main("PUT")) == ("first", 1)
+    stats = retries.metrics()[_HOST]
+    assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_aretries_idempotent_methods():
+    _set_policy()
+    request, calls = _responses(503, 200)
+
+    async def arequest():
+        return request()
+
+    response = asyncio.run(retries.asend(_HOST, "DELETE", arequest))
+    assert response.status_code == 200
+    assert len(calls) == 2
+
+
+def test_does_not_hedge_requests_failing_fast():
+    _set_policy(max_attempts=1, hedge_after_s=1.0)
+    calls = []
+
+    def request():
+        calls.append(None)
+        raise deadline.DeadlineExceeded("call would exceed its deadline")
+
+    with pytest.raises(deadline.DeadlineExceeded):
+        retries.send(_HOST, "GET", request)
+    assert len(calls) == 1
+    assert retries.metrics()[_HOST]["hedges"] == 0
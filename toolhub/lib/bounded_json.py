@@ -0,0 +1,102 @@
+# JSON within a size budget: tool results are rendered for the LLM up to a number
+# of characters, and HTTP bodies are read up to a number of bytes. Both stay
+# well-formed when cut: containers are closed, and notes tell what was omitted.
+import json
+import re
+from typing import Any
+
+# NOTE: an unterminated string runs to the end of the text.
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"?|[\[\]{},]')
+_CLOSERS = {"[": "]", "{": "}"}
+_TRUNCATED_NOTE = "... response truncated"
+# Budget below which no further item of a container is rendered.
+_MIN_ITEM_CHARS = 16
+
+
+def loads_prefix(text: str) -> Any:
+    """Returns: the value of a JSON document cut at an arbitrary point, e.g. a body
+    read up to a byte budget. Complete elements are kept, the open containers are
+    closed, and the innermost one gets a truncation note.
+
+    Raises: ValueError if no element is complete, e.g. a cut top-level string.
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    stack: list[str] = []
+    # (position, open containers, whether the innermost is empty) of the last
+    # point where the text can be cut and closed.
+    cut: tuple[int, tuple[str, ...], bool] | None = None
+    for match in _TOKEN.finditer(text):
+        token = match.group()
+        if token in _CLOSERS:
+            stack.append(token)
+            cut = (match.end(), tuple(stack), True)
+        elif token in ("]", "}"):
+            if stack:
+                stack.pop()
+            cut = (match.end(), tuple(stack), False)
+        elif token == "," and stack:
+            # NOTE: the comma proves that the element before it is complete.
+            cut = (match.start(), tuple(stack), False)
+    if cut is None or not cut[1]:
+        raise ValueError("no complete JSON element in truncated text")
+    position, open_, empty = cut
+    separator = "" if empty else ", "
+    note = json.dumps(_TRUNCATED_NOTE)
+    innermost = f'"...": {note}' if open_[-1] == "{" else note
+    closers = "".join(_CLOSERS[c] for c in reversed(open_))
+    return json.loads(f"{text[:position]}{separator}{innermost}{closers}")
+
+
+def _omitted(n: int, what: str) -> str:
+    return f"... {n} {what}{'s' if n > 1 else ''} omitted"
+
+
+def _dumps_str(s: str, budget: int) -> str:
+    if (n_extra := len(s) - max(0, budget)) > 0:
+        s = s[: max(0, budget)] + _omitted(n_extra, "character")
+    return json.dumps(s, ensure_ascii=False)
+
+
+def _dumps(value: Any, budget: int) -> str:
+    if isinstance(value, str):
+        return _dumps_str(value, budget - 2)
+    if isinstance(value, dict):
+        items = list(value.items())
+        parts = []
+        used = 2
+        for i, (k, v) in enumerate(items):
+            key = json.dumps(str(k), ensure_ascii=False)
+            if (remaining := budget - used - len(key) - 4) < _MIN_ITEM_CHARS:
+                parts.append(f'"...": {json.dumps(_omitted(len(items) - i, "key"))}')
+                break
+            part = f"{key}: {_dumps(v, remaining)}"
+            parts.append(part)
+            used += len(part) + 2
+        return "{" + ", ".join(parts) + "}"
+    if isinstance(value, (list, tuple)):
+        parts = []
+        used = 2
+        for i, v in enumerate(value):
+            if (remaining := budget - used - 2) < _MIN_ITEM_CHARS:
+                parts.append(json.dumps(_omitted(len(value) - i, "item")))
+                break
+            part = _dumps(v, remaining)
+            parts.append(part)
+            used += len(part) + 2
+        return "[" + ", ".join(parts) + "]"
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+def dumps(value: Any, max_chars: int) -> str:
+    """Returns: value as JSON of about max_chars at most, plus omission notes;
+    rendered depth-first, stopping once the budget is spent. Other values than
+    dicts and lists, e.g. strings, are rendered with str (and cut)."""
+    if isinstance(value, (dict, list, tuple)):
+        return _dumps(value, max_chars)
+    value = str(value)
+    if (n_extra := len(value) - max_chars) > 0:
+        return value[:max_chars] + _omitted(n_extra, "character")
+    return value
@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import collections
+import dataclasses
+import datetime
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+import pydantic
+
+from toolhub.lib import auth
+from toolhub.lib import function
+
+_DEFAULT_TTL_S = 60.0
+_DEFAULT_MAX_ENTRIES = 10_000
+_DEFAULT_CACHEABLE_METHODS = ("GET", "HEAD")
+
+
+class CacheBackend(abc.ABC):
+    """Stores the results of a `ResponseCache`, serialized as JSON texts.
+
+    NOTE: entries are data, never code; a shared backend (e.g. a disk or Redis)
+    must not be able to run code in the processes that read it.
+    """
+
+    # Whether get and set block on I/O, e.g. disk or network; the async paths then
+    # run them on a thread, off the event loop.
+    blocking: bool = True
+
+    @abc.abstractmethod
+    def get(self, key: str) -> tuple[bool, str | bytes | None]:
+        """Returns: whether key is present and not expired, and its value."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def set(self, key: str, value: str, ttl_s: float) -> None:
+        raise NotImplementedError()
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU cache, bounded to max_entries."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = _DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: collections.OrderedDict[
+            str, tuple[float, str]
+        ] = collections.OrderedDict()
+
+    def get(self, key: str) -> tuple[bool, str | None]:
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: str, ttl_s: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class DiskBackend(CacheBackend):
+    """SQLite-backed cache, shared by the processes of a host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries"
+                " (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+
+    def get(self, key: str) -> tuple[bool, str | bytes | None]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            return False, None
+        return True, row[0]
+
+    def set(self, key: str, value: str, ttl_s: float) -> None:
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries (key, expires_at, value)"
+                " VALUES (?, ?, ?)",
+                (key, now + ttl_s, value),
+            )
+            self._connection.execute(
+                "DELETE FROM entries WHERE expires_at <= ?", (now,)
+            )
+
+
+class RedisBackend(CacheBackend):
+    """Cache in a Redis-compatible server, shared by all processes.
+
+    Args:
+        client: e.g. a redis.Redis; only its get and set(ex=) methods are used.
+    """
+
+    def __init__(self, client: Any, prefix: str = "toolhub:response:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> tuple[bool, str | bytes | None]:
+        if (value := self.client.get(self.prefix + key)) is None:
+            return False, None
+        return True, value
+
+    def set(self, key: str, value: str, ttl_s: float) -> None:
+        self.client.set(self.prefix + key, value, ex=max(1, round(ttl_s)))
+
+
+@dataclasses.dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    # Calls that were not eligible for caching, e.g. non-GET methods.
+    bypasses: int = 0
+
+
+def _json_default(o: Any) -> Any:
+    if isinstance(o, pydantic.BaseModel):
+        return o.model_dump(mode="json")
+    if isinstance(o, (datetime.date, datetime.datetime)):
+        return o.isoformat()
+    if isinstance(o, (set, frozenset)):
+        return sorted(o)
+    return str(o)
+
+
+def canonical_arguments(params: dict[str, Any]) -> str:
+    return json.dumps(
+        params, sort_keys=True, separators=(",", ":"), default=_json_default
+    )
+
+
+def default_auth_fingerprint(auth_ctx: auth.AuthContext) -> str:
+    """Returns: a digest of the credentials of auth_ctx; calls are only shared
+    between identical auth contexts."""
+    return hashlib.sha256(repr(auth_ctx).encode()).hexdigest()
+
+
+def call_key(
+    fn: function.Function,
+    auth_ctx: auth.AuthContext,
+    params: dict[str, Any],
+    auth_fingerprint: Callable[[auth.AuthContext], str] = default_auth_fingerprint,
+) -> str:
+    """Returns: a key identifying calls of fn with params, under auth_ctx."""
+    return hashlib.sha256(
+        "\0".join(
+            (
+                fn.spec.name,
+                canonical_arguments(params),
+                auth_fingerprint(auth_ctx),
+            )
+        ).encode()
+    ).hexdigest()
+
+
+class ResponseCache:
+    """Caches the results of idempotent tool calls.
+
+    Results are keyed by function name, canonicalized arguments and a fingerprint
+    of the auth context. Only calls of functions whose HTTP method is in
+    cacheable_methods are cached; local functions and e.g. POSTs bypass the
+    cache. Errors are never cached, nor results that aren't JSON values.
+
+    Results are stored as JSON, so each hit returns a copy that the caller may
+    modify.
+
+    Args:
+        default_ttl_s: TTL of the functions with no collection TTL.
+        collection_ttls_s: TTL per collection name; a function in several
+            collections uses the smallest. A TTL of 0 disables caching.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend | None = None,
+        default_ttl_s: float = _DEFAULT_TTL_S,
+        collection_ttls_s: dict[str, float] | None = None,
+        cacheable_methods: Iterable[str] = _DEFAULT_CACHEABLE_METHODS,
+        auth_fingerprint: Callable[[auth.AuthContext], str] = default_auth_fingerprint,
+    ):
+        self.backend = backend or MemoryBackend()
+        self.default_ttl_s = default_ttl_s
+        self.collection_ttls_s = collection_ttls_s or {}
+        self.cacheable_methods = {m.upper() for m in cacheable_methods}
+        self.auth_fingerprint = auth_fingerprint
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+
+    def _ttl_s(self, fn: function.Function, collections: Iterable[str]) -> float:
+        if function.http_method(fn) not in self.cacheable_methods:
+            return 0
+        ttls_s = [
+            self.collection_ttls_s[c]
+            for c in collections
+            if c in self.collection_ttls_s
+        ]
+        return min(ttls_s) if ttls_s else self.default_ttl_s
+
+    def key(
+        self,
+        fn: function.Function,
+        auth_ctx: auth.AuthContext,
+        params: dict[str, Any],
+    ) -> str:
+        return call_key(fn, auth_ctx, params, self.auth_fingerprint)
+
+    def _count(self, field: str) -> None:
+        with self._stats_lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
+
+    def _get(self, key: str) -> tuple[bool, Any]:
+        hit, value = self.backend.get(key)
+        if not hit:
+            return False, None
+        try:
+            return True, json.loads(value)
+        except ValueError:
+            # NOTE: e.g. an entry of an older format; overwritten on store.
+            return False, None
+
+    def _set(self, key: str, result: Any, ttl_s: float) -> None:
+        try:
+            value = json.dumps(result, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return
+        self.backend.set(key, value, ttl_s)
+
+    async def _aget(self, key: str) -> tuple[bool, Any]:
+        if not self.backend.blocking:
+            return self._get(key)
+        return await asyncio.to_thread(self._get, key)
+
+    async def _aset(self, key: str, result: Any, ttl_s: float) -> None:
+        if not self.backend.blocking:
+            return self._set(key, result, ttl_s)
+        await asyncio.to_thread(self._set, key, result, ttl_s)
+
+    def lookup(
+        self,
+        fn: function.Function,
+        auth_ctx: auth.AuthContext,
+        params: dict[str, Any],
+        collections: Iterable[str] = (),
+    ) -> tuple[bool, Any]:
+        """Returns: whether the call is a hit, and its cached result if so; counted
+        as a hit, a miss or a bypass."""
+        if self._ttl_s(fn, collections) <= 0:
+            self._count("bypasses")
+            return False, None
+        hit, result = self._get(self.key(fn, auth_ctx, params))
+        self._count("hits" if hit else "misses")
+        return hit, result
+
+    def store(
+        self,
+        fn: function.Function,
+        auth_ctx: auth.AuthContext,
+        params: dict[str, Any],
+        result: Any,
+        collections: Iterable[str] = (),
+    ) -> None:
+        """Caches the result of a call missed by `lookup`."""
+        if (ttl_s := self._ttl_s(fn, collections)) > 0:
+            self._set(self.key(fn, auth_ctx, params), result, ttl_s)
+
+    def call(
+        self,
+        invoke: function.Invoke,
+        fn: function.Function,
+        auth_ctx: auth.AuthContext,
+        params: dict[str, Any],
+        collections: Iterable[str] = (),
+    ) -> Any:
+        """Returns: the cached result of the call, or that of invoke."""
+        if (ttl_s := self._ttl_s(fn, collections)) <= 0:
+            self._count("bypasses")
+            return invoke(fn, auth_ctx, params)
+        key = self.key(fn, auth_ctx, params)
+        hit, result = self._get(key)
+        if hit:
+            self._count("hits")
+            return result
+        self._count("misses")
+        result = invoke(fn, auth_ctx, params)
+        self._set(key, result, ttl_s)
+        return result
+
+    async def acall(
+        self,
+        ainvoke: function.AInvoke,
+        fn: function.Function,
+        auth_ctx: auth.AuthContext,
+        params: dict[str, Any],
+        collections: Iterable[str] = (),
+    ) -> Any:
+        """Async counterpart of `call`."""
+        if (ttl_s := self._ttl_s(fn, collections)) <= 0:
+            self._count("bypasses")
+            return await ainvoke(fn, auth_ctx, params)
+        key = self.key(fn, auth_ctx, params)
+        hit, result = await self._aget(key)
+        if hit:
+            self._count("hits")
+            return result
+        self._count("misses")
+        result = await ainvoke(fn, auth_ctx, params)
+        await self._aset(key, result, ttl_s)
+        return result
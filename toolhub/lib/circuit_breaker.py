@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import collections
+import dataclasses
+import enum
+import math
+import threading
+import time
+from typing import Any, Callable
+
+import httpx
+
+from toolhub.lib import auth
+from toolhub.lib import deadline
+from toolhub.lib import function
+
+_DEFAULT_FAILURE_RATE = 0.5
+_DEFAULT_MIN_CALLS = 5
+_DEFAULT_WINDOW_S = 30.0
+_DEFAULT_OPEN_S = 30.0
+_DEFAULT_HALF_OPEN_PROBES = 1
+# Time left before the caller's deadline below which a timeout is the caller's:
+# HTTP timeouts are capped by the deadline, and fire about when it passes.
+_DEADLINE_MARGIN_S = 0.05
+
+
+class State(str, enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpen(RuntimeError):
+    """A call was rejected without calling its upstream API, which is failing."""
+
+
+def default_upstream(fn: function.Function) -> str | None:
+    """Returns: the upstream API of fn (the host of RapidAPI functions, the API of
+    OpenAPI functions), or None for e.g. local Python functions."""
+    return getattr(fn, "root_url", None) or getattr(fn.spec, "api", None)
+
+
+def _out_of_callers_time(e: Exception) -> bool:
+    """Returns: whether e is due to the caller's deadline rather than to the
+    upstream, e.g. a timeout capped by the deadline; called in the context of the
+    call."""
+    if isinstance(e, deadline.DeadlineExceeded):
+        return True
+    if isinstance(e, (httpx.TimeoutException, TimeoutError)):
+        remaining_s = deadline.remaining_s()
+        return remaining_s is not None and remaining_s <= _DEADLINE_MARGIN_S
+    return False
+
+
+def default_is_failure(e: Exception) -> bool:
+    """Returns: whether e tells that the upstream API is failing, rather than e.g.
+    that the call's arguments are invalid, or that the caller's deadline was too
+    tight: timeouts only count while the caller still had time left."""
+    if _out_of_callers_time(e):
+        return False
+    if isinstance(e, httpx.TransportError):
+        return True
+    status_code = getattr(e, "status_code", None)
+    return status_code is not None and (status_code >= 500 or status_code == 429)
+
+
+@dataclasses.dataclass
+class _Circuit:
+    state: State = State.CLOSED
+    # (time, failed) of the calls of the last window_s, while closed.
+    outcomes: collections.deque[tuple[float, bool]] = dataclasses.field(
+        default_factory=collections.deque
+    )
+    failures: int = 0
+    opened_at: float = 0.0
+    probes: int = 0
+    # Calls rejected since the circuit opened.
+    rejected: int = 0
+    # Times the circuit opened.
+    trips: int = 0
+
+
+class CircuitBreaker:
+    """Fails the calls of an upstream API fast while it is failing.
+
+    Each upstream (see `default_upstream`) has a circuit. It opens when at least
+    failure_rate of the calls of the last window_s failed, over at least
+    min_calls calls. Calls to an open circuit raise CircuitOpen right away, with a
+    message the LLM can act on, e.g. by choosing another tool. After open_s, up
+    to half_open_probes calls are let through: the circuit closes if they succeed
+    and opens again if they fail. Calls that run out of their caller's deadline
+    count neither as failures nor as successes. Functions without an upstream,
+    e.g. local Python functions, bypass the breaker.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = _DEFAULT_FAILURE_RATE,
+        min_calls: int = _DEFAULT_MIN_CALLS,
+        window_s: float = _DEFAULT_WINDOW_S,
+        open_s: float = _DEFAULT_OPEN_S,
+        half_open_probes: int = _DEFAULT_HALF_OPEN_PROBES,
+        upstream: Callable[[function.Function], str | None] = default_upstream,
+        is_failure: Callable[[Exception], bool] = default_is_failure,
+    ):
+        assert 0 < failure_rate <= 1, ValueError(
+            f"failure_rate must be in (0, 1], got {failure_rate}"
+        )
+        assert half_open_probes >= 1, ValueError(
+            f"half_open_probes must be positive, got {half_open_probes}"
+        )
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_s = window_s
+        self.open_s = open_s
+        self.half_open_probes = half_open_probes
+        self.upstream = upstream
+        self.is_failure = is_failure
+        self._lock = threading.Lock()
+        self._circuits: dict[str, _Circuit] = {}
+
+    def _admit(self, upstream: str) -> bool:
+        """Returns: whether the call is a half-open probe.
+
+        Raises: CircuitOpen if the call is rejected.
+        """
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuits.setdefault(upstream, _Circuit())
+            if circuit.state is State.OPEN and now - circuit.opened_at >= self.open_s:
+                circuit.state = State.HALF_OPEN
+                circuit.probes = 0
+            if circuit.state is State.CLOSED:
+                return False
+            if (
+                circuit.state is State.HALF_OPEN
+                and circuit.probes < self.half_open_probes
+            ):
+                circuit.probes += 1
+                return True
+            circuit.rejected += 1
+            retry_in_s = max(0.0, circuit.opened_at + self.open_s - now)
+        raise CircuitOpen(
+            f"{upstream} is temporarily unavailable after repeated failures;"
+            f" use another tool, or retry in {math.ceil(retry_in_s)}s"
+        )
+
+    def _open(self, circuit: _Circuit, now: float) -> None:
+        circuit.state = State.OPEN
+        circuit.opened_at = now
+        circuit.outcomes.clear()
+        circuit.failures = 0
+        circuit.rejected = 0
+        circuit.trips += 1
+
+    def _record(self, upstream: str, probe: bool, failed: bool | None) -> None:
+        """Records the outcome of a call; None if it was e.g. cancelled, which tells
+        nothing about the upstream."""
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuits[upstream]
+            if probe:
+                circuit.probes -= 1
+                if failed is None:
+                    return
+                if failed:
+                    self._open(circuit, now)
+                elif circuit.state is State.HALF_OPEN:
+                    circuit.state = State.CLOSED
+                return
+            if failed is None or circuit.state is not State.CLOSED:
+                # NOTE: e.g. a call admitted before the circuit opened.
+                return
+            circuit.outcomes.append((now, failed))
+            circuit.failures += failed
+            while circuit.outcomes and circuit.outcomes[0][0] < now - self.window_s:
+                circuit.failures -= circuit.outcomes.popleft()[1]
+            calls = len(circuit.outcomes)
+            if (
+                calls >= self.min_calls
+                and circuit.failures >= self.failure_rate * calls
+            ):
+                self._open(circuit, now)
+
+    def call(
+        self,
+        invoke: function.Invoke,
+        fn: function.Function,
+        auth_ctx: auth.AuthContext,
+        params: dict[str, Any],
+    ) -> Any:
+        """Returns: the result of invoke, unless the circuit of fn's upstream is
+        open."""
+        if (upstream := self.upstream(fn)) is None:
+            return invoke(fn, auth_ctx, params)
+        probe = self._admit(upstream)
+        try:
+            result = invoke(fn, auth_ctx, params)
+        except Exception as e:
+            # NOTE: calls that ran out of their caller's time tell nothing about
+            # the upstream.
+            failed = None if _out_of_callers_time(e) else self.is_failure(e)
+            self._record(upstream, probe, failed)
+            raise
+        except BaseException:
+            self._record(upstream, probe, None)
+            raise
+        self._record(upstream, probe, False)
+        return result
+
+    async def acall(
+        self,
+        ainvoke: function.AInvoke,
+        fn: function.Function,
+        auth_ctx: auth.AuthContext,
+        params: dict[str, Any],
+    ) -> Any:
+        """Async counterpart of `call`."""
+        if (upstream := self.upstream(fn)) is None:
+            return await ainvoke(fn, auth_ctx, params)
+        probe = self._admit(upstream)
+        try:
+            result = await ainvoke(fn, auth_ctx, params)
+        except Exception as e:
+            # NOTE: calls that ran out of their caller's time tell nothing about
+            # the upstream.
+            failed = None if _out_of_callers_time(e) else self.is_failure(e)
+            self._record(upstream, probe, failed)
+            raise
+        except BaseException:
+            self._record(upstream, probe, None)
+            raise
+        self._record(upstream, probe, False)
+        return result
+
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        """Returns: the state of each upstream's circuit."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                upstream: dict(
+                    state=(
+                        State.HALF_OPEN
+                        if circuit.state is State.OPEN
+                        and now - circuit.opened_at >= self.open_s
+                        else circuit.state
+                    ).value,
+                    calls=len(circuit.outcomes),
+                    failures=circuit.failures,
+                    rejected=circuit.rejected,
+                    trips=circuit.trips,
+                )
+                for upstream, circuit in self._circuits.items()
+            }
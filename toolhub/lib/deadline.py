@@ -0,0 +1,96 @@
+# Deadlines of tool calls, propagated through a context variable from the hub down
+# to the HTTP layer, which caps its timeouts by the remaining budget. Scopes nest:
+# the innermost deadline is the earliest. Threads started with
+# contextvars.copy_context (and asyncio tasks) inherit the deadline.
+import contextlib
+import contextvars
+import time
+from typing import Iterable, Iterator
+
+from toolhub.lib import function
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "toolhub_deadline", default=None
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """A tool call ran out of time."""
+
+
+def remaining_s() -> float | None:
+    """Returns: the time left before the current deadline, if any."""
+    if (deadline := _deadline.get()) is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def expired() -> bool:
+    return (remaining := remaining_s()) is not None and remaining <= 0
+
+
+def check(what: str = "call") -> None:
+    """Raises: DeadlineExceeded if the current deadline has passed."""
+    if expired():
+        raise DeadlineExceeded(f"{what} ran out of time")
+
+
+def timeout_s(default_s: float | None) -> float | None:
+    """Returns: default_s, capped by the time left before the current deadline."""
+    if (remaining := remaining_s()) is None:
+        return default_s
+    if remaining <= 0:
+        raise DeadlineExceeded("call ran out of time")
+    return remaining if default_s is None else min(default_s, remaining)
+
+
+@contextlib.contextmanager
+def scope(timeout_s_: float | None) -> Iterator[None]:
+    """Sets a deadline timeout_s_ from now, unless the current one is earlier; no
+    deadline is set if timeout_s_ is None."""
+    if timeout_s_ is None:
+        yield
+        return
+    deadline = time.monotonic() + timeout_s_
+    if (current := _deadline.get()) is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class Timeouts:
+    """Timeouts of a hub's tool calls.
+
+    Args:
+        default_s: timeout of the functions with no function or collection timeout;
+            none if None.
+        collection_timeouts_s: timeout per collection name; a function in several
+            collections uses the smallest.
+        function_timeouts_s: timeout per function name; overrides the collection
+            timeouts.
+    """
+
+    def __init__(
+        self,
+        default_s: float | None = None,
+        collection_timeouts_s: dict[str, float] | None = None,
+        function_timeouts_s: dict[str, float] | None = None,
+    ):
+        self.default_s = default_s
+        self.collection_timeouts_s = collection_timeouts_s or {}
+        self.function_timeouts_s = function_timeouts_s or {}
+
+    def timeout_s(
+        self, fn: function.Function, collections: Iterable[str]
+    ) -> float | None:
+        if (t := self.function_timeouts_s.get(fn.spec.name)) is not None:
+            return t
+        timeouts_s = [
+            self.collection_timeouts_s[c]
+            for c in collections
+            if c in self.collection_timeouts_s
+        ]
+        return min(timeouts_s) if timeouts_s else self.default_s
@@ -1,6 +1,7 @@
+import asyncio
 import dataclasses
 
-from typing import Callable, Generic, Type, TypeVar
+from typing import Any, Awaitable, Callable, Generic, Type, TypeVar
 from typing_extensions import ParamSpec
 
 from toolhub.lib import auth
@@ -11,7 +12,8 @@ R = TypeVar("R")
 AuthContext = TypeVar("AuthContext", bound=auth.AuthContext)
 
 
-@dataclasses.dataclass
+# NOTE: specs and functions are slotted, as catalogs hold tens of thousands of them.
+@dataclasses.dataclass(slots=True)
 class ParameterSpec(Generic[T]):
     name: str
     type_: Type
@@ -19,13 +21,13 @@ class ParameterSpec(Generic[T]):
     required: bool
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class ReturnSpec(Generic[R]):
     type_: Type
     description: str | None
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class FunctionSpec(Generic[P, R]):
     name: str
     parameters: list[ParameterSpec]
@@ -33,10 +35,40 @@ class FunctionSpec(Generic[P, R]):
     description: str | None
 
 
-@dataclasses.dataclass
+def _accept_all(params: dict[str, Any]) -> bool:
+    return True
+
+
+@dataclasses.dataclass(slots=True)
+class Bulk(Generic[AuthContext]):
+    """The bulk counterpart of a function, e.g. a search by a list of ids for a
+    lookup by id: serves several calls of the function with one upstream request.
+    """
+
+    # Takes the typed parameters of each call, and returns the result of each, in
+    # order; an Exception in place of the result of a call that failed.
+    callable_: Callable[[AuthContext], Callable[[list[dict[str, Any]]], list[Any]]]
+    acallable_: (
+        Callable[[AuthContext], Callable[[list[dict[str, Any]]], Awaitable[list[Any]]]]
+        | None
+    ) = None
+    # Whether a call, by its typed parameters, can be served in bulk.
+    accepts: Callable[[dict[str, Any]], bool] = _accept_all
+    # Most calls per bulk request.
+    max_calls: int = 100
+
+
+@dataclasses.dataclass(slots=True)
 class Function(Generic[P, R, AuthContext]):
     spec: FunctionSpec[P, R]
     callable_: Callable[AuthContext, Callable[P, R]]
+    # Optional native coroutine implementation of callable_, used by the async
+    # paths; functions without one are run on a thread by `acall`.
+    acallable_: Callable[
+        AuthContext, Callable[P, Awaitable[R]]
+    ] | None = dataclasses.field(default=None, kw_only=True)
+    # Optional bulk counterpart, used by the hubs for batches of calls of fn.
+    bulk: Bulk[AuthContext] | None = dataclasses.field(default=None, kw_only=True)
 
     def __repr__(self):
         return self.spec.name
@@ -47,3 +79,82 @@ class FunctionCollection:
     name: str
     description: str | None
     function_names: set[str]
+
+
+def http_method(fn: Function) -> str | None:
+    """Returns: the HTTP method of fn, or None for e.g. local Python functions."""
+    method = getattr(fn, "method", None) or getattr(fn.spec, "method", None)
+    return method.upper() if method else None
+
+
+def bulk_counterpart(fn: Function) -> Bulk | None:
+    # NOTE: unset on e.g. the slotted subclasses with their own __init__.
+    return getattr(fn, "bulk", None)
+
+
+# Calls a function with typed parameters; the signature of `call` and `acall`.
+Invoke = Callable[[Function, auth.AuthContext, dict[str, Any]], Any]
+AInvoke = Callable[[Function, auth.AuthContext, dict[str, Any]], Awaitable[Any]]
+# Calls a function once per typed parameters, in bulk; the signature of
+# `call_bulk` and `acall_bulk`.
+InvokeBulk = Callable[[Function, auth.AuthContext, list[dict[str, Any]]], list[Any]]
+AInvokeBulk = Callable[
+    [Function, auth.AuthContext, list[dict[str, Any]]], Awaitable[list[Any]]
+]
+
+
+def call(
+    fn: Function[Any, R, AuthContext],
+    auth_ctx: AuthContext,
+    params: dict[str, Any],
+) -> R:
+    return fn.callable_(auth_ctx)(**params)
+
+
+async def acall(
+    fn: Function[Any, R, AuthContext],
+    auth_ctx: AuthContext,
+    params: dict[str, Any],
+) -> R:
+    if fn.acallable_ is not None:
+        return await fn.acallable_(auth_ctx)(**params)
+    # NOTE: offload synchronous (e.g. local Python) functions to not block the loop.
+    return await asyncio.to_thread(call, fn, auth_ctx, params)
+
+
+def _check_bulk_results(
+    fn: Function, params_list: list[dict[str, Any]], results: list[Any]
+) -> list[Any]:
+    if len(results) != len(params_list):
+        raise RuntimeError(
+            f"bulk counterpart of {fn.spec.name} returned {len(results)} results"
+            f" for {len(params_list)} calls"
+        )
+    return results
+
+
+def call_bulk(
+    fn: Function[Any, Any, AuthContext],
+    auth_ctx: AuthContext,
+    params_list: list[dict[str, Any]],
+) -> list[Any]:
+    """Returns: the result of each call of fn, or its Exception, from a single
+    call of fn's bulk counterpart."""
+    bulk = bulk_counterpart(fn)
+    assert bulk is not None, ValueError(f"{fn.spec.name} has no bulk counterpart")
+    return _check_bulk_results(fn, params_list, bulk.callable_(auth_ctx)(params_list))
+
+
+async def acall_bulk(
+    fn: Function[Any, Any, AuthContext],
+    auth_ctx: AuthContext,
+    params_list: list[dict[str, Any]],
+) -> list[Any]:
+    """Async counterpart of `call_bulk`."""
+    bulk = bulk_counterpart(fn)
+    assert bulk is not None, ValueError(f"{fn.spec.name} has no bulk counterpart")
+    if bulk.acallable_ is None:
+        return await asyncio.to_thread(call_bulk, fn, auth_ctx, params_list)
+    return _check_bulk_results(
+        fn, params_list, await bulk.acallable_(auth_ctx)(params_list)
+    )
@@ -1,14 +1,34 @@
 import abc
+import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
 import dataclasses
-from typing import Generic, TypeVar
+import functools
+import json
+import threading
+from typing import Any, Callable, Generic, Iterator, TypeVar
 
 from toolhub.lib import auth
+from toolhub.lib import cache
+from toolhub.lib import circuit_breaker
+from toolhub.lib import deadline
+from toolhub.lib import function
+from toolhub.lib import projection
 from toolhub.lib import registry
+from toolhub.lib import retrieval
+from toolhub.lib import singleflight
 
 AuthContext = TypeVar("AuthContext", bound=auth.AuthContext)
 ToolsSpec = TypeVar("ToolsSpec")
 ToolCall = TypeVar("ToolCall")
 ToolOutput = TypeVar("ToolOutput")
+R = TypeVar("R")
+# (registry, version) of the memos of a registry's functions.
+RegistryKey = tuple[registry.Registry, int]
+
+_DEFAULT_MAX_CONCURRENCY = 8
+_DEFAULT_TOP_K = 20
 
 
 @dataclasses.dataclass
@@ -16,24 +36,590 @@ class ToolCallErrors:
     errors: list[Exception]
 
 
+@dataclasses.dataclass
+class Batch:
+    """Calls of a call_tools batch that run together: a single call, or several
+    calls of a function that run as one bulk call."""
+
+    # Indices of the calls.
+    indices: list[int]
+    # Typed parameters of each call, if decoded while batching; always set for
+    # bulk calls.
+    params: list[dict[str, Any]] | None = None
+
+
+def _deadline_errors() -> ToolCallErrors:
+    return ToolCallErrors([deadline.DeadlineExceeded("tool call ran out of time")])
+
+
+@contextlib.contextmanager
+def _out_of_time(name: str) -> Iterator[None]:
+    try:
+        yield
+    except Exception as e:
+        # NOTE: e.g. a timeout of the HTTP layer, capped by the deadline.
+        if deadline.expired() and not isinstance(e, deadline.DeadlineExceeded):
+            raise deadline.DeadlineExceeded(f"{name} ran out of time") from e
+        raise
+
+
+def _invoke_bulk(
+    fn: function.Function, auth_ctx: auth.AuthContext, params: dict[str, Any]
+) -> list[Any]:
+    # NOTE: the signature of function.Invoke, for the execution layers.
+    return function.call_bulk(fn, auth_ctx, params["calls"])
+
+
+async def _ainvoke_bulk(
+    fn: function.Function, auth_ctx: auth.AuthContext, params: dict[str, Any]
+) -> list[Any]:
+    return await function.acall_bulk(fn, auth_ctx, params["calls"])
+
+
 class Hub(abc.ABC, Generic[AuthContext, ToolsSpec, ToolCall, ToolOutput]):
     registry_: registry.Registry[AuthContext]
+    max_concurrency: int
+    response_cache: cache.ResponseCache | None
+    single_flight: singleflight.SingleFlight | None
+    tool_index: retrieval.ToolIndex | None
+    timeouts: deadline.Timeouts | None
+    circuit_breaker: circuit_breaker.CircuitBreaker | None
+    projector: projection.Projector | None
+    max_tools_spec_tokens: int | None
+    # (registry key, tools spec, tools spec JSON) of the last tools_spec().
+    _tools_spec_cache: tuple[RegistryKey, ToolsSpec, bytes | None] | None = None
+    # (registry key, index of the registry) when no tool_index is given.
+    _registry_index_cache: tuple[RegistryKey, retrieval.ToolIndex] | None = None
+    # Threads of call_tools, started on first use; see close().
+    _executor: concurrent.futures.ThreadPoolExecutor | None = None
+    _executor_lock: threading.Lock
 
     def __init__(
         self,
         registry_: registry.Registry[AuthContext],
+        max_concurrency: int = _DEFAULT_MAX_CONCURRENCY,
+        response_cache: cache.ResponseCache | None = None,
+        single_flight: singleflight.SingleFlight | None = None,
+        tool_index: retrieval.ToolIndex | None = None,
+        timeouts: deadline.Timeouts | None = None,
+        circuit_breaker: circuit_breaker.CircuitBreaker | None = None,
+        projector: projection.Projector | None = None,
+        max_tools_spec_tokens: int | None = None,
     ):
+        """
+        Args:
+            max_concurrency: maximum number of tool calls that run at the same
+                time: on the hub's threads for call_tools, shared by all its
+                callers, and per batch for acall_tools. 1 runs the calls one
+                after another, in order, as hubs did before they ran calls
+                concurrently; the default runs up to 8 at once.
+            response_cache: cache of the results of idempotent calls, if any.
+            single_flight: coalesces identical in-flight idempotent calls, if set;
+                runs behind the response cache, i.e. on cache misses.
+            tool_index: retrieval index of relevant_tools_spec, e.g. persisted for
+                a whole catalog; defaults to an index of the registry, built on
+                first use.
+            timeouts: timeouts of the tool calls, per collection and function, if
+                any; calls that run out of time return DeadlineExceeded errors.
+            circuit_breaker: fails the calls of failing upstream APIs fast, if set;
+                runs behind single-flight, i.e. once per coalesced call.
+            projector: renders the tool results for the LLM within a token budget,
+                with rules per function, if set; results are cut to a number of
+                characters otherwise.
+            max_tools_spec_tokens: token budget of the tools specs, if any; their
+                descriptions are compacted to fit, least relevant tools first.
+        """
+        assert max_concurrency >= 1, ValueError(
+            f"max_concurrency must be positive, got {max_concurrency}"
+        )
         self.registry_ = registry_
+        self.max_concurrency = max_concurrency
+        self.response_cache = response_cache
+        self.single_flight = single_flight
+        self.tool_index = tool_index
+        self.timeouts = timeouts
+        self.circuit_breaker = circuit_breaker
+        self.projector = projector
+        self.max_tools_spec_tokens = max_tools_spec_tokens
+        self._executor_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Stops the threads of call_tools, once their calls complete; a later
+        call_tools starts new ones."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.close()
+
+    def _call_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix="toolhub-call",
+                )
+            return self._executor
 
     @abc.abstractmethod
+    def _build_tools_spec(
+        self, fns: list[function.Function[Any, Any, AuthContext]] | None = None
+    ) -> ToolsSpec:
+        """Returns: the spec of fns; of all the registry's functions if None."""
+        raise NotImplementedError()
+
+    def _registry_key(self) -> RegistryKey:
+        """Returns: the key of the memos of the registry's functions; changes when
+        the registry is replaced, e.g. with a view, or modified."""
+        # NOTE: registries compare by identity; holding the registry keeps its id
+        # from being reused by another one.
+        return self.registry_, self.registry_.version
+
     def tools_spec(self) -> ToolsSpec:
+        """Returns: the spec of the registry's tools, in the LLM API's format.
+
+        Memoized per registry and version; callers must not modify the result.
+        """
+        key = self._registry_key()
+        if (cached := self._tools_spec_cache) is None or cached[0] != key:
+            cached = self._tools_spec_cache = (key, self._build_tools_spec(), None)
+        return cached[1]
+
+    def tools_spec_json(self) -> bytes:
+        """Returns: tools_spec() serialized as compact JSON, e.g. to be embedded as is
+        in a request body."""
+        self.tools_spec()
+        key, tools_spec, tools_spec_json = self._tools_spec_cache
+        if tools_spec_json is None:
+            tools_spec_json = json.dumps(tools_spec, separators=(",", ":")).encode()
+            self._tools_spec_cache = (key, tools_spec, tools_spec_json)
+        return tools_spec_json
+
+    def _tool_index(self) -> retrieval.ToolIndex:
+        if self.tool_index is not None:
+            return self.tool_index
+        key = self._registry_key()
+        if (cached := self._registry_index_cache) is None or cached[0] != key:
+            cached = self._registry_index_cache = (
+                key,
+                retrieval.ToolIndex.build(self.registry_.list_()),
+            )
+        return cached[1]
+
+    def relevant_tools_spec(self, query: str, k: int = _DEFAULT_TOP_K) -> ToolsSpec:
+        """Returns: the spec of the (at most) k tools of the registry most relevant
+        to query, e.g. the user's last message.
+
+        Lets an LLM use registries larger than the number of tools it supports.
+        """
+        # NOTE: the index may cover functions that are not in the registry.
+        names = self._tool_index().search(query, k, where=self.registry_.__contains__)
+        return self._build_tools_spec([self.registry_.get(name) for name in names])
+
+    def metrics(self) -> dict[str, Any]:
+        """Returns: counters of the hub's execution layers."""
+        metrics: dict[str, Any] = {}
+        if self.response_cache:
+            metrics["response_cache"] = dataclasses.asdict(self.response_cache.stats)
+        if self.single_flight:
+            metrics["single_flight"] = dataclasses.asdict(self.single_flight.stats)
+        if self.circuit_breaker:
+            metrics["circuit_breaker"] = self.circuit_breaker.metrics()
+        return metrics
+
+    def _timeout_s(self, fn: function.Function, collections: list[str]) -> float | None:
+        return self.timeouts.timeout_s(fn, collections) if self.timeouts else None
+
+    def _invoke(
+        self,
+        fn: function.Function,
+        auth_ctx: AuthContext,
+        params: dict[str, Any],
+    ) -> Any:
+        """Calls fn with typed parameters through the hub's execution layers."""
+        collections = self.registry_.collections_of(fn.spec.name)
+        invoke: function.Invoke = function.call
+        if self.circuit_breaker:
+            invoke = functools.partial(self.circuit_breaker.call, invoke)
+        if self.single_flight:
+            invoke = functools.partial(self.single_flight.call, invoke)
+        if self.response_cache:
+            invoke = functools.partial(
+                self.response_cache.call, invoke, collections=collections
+            )
+        with deadline.scope(self._timeout_s(fn, collections)):
+            deadline.check(fn.spec.name)
+            with _out_of_time(fn.spec.name):
+                result = invoke(fn, auth_ctx, params)
+            # NOTE: e.g. local functions can't be interrupted, only discarded.
+            deadline.check(fn.spec.name)
+            return result
+
+    async def _ainvoke(
+        self,
+        fn: function.Function,
+        auth_ctx: AuthContext,
+        params: dict[str, Any],
+    ) -> Any:
+        """Async counterpart of `_invoke`."""
+        collections = self.registry_.collections_of(fn.spec.name)
+        ainvoke: function.AInvoke = function.acall
+        if self.circuit_breaker:
+            ainvoke = functools.partial(self.circuit_breaker.acall, ainvoke)
+        if self.single_flight:
+            ainvoke = functools.partial(self.single_flight.acall, ainvoke)
+        if self.response_cache:
+            ainvoke = functools.partial(
+                self.response_cache.acall, ainvoke, collections=collections
+            )
+        with deadline.scope(self._timeout_s(fn, collections)):
+            deadline.check(fn.spec.name)
+            with _out_of_time(fn.spec.name):
+                return await asyncio.wait_for(
+                    ainvoke(fn, auth_ctx, params), deadline.remaining_s()
+                )
+
+    def _invoke_bulk(
+        self,
+        fn: function.Function,
+        auth_ctx: AuthContext,
+        params_list: list[dict[str, Any]],
+    ) -> list[Any]:
+        """Calls fn once per typed parameters, with a single call of its bulk
+        counterpart for the calls missed by the response cache.
+
+        Returns: the result of each call, or its Exception.
+        """
+        collections = self.registry_.collections_of(fn.spec.name)
+        results, misses = self._bulk_lookup(fn, auth_ctx, params_list, collections)
+        if not misses:
+            return results
+        invoke: function.Invoke = _invoke_bulk
+        if self.circuit_breaker:
+            invoke = functools.partial(self.circuit_breaker.call, invoke)
+        with deadline.scope(self._timeout_s(fn, collections)):
+            deadline.check(fn.spec.name)
+            with _out_of_time(fn.spec.name):
+                bulk_results = invoke(
+                    fn, auth_ctx, {"calls": [params_list[i] for i in misses]}
+                )
+            deadline.check(fn.spec.name)
+        self._bulk_store(fn, auth_ctx, params_list, collections, misses, bulk_results)
+        for i, result in zip(misses, bulk_results):
+            results[i] = result
+        return results
+
+    async def _ainvoke_bulk(
+        self,
+        fn: function.Function,
+        auth_ctx: AuthContext,
+        params_list: list[dict[str, Any]],
+    ) -> list[Any]:
+        """Async counterpart of `_invoke_bulk`."""
+        collections = self.registry_.collections_of(fn.spec.name)
+        results, misses = await self._off_loop(
+            self._bulk_lookup, fn, auth_ctx, params_list, collections
+        )
+        if not misses:
+            return results
+        ainvoke: function.AInvoke = _ainvoke_bulk
+        if self.circuit_breaker:
+            ainvoke = functools.partial(self.circuit_breaker.acall, ainvoke)
+        with deadline.scope(self._timeout_s(fn, collections)):
+            deadline.check(fn.spec.name)
+            with _out_of_time(fn.spec.name):
+                bulk_results = await asyncio.wait_for(
+                    ainvoke(fn, auth_ctx, {"calls": [params_list[i] for i in misses]}),
+                    deadline.remaining_s(),
+                )
+        await self._off_loop(
+            self._bulk_store,
+            fn,
+            auth_ctx,
+            params_list,
+            collections,
+            misses,
+            bulk_results,
+        )
+        for i, result in zip(misses, bulk_results):
+            results[i] = result
+        return results
+
+    async def _off_loop(self, f: Callable[..., R], *args: Any) -> R:
+        """Returns: f(*args), run on a thread if it uses a response cache backend
+        that blocks, e.g. on disk or network I/O."""
+        if self.response_cache and self.response_cache.backend.blocking:
+            return await asyncio.to_thread(f, *args)
+        return f(*args)
+
+    def _bulk_lookup(
+        self,
+        fn: function.Function,
+        auth_ctx: AuthContext,
+        params_list: list[dict[str, Any]],
+        collections: list[str],
+    ) -> tuple[list[Any], list[int]]:
+        """Returns: the cached results of the calls, and the indices of the misses.
+
+        NOTE: bulk calls are not coalesced by single-flight.
+        """
+        results: list[Any] = [None] * len(params_list)
+        if not self.response_cache:
+            return results, list(range(len(params_list)))
+        misses = []
+        for i, params in enumerate(params_list):
+            hit, results[i] = self.response_cache.lookup(
+                fn, auth_ctx, params, collections
+            )
+            if not hit:
+                misses.append(i)
+        return results, misses
+
+    def _bulk_store(
+        self,
+        fn: function.Function,
+        auth_ctx: AuthContext,
+        params_list: list[dict[str, Any]],
+        collections: list[str],
+        misses: list[int],
+        bulk_results: list[Any],
+    ) -> None:
+        if not self.response_cache:
+            return
+        for i, result in zip(misses, bulk_results):
+            if not isinstance(result, Exception):
+                self.response_cache.store(
+                    fn, auth_ctx, params_list[i], result, collections
+                )
+
+    @abc.abstractmethod
+    def _call_tool(
+        self,
+        auth_ctx: AuthContext,
+        call: ToolCall,
+        params: dict[str, Any] | None = None,
+    ) -> ToolOutput | ToolCallErrors:
+        """Returns: output or errors of a single call.
+
+        Args:
+            params: the typed parameters of the call, if already decoded.
+        """
         raise NotImplementedError()
 
     @abc.abstractmethod
-    def call_tools(
+    async def _acall_tool(
+        self,
+        auth_ctx: AuthContext,
+        call: ToolCall,
+        params: dict[str, Any] | None = None,
+    ) -> ToolOutput | ToolCallErrors:
+        """Async counterpart of `_call_tool`."""
+        raise NotImplementedError()
+
+    def _batches(self, calls: list[ToolCall]) -> list[Batch]:
+        """Returns: the calls, grouped into batches; the calls of a batch of several
+        run as a single bulk call (see `_call_tools_bulk`).
+
+        By default, each call is a batch of its own.
+        """
+        return [Batch([i]) for i in range(len(calls))]
+
+    def _call_tools_bulk(
         self,
         auth_ctx: AuthContext,
         calls: list[ToolCall],
+        params_list: list[dict[str, Any]],
     ) -> list[ToolOutput | ToolCallErrors]:
-        """Returns: output or errors corresponding to each call, in order."""
+        """Returns: output or errors of each call of a batch, from one bulk call
+        with the typed parameters of each."""
         raise NotImplementedError()
+
+    async def _acall_tools_bulk(
+        self,
+        auth_ctx: AuthContext,
+        calls: list[ToolCall],
+        params_list: list[dict[str, Any]],
+    ) -> list[ToolOutput | ToolCallErrors]:
+        """Async counterpart of `_call_tools_bulk`."""
+        raise NotImplementedError()
+
+    def _call_tool_safe(
+        self,
+        auth_ctx: AuthContext,
+        call: ToolCall,
+        params: dict[str, Any] | None,
+    ) -> ToolOutput | ToolCallErrors:
+        # NOTE: a failing call must not fail the other calls of its batch.
+        try:
+            return self._call_tool(auth_ctx, call, params)
+        except Exception as e:
+            return ToolCallErrors([e])
+
+    def _call_batch_safe(
+        self,
+        auth_ctx: AuthContext,
+        calls: list[ToolCall],
+        batch: Batch,
+    ) -> list[ToolOutput | ToolCallErrors]:
+        batch_calls = [calls[i] for i in batch.indices]
+        if len(batch_calls) == 1:
+            params = batch.params[0] if batch.params else None
+            return [self._call_tool_safe(auth_ctx, batch_calls[0], params)]
+        try:
+            return self._call_tools_bulk(auth_ctx, batch_calls, batch.params)
+        except Exception as e:
+            # NOTE: e.g. the bulk endpoint failed or its circuit is open; fall back
+            # to the single calls, unless out of time.
+            if deadline.expired():
+                return [ToolCallErrors([e]) for _ in batch_calls]
+        # NOTE: the calls run on their own threads, as the batch may already hold
+        # one of the executor's.
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(len(batch_calls), self.max_concurrency),
+            thread_name_prefix="toolhub-call",
+        ) as executor:
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self._call_tool_safe,
+                    auth_ctx,
+                    call,
+                    params,
+                )
+                for call, params in zip(batch_calls, batch.params)
+            ]
+            return [future.result() for future in futures]
+
+    def call_tools(
+        self,
+        auth_ctx: AuthContext,
+        calls: list[ToolCall],
+        deadline_s: float | None = None,
+    ) -> list[ToolOutput | ToolCallErrors]:
+        """Returns: output or errors corresponding to each call, in order.
+
+        The calls run concurrently on the hub's `max_concurrency` threads, so the
+        latency of a batch is that of its slowest call. Several calls of a
+        function with a bulk counterpart, e.g. lookups by id, run as a single
+        upstream request.
+
+        Args:
+            deadline_s: time budget of the batch, if any; the calls that don't
+                complete in time return DeadlineExceeded errors, the others their
+                results. Calls that ran out of time stop at their next HTTP
+                timeout, capped by the deadline; calls that haven't started don't
+                run.
+        """
+        batches = self._batches(calls)
+        results: list[ToolOutput | ToolCallErrors] = [None] * len(calls)
+        with deadline.scope(deadline_s):
+            if deadline.remaining_s() is None and (
+                self.max_concurrency == 1 or len(batches) <= 1
+            ):
+                for batch in batches:
+                    outputs = self._call_batch_safe(auth_ctx, calls, batch)
+                    for i, output in zip(batch.indices, outputs):
+                        results[i] = output
+                return results
+
+            executor = self._call_executor()
+            # NOTE: the calls inherit the deadline through the context.
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self._call_batch_safe,
+                    auth_ctx,
+                    calls,
+                    batch,
+                )
+                for batch in batches
+            ]
+            done, not_done = concurrent.futures.wait(
+                futures, timeout=deadline.remaining_s()
+            )
+            # NOTE: don't wait for the calls that ran out of time.
+            for future in not_done:
+                future.cancel()
+            for batch, future in zip(batches, futures):
+                outputs = (
+                    future.result()
+                    if future in done
+                    else [_deadline_errors() for _ in batch.indices]
+                )
+                for i, output in zip(batch.indices, outputs):
+                    results[i] = output
+            return results
+
+    async def _acall_tool_safe(
+        self,
+        auth_ctx: AuthContext,
+        call: ToolCall,
+        params: dict[str, Any] | None,
+    ) -> ToolOutput | ToolCallErrors:
+        try:
+            return await self._acall_tool(auth_ctx, call, params)
+        except Exception as e:
+            return ToolCallErrors([e])
+
+    async def _acall_batch_safe(
+        self,
+        auth_ctx: AuthContext,
+        calls: list[ToolCall],
+        batch: Batch,
+    ) -> list[ToolOutput | ToolCallErrors]:
+        batch_calls = [calls[i] for i in batch.indices]
+        if len(batch_calls) == 1:
+            params = batch.params[0] if batch.params else None
+            return [await self._acall_tool_safe(auth_ctx, batch_calls[0], params)]
+        try:
+            return await self._acall_tools_bulk(auth_ctx, batch_calls, batch.params)
+        except Exception as e:
+            # NOTE: e.g. the bulk endpoint failed or its circuit is open; fall back
+            # to the single calls, unless out of time.
+            if deadline.expired():
+                return [ToolCallErrors([e]) for _ in batch_calls]
+        return list(
+            await asyncio.gather(
+                *(
+                    self._acall_tool_safe(auth_ctx, call, params)
+                    for call, params in zip(batch_calls, batch.params)
+                )
+            )
+        )
+
+    async def acall_tools(
+        self,
+        auth_ctx: AuthContext,
+        calls: list[ToolCall],
+        deadline_s: float | None = None,
+    ) -> list[ToolOutput | ToolCallErrors]:
+        """Returns: output or errors corresponding to each call, in order.
+
+        Async counterpart of `call_tools`: runs on the caller's event loop, with at
+        most `max_concurrency` calls (or bulk calls) of the batch in flight.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _bounded(batch: Batch) -> list[ToolOutput | ToolCallErrors]:
+            try:
+                async with semaphore:
+                    return await asyncio.wait_for(
+                        self._acall_batch_safe(auth_ctx, calls, batch),
+                        deadline.remaining_s(),
+                    )
+            except asyncio.TimeoutError:
+                return [_deadline_errors() for _ in batch.indices]
+
+        batches = self._batches(calls)
+        results: list[ToolOutput | ToolCallErrors] = [None] * len(calls)
+        with deadline.scope(deadline_s):
+            outputs = await asyncio.gather(*(_bounded(batch) for batch in batches))
+        for batch, batch_outputs in zip(batches, outputs):
+            for i, output in zip(batch.indices, batch_outputs):
+                results[i] = output
+        return results
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import math
+from typing import Any, Callable
+
+from toolhub.lib import bounded_json
+
+_DEFAULT_MAX_TOKENS = 256
+# Rough number of characters of a token of JSON, for the default token count.
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // _CHARS_PER_TOKEN)
+
+
+@dataclasses.dataclass(frozen=True)
+class Rule:
+    """How to project the results of a function."""
+
+    # Items kept from the start of each array.
+    max_items: int = 5
+    # Keys kept in each nested object, in order; top-level keys are all kept.
+    max_keys: int = 40
+    # Characters kept of each string.
+    max_string_chars: int = 200
+    # Depth below which containers are replaced with their size.
+    max_depth: int = 6
+    # Top-level keys to keep, if set; e.g. ("count", "entities").
+    keep_keys: tuple[str, ...] | None = None
+    # Keys dropped at any depth, besides "_"-prefixed and links keys.
+    drop_keys: frozenset[str] = frozenset()
+    # As for the response descriptions of OpenAPI specs.
+    drop_private: bool = True
+    drop_links: bool = True
+    # Whether to drop the keys of nulls and of empty strings, arrays and objects.
+    drop_empty: bool = True
+
+    def _dropped(self, key: str) -> bool:
+        return (
+            key in self.drop_keys
+            or (self.drop_private and key.startswith("_"))
+            or (self.drop_links and "links" in key.lower())
+        )
+
+    def _tighter(self) -> Rule | None:
+        """Returns: a rule that keeps less, or None if this is the tightest."""
+        if self.max_items > 1:
+            return dataclasses.replace(self, max_items=self.max_items // 2)
+        if self.max_keys > 8:
+            return dataclasses.replace(self, max_keys=self.max_keys // 2)
+        if self.max_string_chars > 40:
+            return dataclasses.replace(
+                self, max_string_chars=self.max_string_chars // 2
+            )
+        if self.max_depth > 2:
+            return dataclasses.replace(self, max_depth=self.max_depth - 1)
+        return None
+
+
+def _empty(value: Any) -> bool:
+    return value is None or (isinstance(value, (str, list, dict)) and not value)
+
+
+def _project(value: Any, rule: Rule, depth: int) -> Any:
+    if isinstance(value, str):
+        if len(value) > rule.max_string_chars:
+            return f"{value[: rule.max_string_chars]}..."
+        return value
+    if isinstance(value, dict):
+        if depth >= rule.max_depth:
+            return f"{{{len(value)} keys}}"
+        projected = {}
+        for k, v in value.items():
+            if rule._dropped(str(k)) or (rule.drop_empty and _empty(v)):
+                continue
+            if depth and len(projected) == rule.max_keys:
+                projected["..."] = "more keys omitted"
+                break
+            projected[k] = _project(v, rule, depth + 1)
+        return projected
+    if isinstance(value, (list, tuple)):
+        if depth >= rule.max_depth:
+            return f"[{len(value)} items]"
+        projected_items = [
+            _project(v, rule, depth + 1) for v in value[: rule.max_items]
+        ]
+        if (n_extra := len(value) - rule.max_items) > 0:
+            projected_items.append(f"... {n_extra} more items")
+        return projected_items
+    return value
+
+
+def project(value: Any, rule: Rule) -> Any:
+    """Returns: the projection of a JSON-like value per rule; the input is not
+    modified, and only the kept parts of it are visited."""
+    if rule.keep_keys is not None and isinstance(value, dict):
+        value = {k: value[k] for k in rule.keep_keys if k in value}
+    return _project(value, rule, 0)
+
+
+class Projector:
+    """Renders tool results for the LLM within a token budget.
+
+    JSON results (dicts and lists) are projected: "_"-prefixed and links keys are
+    dropped, only the first items of long arrays and the start of long strings
+    are kept, and deep containers are replaced with their size. If the
+    projection doesn't fit max_tokens, it is tightened step by step, and finally
+    cut (see `bounded_json.dumps`). Other results are rendered with str and cut.
+
+    Args:
+        default_rule: rule of the functions without their own.
+        function_rules: rule per function name.
+        count_tokens: counts the tokens of a text, e.g. with the model's tokenizer;
+            estimated from its length by default.
+    """
+
+    def __init__(
+        self,
+        default_rule: Rule | None = None,
+        function_rules: dict[str, Rule] | None = None,
+        max_tokens: int = _DEFAULT_MAX_TOKENS,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ):
+        self.default_rule = default_rule or Rule()
+        self.function_rules = function_rules or {}
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+
+    def render(self, result: Any, function_name: str | None = None) -> str:
+        max_chars = self.max_tokens * _CHARS_PER_TOKEN
+        if not isinstance(result, (dict, list, tuple)):
+            return bounded_json.dumps(result, max_chars)
+        rule: Rule | None = self.function_rules.get(
+            function_name or "", self.default_rule
+        )
+        while rule is not None:
+            projected = project(result, rule)
+            output = json.dumps(
+                projected, default=str, ensure_ascii=False, separators=(",", ":")
+            )
+            if (tokens := self.count_tokens(output)) <= self.max_tokens:
+                return output
+            # NOTE: each step about halves the output; take as many as it takes.
+            steps = max(1, int(math.log2(tokens / self.max_tokens)))
+            tighter = rule._tighter()
+            while (steps := steps - 1) and tighter and (t := tighter._tighter()):
+                tighter = t
+            rule = tighter
+        # NOTE: the tightest projection may still be too large, e.g. with many
+        # top-level keys.
+        return bounded_json.dumps(projected, max_chars)
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import itertools
 import re
-from typing import Any, Generic, TypeVar
+from typing import Any, Generic, Iterable, TypeVar
 
 from toolhub.lib import auth
 from toolhub.lib import function
@@ -10,6 +11,10 @@ from toolhub.lib import provider
 ToolName = str
 AuthContext = TypeVar("AuthContext", bound=auth.AuthContext)
 
+# NOTE: versions are drawn from a process-wide counter, so that no two registries
+# or views ever share one, e.g. in the memos of a hub whose registry is replaced.
+_versions = itertools.count(1)
+
 
 def _match_f_string(f_string: str, string: str) -> bool:
     pattern = re.sub(r"{[^{}]*}", "(.*)", f_string)
@@ -17,7 +22,21 @@ def _match_f_string(f_string: str, string: str) -> bool:
 
 
 class Registry(Generic[AuthContext]):
+    """The functions available to a hub, indexed by name and collection.
+
+    `view` returns immutable subsets of a registry that share its functions and
+    indexes, e.g. to select the tools of a request without rebuilding a registry.
+    """
+
     _name_to_fn: dict[str, function.Function[Any, Any, AuthContext]]
+    # The indexes below cover all the functions of the providers, and are shared
+    # by views.
+    _collections: dict[str, function.FunctionCollection]
+    _name_to_collections: dict[str, list[str]]
+    # Position of each function in the providers, to keep views in order.
+    _name_to_position: dict[str, int]
+    _version: int
+    _is_view: bool = False
 
     def __init__(
         self,
@@ -27,30 +46,98 @@ class Registry(Generic[AuthContext]):
         functions = {
             fn.spec.name: fn for provider in providers for fn in provider.functions()
         }
-        collections = {
+        self._collections = {
             col.name: col for provider in providers for col in provider.collections()
         }
-
-        if isinstance(filter_collections, str):
-            filter_collections = [filter_collections]
-
-        self._name_to_fn = {
-            fn_name: fn
-            for fn_name, fn in functions.items()
-            if (
-                not filter_collections
-                or (
-                    filter_collections
-                    and any(
-                        (fn_name in collections[collection_name].function_names)
-                        for collection_name in filter_collections
+        self._name_to_collections = {}
+        for collection in self._collections.values():
+            for fn_name in collection.function_names:
+                if fn_name in functions:
+                    self._name_to_collections.setdefault(fn_name, []).append(
+                        collection.name
                     )
-                )
+        self._name_to_position = {name: i for i, name in enumerate(functions)}
+        self._name_to_fn = (
+            self._select(functions, filter_collections, None)
+            if filter_collections
+            else functions
+        )
+        self._version = next(_versions)
+
+    def _select(
+        self,
+        functions: dict[str, function.Function[Any, Any, AuthContext]],
+        collections: Iterable[str] | str | None,
+        names: Iterable[ToolName] | None,
+    ) -> dict[str, function.Function[Any, Any, AuthContext]]:
+        """Returns: the functions in any of collections or names, in order."""
+        if isinstance(collections, str):
+            collections = [collections]
+        selected = set(names or ())
+        for collection_name in collections or ():
+            selected |= self._collections[collection_name].function_names
+        return {
+            name: functions[name]
+            for name in sorted(
+                (name for name in selected if name in functions),
+                key=self._name_to_position.__getitem__,
             )
         }
 
+    def view(
+        self,
+        collections: Iterable[str] | str | None = None,
+        names: Iterable[ToolName] | None = None,
+    ) -> Registry[AuthContext]:
+        """Returns: an immutable registry of the functions of this registry that are
+        in any of collections or names; all of them if neither is set.
+
+        Costs O(size of the view); the functions and indexes are shared.
+        """
+        view = object.__new__(type(self))
+        view._collections = self._collections
+        view._name_to_collections = self._name_to_collections
+        view._name_to_position = self._name_to_position
+        view._name_to_fn = (
+            self._select(self._name_to_fn, collections, names)
+            if collections is not None or names is not None
+            else dict(self._name_to_fn)
+        )
+        view._version = next(_versions)
+        view._is_view = True
+        return view
+
+    @property
+    def version(self) -> int:
+        """Changes whenever the set of functions changes; unique across registries
+        and views. Used to memoize."""
+        return self._version
+
+    def _check_mutable(self) -> None:
+        if self._is_view:
+            raise RuntimeError("registry views are immutable")
+
+    def register(self, fn: function.Function[Any, Any, AuthContext]) -> None:
+        """Adds fn, replacing any function with the same name."""
+        self._check_mutable()
+        self._name_to_fn[fn.spec.name] = fn
+        self._name_to_position.setdefault(fn.spec.name, len(self._name_to_position))
+        self._version = next(_versions)
+
+    def unregister(self, name: ToolName) -> None:
+        self._check_mutable()
+        del self._name_to_fn[name]
+        self._version = next(_versions)
+
     def list_(self) -> list[function.Function[Any, Any, AuthContext]]:
         return list(self._name_to_fn.values())
 
+    def __contains__(self, name: ToolName) -> bool:
+        return name in self._name_to_fn
+
     def get(self, name: ToolName) -> function.Function[Any, Any, AuthContext]:
         return self._name_to_fn[name]
+
+    def collections_of(self, name: ToolName) -> list[str]:
+        """Returns: the names of the collections that include the function."""
+        return self._name_to_collections.get(name, [])
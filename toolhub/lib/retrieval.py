@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import abc
+import collections
+import hashlib
+import heapq
+import itertools
+import math
+import os
+import pickle
+import re
+from typing import Any, Callable, Iterable, Sequence
+
+from toolhub.lib import function
+
+# NOTE: bump when the tokenization or the persisted layout changes.
+FORMAT_VERSION = 1
+_DEFAULT_K = 20
+# BM25 parameters, as commonly tuned for short documents.
+_K1 = 1.2
+_B = 0.75
+# Weight of the name's tokens relative to the description's.
+_NAME_WEIGHT = 3
+# Reciprocal rank fusion constant of hybrid (BM25 + embedding) retrieval.
+_RRF_K = 60
+
+_TOKEN_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+_STOPWORDS = frozenset(
+    """a an and are as at be by for from has have in is it its of on or that the
+    this to was were will with you your endpoint allows can""".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Returns: the lowercased terms of text, split on non-alphanumerics and
+    camelCase, without stopwords and with plurals folded."""
+    terms = []
+    for token in _TOKEN_RE.findall(text):
+        term = token.lower()
+        if term in _STOPWORDS:
+            continue
+        if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+
+def document(fn_spec: function.FunctionSpec) -> str:
+    """Returns: the text describing fn_spec, as indexed."""
+    parts = [fn_spec.name, fn_spec.description or ""]
+    for p in fn_spec.parameters:
+        parts += [p.name, p.description or ""]
+    if fn_spec.return_ and fn_spec.return_.description:
+        parts.append(fn_spec.return_.description)
+    return "\n".join(parts)
+
+
+def _terms(fn_spec: function.FunctionSpec) -> list[str]:
+    return tokenize(fn_spec.name) * (_NAME_WEIGHT - 1) + tokenize(document(fn_spec))
+
+
+def fingerprint(fn_specs: Iterable[function.FunctionSpec]) -> str:
+    """Returns: a digest of the indexed text of fn_specs, e.g. to check that a
+    persisted index matches a catalog."""
+    hasher = hashlib.sha256(str(FORMAT_VERSION).encode())
+    for text in sorted(document(spec) for spec in fn_specs):
+        hasher.update(text.encode())
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+class EmbeddingBackend(abc.ABC):
+    """Embeds texts into vectors whose dot product measures their similarity."""
+
+    # Identifies the model; embeddings of different models are not comparable.
+    name: str
+
+    @abc.abstractmethod
+    def embed(self, texts: Sequence[str]) -> Any:
+        """Returns: a (len(texts), dimension) numpy array of normalized vectors."""
+        raise NotImplementedError()
+
+
+class SentenceTransformersBackend(EmbeddingBackend):
+    """Local embeddings with the optional sentence-transformers package."""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        self.name = f"sentence-transformers/{model_name}"
+        self.model_name = model_name
+        self._model = None
+
+    def embed(self, texts: Sequence[str]) -> Any:
+        if self._model is None:
+            try:
+                import sentence_transformers
+            except ImportError as e:
+                raise RuntimeError(
+                    "embedding retrieval requires sentence-transformers;"
+                    " pip install sentence-transformers"
+                ) from e
+            self._model = sentence_transformers.SentenceTransformer(self.model_name)
+        return self._model.encode(list(texts), normalize_embeddings=True)
+
+
+class ToolIndex:
+    """Retrieves the functions most relevant to a query, e.g. to select the tools
+    of a turn out of a catalog larger than the LLM supports.
+
+    Functions are ranked with BM25 over the tokens of their name, description and
+    parameters. With an embedding backend, the BM25 ranking is fused with that of
+    the cosine similarity of the embeddings (reciprocal rank fusion).
+
+    Build once per catalog with `build`, and persist with `save`/`load`.
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        postings: dict[str, list[tuple[int, int]]],
+        doc_lens: list[int],
+        fingerprint_: str,
+        embedding_backend: EmbeddingBackend | None = None,
+        embeddings: Any = None,
+    ):
+        self.names = names
+        self.postings = postings
+        self.doc_lens = doc_lens
+        self.fingerprint = fingerprint_
+        self.embedding_backend = embedding_backend
+        self.embeddings = embeddings
+        self._avg_doc_len = sum(doc_lens) / len(doc_lens) if doc_lens else 0.0
+        self._idfs = {
+            term: math.log(1 + (len(names) - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in postings.items()
+        }
+        self._norms = [
+            _K1 * (1 - _B + _B * n / (self._avg_doc_len or 1)) for n in doc_lens
+        ]
+
+    @classmethod
+    def build(
+        cls,
+        fns: Iterable[function.Function],
+        embedding_backend: EmbeddingBackend | None = None,
+        fingerprint_: str | None = None,
+    ) -> ToolIndex:
+        """
+        Args:
+            fingerprint_: identifies the catalog of fns; defaults to `fingerprint`
+                of their specs.
+        """
+        specs = [fn.spec for fn in fns]
+        postings: dict[str, list[tuple[int, int]]] = collections.defaultdict(list)
+        doc_lens = []
+        for i, spec in enumerate(specs):
+            terms = _terms(spec)
+            doc_lens.append(len(terms))
+            for term, tf in collections.Counter(terms).items():
+                postings[term].append((i, tf))
+        embeddings = None
+        if embedding_backend:
+            embeddings = embedding_backend.embed([document(s) for s in specs])
+        return cls(
+            names=[spec.name for spec in specs],
+            postings=dict(postings),
+            doc_lens=doc_lens,
+            fingerprint_=fingerprint_ or fingerprint(specs),
+            embedding_backend=embedding_backend,
+            embeddings=embeddings,
+        )
+
+    def _bm25(
+        self, query: str, k: int, where: Callable[[str], bool] | None = None
+    ) -> list[int]:
+        scores: dict[int, float] = collections.defaultdict(float)
+        for term in set(tokenize(query)):
+            if (postings := self.postings.get(term)) is None:
+                continue
+            idf = self._idfs[term]
+            for i, tf in postings:
+                scores[i] += idf * tf * (_K1 + 1) / (tf + self._norms[i])
+        candidates = (
+            scores if where is None else (i for i in scores if where(self.names[i]))
+        )
+        return heapq.nlargest(k, candidates, key=scores.__getitem__)
+
+    def _nearest(
+        self, query: str, k: int, where: Callable[[str], bool] | None = None
+    ) -> list[int]:
+        (embedding,) = self.embedding_backend.embed([query])
+        similarities = self.embeddings @ embedding
+        ranking = similarities.argsort()[::-1].tolist()
+        if where is not None:
+            ranking = (i for i in ranking if where(self.names[i]))
+        return list(itertools.islice(ranking, k))
+
+    def search(
+        self,
+        query: str,
+        k: int = _DEFAULT_K,
+        where: Callable[[str], bool] | None = None,
+    ) -> list[str]:
+        """Returns: the names of the (at most) k functions most relevant to query,
+        most relevant first.
+
+        Args:
+            where: keeps only the functions whose name it accepts, e.g. those of a
+                registry; applied before ranking, so that k functions are returned
+                if at least k are accepted and match the query.
+        """
+        if self.embedding_backend is None or self.embeddings is None:
+            return [self.names[i] for i in self._bm25(query, k, where)]
+
+        # NOTE: fuse deeper rankings than k, so that functions ranked well by both
+        # rankers but beyond k by either can still make it.
+        depth = max(4 * k, 50)
+        scores: dict[int, float] = collections.defaultdict(float)
+        for ranking in (
+            self._bm25(query, depth, where),
+            self._nearest(query, depth, where),
+        ):
+            for rank, i in enumerate(ranking):
+                scores[i] += 1 / (_RRF_K + rank)
+        return [
+            self.names[i] for i in heapq.nlargest(k, scores, key=scores.__getitem__)
+        ]
+
+    def save(self, path: str) -> None:
+        """Writes the index to path, replacing it atomically."""
+        state = dict(
+            format_version=FORMAT_VERSION,
+            names=self.names,
+            postings=self.postings,
+            doc_lens=self.doc_lens,
+            fingerprint=self.fingerprint,
+            embedding_model=(
+                self.embedding_backend.name if self.embedding_backend else None
+            ),
+            embeddings=self.embeddings,
+        )
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(
+        cls, path: str, embedding_backend: EmbeddingBackend | None = None
+    ) -> ToolIndex:
+        """Returns: the index saved at path.
+
+        Args:
+            embedding_backend: embeds the queries; must be the backend the index
+                was built with, if any.
+        """
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state["format_version"] != FORMAT_VERSION:
+            raise RuntimeError(
+                f"tool index {path} has format version {state['format_version']},"
+                f" expected {FORMAT_VERSION}; please rebuild it"
+            )
+        if embedding_backend and embedding_backend.name != state["embedding_model"]:
+            raise RuntimeError(
+                f"tool index {path} was built with embeddings"
+                f" {state['embedding_model']}, not {embedding_backend.name}"
+            )
+        return cls(
+            names=state["names"],
+            postings=state["postings"],
+            doc_lens=state["doc_lens"],
+            fingerprint_=state["fingerprint"],
+            embedding_backend=embedding_backend,
+            embeddings=state["embeddings"],
+        )
+
+
+def load_or_build(
+    path: str,
+    fingerprint_: str,
+    load_fns: Callable[[], Iterable[function.Function]],
+    embedding_backend: EmbeddingBackend | None = None,
+) -> ToolIndex:
+    """Returns: the index saved at path if it has fingerprint_, or a new index of
+    the functions returned by load_fns, saved to path.
+
+    Args:
+        fingerprint_: identifies the catalog, e.g. `fingerprint` of its specs or a
+            digest of its file; load_fns is only called when it changes.
+    """
+    if os.path.exists(path):
+        try:
+            index = ToolIndex.load(path, embedding_backend)
+        except RuntimeError:
+            pass
+        else:
+            if index.fingerprint == fingerprint_:
+                return index
+    index = ToolIndex.build(load_fns(), embedding_backend, fingerprint_=fingerprint_)
+    index.save(path)
+    return index
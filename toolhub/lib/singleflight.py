@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import dataclasses
+import threading
+import weakref
+from typing import Any, Callable, Iterable
+
+from toolhub.lib import auth
+from toolhub.lib import cache
+from toolhub.lib import deadline
+from toolhub.lib import function
+
+_DEFAULT_COALESCABLE_METHODS = ("GET", "HEAD")
+
+
+@dataclasses.dataclass
+class SingleFlightStats:
+    # Calls that ran the function.
+    leaders: int = 0
+    # Calls that waited for an identical in-flight call instead.
+    coalesced: int = 0
+    # Calls that were not eligible for coalescing, e.g. non-GET methods.
+    bypasses: int = 0
+    # Leading calls that ran out of time or were cancelled; their followers ran
+    # the call again.
+    abandoned: int = 0
+
+
+class _Abandoned(Exception):
+    """The leader of a flight ran out of time or was cancelled."""
+
+
+def _abandon(flight: concurrent.futures.Future | asyncio.Future) -> None:
+    flight.set_exception(_Abandoned())
+    # Mark the exception as retrieved, in case there is no follower.
+    flight.exception()
+
+
+class SingleFlight:
+    """Coalesces identical in-flight tool calls.
+
+    While a call is running, identical calls (same function, canonicalized
+    arguments and auth fingerprint, as for `cache.ResponseCache`) wait for it and
+    share its result or exception instead of calling the function again. Nothing
+    is retained once the call completes; combine with a response cache to reuse
+    results.
+
+    Followers wait within their own deadline. If the leading call runs out of time
+    (of its caller's deadline) or is cancelled, its followers don't share that
+    fate: the call runs again, led by one of them.
+
+    Only calls of functions whose HTTP method is in coalescable_methods are
+    coalesced. Threads and each event loop coalesce separately.
+    """
+
+    def __init__(
+        self,
+        coalescable_methods: Iterable[str] = _DEFAULT_COALESCABLE_METHODS,
+        auth_fingerprint: Callable[
+            [auth.AuthContext], str
+        ] = cache.default_auth_fingerprint,
+    ):
+        self.coalescable_methods = {m.upper() for m in coalescable_methods}
+        self.auth_fingerprint = auth_fingerprint
+        self.stats = SingleFlightStats()
+        self._lock = threading.Lock()
+        self._flights: dict[str, concurrent.futures.Future] = {}
+        self._loop_flights: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, asyncio.Future]
+        ] = weakref.WeakKeyDictionary()
+
+    def _key(
+        self,
+        fn: function.Function,
+        auth_ctx: auth.AuthContext,
+        params: dict[str, Any],
+    ) -> str | None:
+        if function.http_method(fn) not in self.coalescable_methods:
+            return None
+        return cache.call_key(fn, auth_ctx, params, self.auth_fingerprint)
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
+
+    def call(
+        self,
+        invoke: function.Invoke,
+        fn: function.Function,
+        auth_ctx: auth.AuthContext,
+        params: dict[str, Any],
+    ) -> Any:
+        """Returns: the result of the identical in-flight call, or that of invoke."""
+        if (key := self._key(fn, auth_ctx, params)) is None:
+            self._count("bypasses")
+            return invoke(fn, auth_ctx, params)
+
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = concurrent.futures.Future()
+                    self.stats.leaders += 1
+                else:
+                    self.stats.coalesced += 1
+            if leader:
+                break
+            try:
+                return flight.result(timeout=deadline.remaining_s())
+            except _Abandoned:
+                continue
+
+        try:
+            result = invoke(fn, auth_ctx, params)
+        except BaseException as e:
+            # NOTE: land the flight first, so that its followers don't find it
+            # again when it is abandoned.
+            self._land(key)
+            if deadline.expired():
+                self._count("abandoned")
+                _abandon(flight)
+            else:
+                flight.set_exception(e)
+            raise
+        self._land(key)
+        flight.set_result(result)
+        return result
+
+    def _land(self, key: str) -> None:
+        with self._lock:
+            del self._flights[key]
+
+    async def acall(
+        self,
+        ainvoke: function.AInvoke,
+        fn: function.Function,
+        auth_ctx: auth.AuthContext,
+        params: dict[str, Any],
+    ) -> Any:
+        """Async counterpart of `call`."""
+        if (key := self._key(fn, auth_ctx, params)) is None:
+            self._count("bypasses")
+            return await ainvoke(fn, auth_ctx, params)
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            flights = self._loop_flights.setdefault(loop, {})
+        while (flight := flights.get(key)) is not None:
+            self._count("coalesced")
+            try:
+                # NOTE: a cancelled follower must not cancel the leader's call.
+                return await asyncio.wait_for(
+                    asyncio.shield(flight), deadline.remaining_s()
+                )
+            except _Abandoned:
+                continue
+
+        self._count("leaders")
+        flight = flights[key] = loop.create_future()
+        try:
+            result = await ainvoke(fn, auth_ctx, params)
+        except asyncio.CancelledError:
+            # NOTE: e.g. the leader's deadline; its followers run the call again.
+            self._count("abandoned")
+            _abandon(flight)
+            raise
+        except BaseException as e:
+            if deadline.expired():
+                self._count("abandoned")
+                _abandon(flight)
+                raise
+            flight.set_exception(e)
+            # Mark the exception as retrieved, in case there is no follower.
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            del flights[key]
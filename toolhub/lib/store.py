@@ -0,0 +1,43 @@
+# Process-wide store of the data that providers load, e.g. parsed catalogs, so
+# that each is loaded once however many providers and registries use it. Entries
+# are loaded on first use, or before forking worker processes (see the providers'
+# preload), in which case the children share them copy-on-write. Entries are
+# shared across threads: they must be immutable, or synchronize themselves.
+import os
+import threading
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_key_locks: dict[str, threading.Lock] = {}
+_entries: dict[str, Any] = {}
+
+
+def get(key: str, load: Callable[[], T]) -> T:
+    """Returns: the entry of key, loaded with load on first use."""
+    if key in _entries:
+        return _entries[key]
+    # NOTE: load each key once, without blocking the loads of other keys.
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        if key not in _entries:
+            _entries[key] = load()
+        return _entries[key]
+
+
+def clear() -> None:
+    """Drops all entries, e.g. to reload changed catalogs."""
+    with _lock:
+        _entries.clear()
+
+
+def _reset_after_fork() -> None:
+    # NOTE: locks may have been held by other threads of the parent.
+    global _lock, _key_locks
+    _lock = threading.Lock()
+    _key_locks = {}
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
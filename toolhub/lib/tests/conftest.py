@@ -0,0 +1,21 @@
+import pytest
+
+from toolhub.integrations.openapi import function as openapi_function
+from toolhub.lib import function
+
+
+@pytest.fixture
+def get_fn() -> function.Function:
+    """A GET function of an OpenAPI API: idempotent, cacheable, and with the
+    upstream "api"."""
+    return function.Function(
+        spec=openapi_function.OpenAPIFunctionSpec(
+            parameters=[],
+            return_=function.ReturnSpec(type_=dict, description=None),
+            description=None,
+            api="api",
+            endpoint="/items",
+            method="get",
+        ),
+        callable_=lambda _auth_ctx: lambda: None,
+    )
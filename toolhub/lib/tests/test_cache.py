@@ -0,0 +1,100 @@
+import asyncio
+import pickle
+import sqlite3
+import threading
+
+import pytest
+
+from toolhub.lib import auth
+from toolhub.lib import cache
+
+_AUTH_CTX = auth.StandardAuthContext()
+
+
+@pytest.fixture(params=["memory", "disk"])
+def backend(request, tmp_path) -> cache.CacheBackend:
+    if request.param == "memory":
+        return cache.MemoryBackend()
+    return cache.DiskBackend(str(tmp_path / "cache.sqlite"))
+
+
+def test_hits_are_copies(backend: cache.CacheBackend, get_fn):
+    response_cache = cache.ResponseCache(backend)
+    invoke = lambda *_args: {"items": [1, 2]}  # noqa: E731
+    response_cache.call(invoke, get_fn, _AUTH_CTX, {}).clear()
+    result = response_cache.call(invoke, get_fn, _AUTH_CTX, {})
+    assert result == {"items": [1, 2]}
+    result["items"].append(3)
+    assert response_cache.call(invoke, get_fn, _AUTH_CTX, {}) == {"items": [1, 2]}
+    assert response_cache.stats.hits == 2
+
+
+def test_results_that_arent_json_are_not_cached(backend: cache.CacheBackend, get_fn):
+    response_cache = cache.ResponseCache(backend)
+    results = iter([object(), "second"])
+    invoke = lambda *_args: next(results)  # noqa: E731
+    response_cache.call(invoke, get_fn, _AUTH_CTX, {})
+    assert response_cache.call(invoke, get_fn, _AUTH_CTX, {}) == "second"
+    assert response_cache.stats.hits == 0
+
+
+def test_disk_backend_stores_json(tmp_path, get_fn):
+    path = str(tmp_path / "cache.sqlite")
+    response_cache = cache.ResponseCache(cache.DiskBackend(path))
+    response_cache.call(lambda *_args: {"id": 1}, get_fn, _AUTH_CTX, {})
+    (value,) = sqlite3.connect(path).execute("SELECT value FROM entries").fetchone()
+    assert value == '{"id":1}'
+
+
+def test_pickled_entries_are_misses(tmp_path, get_fn):
+    path = str(tmp_path / "cache.sqlite")
+    backend = cache.DiskBackend(path)
+    response_cache = cache.ResponseCache(backend)
+    key = response_cache.key(get_fn, _AUTH_CTX, {})
+    with backend._connection:
+        backend._connection.execute(
+            "INSERT INTO entries (key, expires_at, value) VALUES (?, ?, ?)",
+            (key, 2**40, pickle.dumps({"id": 0})),
+        )
+    assert response_cache.call(lambda *_args: {"id": 1}, get_fn, _AUTH_CTX, {}) == {
+        "id": 1
+    }
+    assert response_cache.call(lambda *_args: {"id": 2}, get_fn, _AUTH_CTX, {}) == {
+        "id": 1
+    }
+
+
+class _ThreadRecordingBackend(cache.MemoryBackend):
+    def __init__(self, blocking: bool):
+        super().__init__()
+        self.blocking = blocking
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, value, ttl_s):
+        self.threads.add(threading.get_ident())
+        super().set(key, value, ttl_s)
+
+
+@pytest.mark.parametrize("blocking", [True, False])
+def test_acall_keeps_blocking_backends_off_the_loop(blocking: bool, get_fn):
+    backend = _ThreadRecordingBackend(blocking)
+    response_cache = cache.ResponseCache(backend)
+
+    async def ainvoke(*_args):
+        return {"items": [1]}
+
+    async def main():
+        for _ in range(2):
+            assert await response_cache.acall(ainvoke, get_fn, _AUTH_CTX, {}) == {
+                "items": [1]
+            }
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert response_cache.stats.hits == 1
+    assert (loop_thread in backend.threads) is not blocking
+    assert cache.DiskBackend.blocking and not cache.MemoryBackend.blocking
@@ -0,0 +1,51 @@
+import time
+
+import httpx
+import pytest
+
+from toolhub.lib import auth
+from toolhub.lib import circuit_breaker
+from toolhub.lib import deadline
+from toolhub.lib import function
+
+_AUTH_CTX = auth.StandardAuthContext()
+
+
+def _timing_out(*_args) -> None:
+    # NOTE: as the HTTP layer does: its timeout is capped by the deadline.
+    time.sleep(deadline.timeout_s(0.02))
+    raise httpx.ReadTimeout("timed out")
+
+
+def _call(
+    breaker: circuit_breaker.CircuitBreaker,
+    fn: function.Function,
+    invoke,
+    deadline_s=None,
+) -> None:
+    with deadline.scope(deadline_s):
+        with pytest.raises(Exception):
+            breaker.call(invoke, fn, _AUTH_CTX, {})
+
+
+def test_callers_deadlines_dont_open_the_circuit(get_fn):
+    breaker = circuit_breaker.CircuitBreaker(min_calls=2)
+    for _ in range(3):
+        _call(breaker, get_fn, _timing_out, deadline_s=0.01)
+
+    def out_of_time(*_args) -> None:
+        raise deadline.DeadlineExceeded("call ran out of time")
+
+    _call(breaker, get_fn, out_of_time)
+    assert breaker.metrics()["api"] == dict(
+        state="closed", calls=0, failures=0, rejected=0, trips=0
+    )
+
+
+def test_upstream_timeouts_open_the_circuit(get_fn):
+    breaker = circuit_breaker.CircuitBreaker(min_calls=2)
+    for _ in range(2):
+        _call(breaker, get_fn, _timing_out, deadline_s=5)
+    with pytest.raises(circuit_breaker.CircuitOpen):
+        breaker.call(_timing_out, get_fn, _AUTH_CTX, {})
+    assert breaker.metrics()["api"]["trips"] == 1
@@ -0,0 +1,253 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable
+
+from toolhub.lib import auth
+from toolhub.lib import deadline
+from toolhub.lib import function
+from toolhub.lib import hub
+from toolhub.lib import provider
+from toolhub.lib import registry
+from toolhub.lib import retrieval
+
+_AUTH_CTX = auth.StandardAuthContext()
+
+
+class _Hub(hub.Hub[auth.AuthContext, list[str], Callable[[], Any], Any]):
+    """Hub whose tool calls are callables, and tools specs function names."""
+
+    def _build_tools_spec(self, fns=None) -> list[str]:
+        return [fn.spec.name for fn in (self.registry_.list_() if fns is None else fns)]
+
+    def _call_tool(
+        self, auth_ctx: auth.AuthContext, call: Callable[[], Any], params=None
+    ) -> Any:
+        return call()
+
+    async def _acall_tool(
+        self, auth_ctx: auth.AuthContext, call: Callable[[], Any], params=None
+    ) -> Any:
+        return call()
+
+
+class _InvokingHub(_Hub):
+    """Hub whose tool calls are function names, run through its execution layers."""
+
+    def _call_tool(self, auth_ctx: auth.AuthContext, call: str, params=None) -> Any:
+        return self._invoke(self.registry_.get(call), auth_ctx, params or {})
+
+    async def _acall_tool(
+        self, auth_ctx: auth.AuthContext, call: str, params=None
+    ) -> Any:
+        return await self._ainvoke(self.registry_.get(call), auth_ctx, params or {})
+
+
+class _Provider(provider.Provider):
+    def __init__(
+        self,
+        fns: list[function.Function],
+        collections: list[function.FunctionCollection] = (),
+    ):
+        self.fns = fns
+        self.collections_ = list(collections)
+
+    def functions(self) -> list[function.Function]:
+        return self.fns
+
+    def collections(self) -> list[function.FunctionCollection]:
+        return self.collections_
+
+
+def _fn(name: str, description: str) -> function.Function:
+    return function.Function(
+        spec=function.FunctionSpec(
+            name=name,
+            parameters=[],
+            return_=function.ReturnSpec(type_=str, description=None),
+            description=description,
+        ),
+        callable_=auth.no_auth(lambda: name),
+    )
+
+
+def _sleepy_fn(name: str, sleep_s: float) -> function.Function:
+    def sleepy() -> str:
+        time.sleep(sleep_s)
+        return name
+
+    async def asleepy() -> str:
+        await asyncio.sleep(sleep_s)
+        return name
+
+    return function.Function(
+        spec=function.FunctionSpec(
+            name=name,
+            parameters=[],
+            return_=function.ReturnSpec(type_=str, description=None),
+            description=None,
+        ),
+        callable_=auth.no_auth(sleepy),
+        acallable_=auth.no_auth(asleepy),
+    )
+
+
+def _is_deadline_error(output: Any) -> bool:
+    return isinstance(output, hub.ToolCallErrors) and isinstance(
+        output.errors[0], deadline.DeadlineExceeded
+    )
+
+
+def _call_threads() -> list[threading.Thread]:
+    return [t for t in threading.enumerate() if t.name.startswith("toolhub-call")]
+
+
+def test_call_tools_runs_calls_in_order_without_concurrency():
+    hub_ = _Hub(registry.Registry([]), max_concurrency=1)
+    order = []
+    outputs = hub_.call_tools(
+        _AUTH_CTX, [lambda i=i: order.append(i) or i for i in range(5)]
+    )
+    assert outputs == list(range(5))
+    assert order == list(range(5))
+    assert not _call_threads()
+
+
+def test_call_tools_bounds_threads_across_calls():
+    def slow() -> str:
+        time.sleep(0.3)
+        return "slow"
+
+    with _Hub(registry.Registry([]), max_concurrency=2) as hub_:
+        for _ in range(3):
+            outputs = hub_.call_tools(_AUTH_CTX, [slow, slow, lambda: "fast"], 0.05)
+            assert all(
+                isinstance(o, hub.ToolCallErrors)
+                and isinstance(o.errors[0], deadline.DeadlineExceeded)
+                for o in outputs[:2]
+            )
+            assert len(_call_threads()) <= 2
+    assert not _call_threads()
+
+
+def test_relevant_tools_spec_ranks_the_registry_only():
+    catalog = [_fn(f"weather_{i}", "Current weather forecast") for i in range(50)]
+    catalog += [_fn(f"stock_{i}", "Stock price quote, not weather") for i in range(5)]
+    hub_ = _Hub(
+        registry.Registry([_Provider(catalog[-5:])]),
+        tool_index=retrieval.ToolIndex.build(catalog),
+    )
+    assert hub_.relevant_tools_spec("weather forecast", k=3) == [
+        "stock_0",
+        "stock_1",
+        "stock_2",
+    ]
+
+
+def test_tools_spec_is_memoized_per_registry_version():
+    registry_ = registry.Registry([_Provider([_fn("a", "A"), _fn("b", "B")])])
+    hub_ = _Hub(registry_)
+    tools_spec = hub_.tools_spec()
+    assert tools_spec == ["a", "b"]
+    assert hub_.tools_spec() is tools_spec
+    assert hub_.tools_spec_json() == b'["a","b"]'
+
+    registry_.register(_fn("c", "C"))
+    assert hub_.tools_spec() == ["a", "b", "c"]
+    assert hub_.tools_spec_json() == b'["a","b","c"]'
+    registry_.unregister("a")
+    assert hub_.tools_spec() == ["b", "c"]
+    assert hub_.tools_spec_json() == b'["b","c"]'
+
+
+def test_tools_spec_follows_a_swapped_registry():
+    registry_ = registry.Registry([_Provider([_fn("a", "Alpha"), _fn("b", "Beta")])])
+    hub_ = _Hub(registry_)
+    assert hub_.tools_spec() == ["a", "b"]
+    assert sorted(hub_.relevant_tools_spec("alpha beta")) == ["a", "b"]
+
+    # NOTE: e.g. a per-request view, or a new registry.
+    hub_.registry_ = registry_.view(names=["a"])
+    assert hub_.tools_spec() == ["a"]
+    assert hub_.tools_spec_json() == b'["a"]'
+    assert hub_.relevant_tools_spec("alpha beta") == ["a"]
+
+    hub_.registry_ = registry.Registry([_Provider([_fn("c", "Gamma")])])
+    assert hub_.tools_spec() == ["c"]
+    assert hub_.relevant_tools_spec("alpha beta gamma") == ["c"]
+
+
+def _sleepy_hub(**kwargs) -> _InvokingHub:
+    return _InvokingHub(
+        registry.Registry(
+            [_Provider([_sleepy_fn("fast", 0), _sleepy_fn("slow", 0.5)])]
+        ),
+        **kwargs,
+    )
+
+
+def test_call_tools_returns_late_calls_as_deadline_errors():
+    with _sleepy_hub() as hub_:
+        start = time.monotonic()
+        outputs = hub_.call_tools(_AUTH_CTX, ["fast", "slow", "fast"], deadline_s=0.2)
+        assert time.monotonic() - start < 0.4
+    assert outputs[0] == outputs[2] == "fast"
+    assert _is_deadline_error(outputs[1])
+
+
+def test_acall_tools_returns_late_calls_as_deadline_errors():
+    async def main():
+        start = time.monotonic()
+        outputs = await _sleepy_hub().acall_tools(
+            _AUTH_CTX, ["slow", "fast"], deadline_s=0.2
+        )
+        return outputs, time.monotonic() - start
+
+    outputs, elapsed_s = asyncio.run(main())
+    assert elapsed_s < 0.4
+    assert _is_deadline_error(outputs[0])
+    assert outputs[1] == "fast"
+
+
+def test_timeouts_precedence():
+    fn = _sleepy_fn("fn", 0)
+    timeouts = deadline.Timeouts(
+        default_s=3.0,
+        collection_timeouts_s={"short": 1.0, "long": 2.0},
+        function_timeouts_s={"fn": 5.0},
+    )
+    assert timeouts.timeout_s(fn, ["short", "long"]) == 5.0
+    assert timeouts.timeout_s(_sleepy_fn("other", 0), ["long", "short"]) == 1.0
+    assert timeouts.timeout_s(_sleepy_fn("other", 0), ["long", "unset"]) == 2.0
+    assert timeouts.timeout_s(_sleepy_fn("other", 0), ["unset"]) == 3.0
+    assert deadline.Timeouts().timeout_s(fn, ["short"]) is None
+
+
+def test_hub_applies_function_and_collection_timeouts():
+    fns = [_sleepy_fn(name, 0.3) for name in ("by_function", "by_collection", "other")]
+    collections = [
+        function.FunctionCollection(
+            name="col",
+            description=None,
+            function_names={"by_function", "by_collection"},
+        )
+    ]
+    hub_ = _InvokingHub(
+        registry.Registry([_Provider(fns, collections)]),
+        timeouts=deadline.Timeouts(
+            default_s=0.1,
+            collection_timeouts_s={"col": 0.1},
+            function_timeouts_s={"by_function": 1.0, "other": 1.0},
+        ),
+    )
+
+    names = ["by_function", "by_collection", "other"]
+
+    async def main():
+        return await hub_.acall_tools(_AUTH_CTX, names)
+
+    with hub_:
+        for outputs in (asyncio.run(main()), hub_.call_tools(_AUTH_CTX, names)):
+            assert outputs[0] == "by_function"
+            assert _is_deadline_error(outputs[1])
+            assert outputs[2] == "other"
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from toolhub.lib import projection
+
+
+def _result(n_items: int) -> dict:
+    return {
+        "count": n_items,
+        "_cursor": "opaque",
+        "links": {"next": "https://example.com/page/2"},
+        "empty": [],
+        "entities": [
+            {
+                "id": i,
+                "name": f"Entity {i}",
+                "description": "word " * 300,
+                "properties": {f"p{j}": {"value": j, "unit": None} for j in range(60)},
+                "nested": {"a": {"b": {"c": {"d": {"e": {"f": "deep"}}}}}},
+            }
+            for i in range(n_items)
+        ],
+    }
+
+
+def test_small_results_are_kept_whole():
+    result = {"id": 1, "name": "Entity 1", "tags": ["a", "b"]}
+    output = projection.Projector().render(result)
+    assert json.loads(output) == result
+
+
+@pytest.mark.parametrize("max_tokens", [32, 64, 256, 1024, 4096])
+@pytest.mark.parametrize("n_items", [1, 10, 200])
+def test_renders_valid_json_within_budget(max_tokens, n_items):
+    projector = projection.Projector(max_tokens=max_tokens)
+    output = projector.render(_result(n_items), "fn")
+    assert projection.estimate_tokens(output) <= max_tokens
+    assert isinstance(json.loads(output), (dict, list))
+
+
+def test_respects_count_tokens():
+    def count_words(text: str) -> int:
+        return len(text.split())
+
+    projector = projection.Projector(max_tokens=50, count_tokens=count_words)
+    output = projector.render(_result(5))
+    assert count_words(output) <= 50
+    json.loads(output)
+
+
+def test_drops_private_links_and_empty_keys():
+    projected = projection.project(_result(1), projection.Rule())
+    assert set(projected) == {"count", "entities"}
+    (entity,) = projected["entities"]
+    assert entity["description"].endswith("...")
+    assert len(entity["description"]) == 203
+    assert list(entity["properties"])[-1] == "..."
+    assert len(entity["properties"]) == 41
+    assert entity["properties"]["p0"] == {"value": 0}
+
+
+def test_summarizes_long_arrays_and_deep_containers():
+    projected = projection.project(_result(8), projection.Rule(max_depth=4))
+    assert len(projected["entities"]) == 6
+    assert projected["entities"][-1] == "... 3 more items"
+    assert projected["entities"][0]["nested"] == {"a": "{1 keys}"}
+
+
+def test_function_rules_and_keep_keys():
+    projector = projection.Projector(
+        function_rules={"counter": projection.Rule(keep_keys=("count",))}
+    )
+    assert json.loads(projector.render(_result(3), "counter")) == {"count": 3}
+    assert "entities" in json.loads(projector.render(_result(3), "other"))
+
+
+def test_does_not_modify_the_result():
+    result = _result(10)
+    expected = json.dumps(result)
+    projection.Projector(max_tokens=32).render(result)
+    assert json.dumps(result) == expected
+
+
+def test_other_results_are_cut_with_a_note():
+    output = projection.Projector(max_tokens=16).render("x" * 1000)
+    assert output == "x" * 64 + "... 936 characters omitted"
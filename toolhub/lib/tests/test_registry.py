@@ -0,0 +1,118 @@
+import pytest
+
+from toolhub.lib import auth
+from toolhub.lib import function
+from toolhub.lib import provider
+from toolhub.lib import registry
+
+
+class _Provider(provider.Provider):
+    def __init__(self, fns, collections):
+        self.fns = fns
+        self.collections_ = collections
+
+    def functions(self) -> list[function.Function]:
+        return self.fns
+
+    def collections(self) -> list[function.FunctionCollection]:
+        return self.collections_
+
+
+def _fn(name: str) -> function.Function:
+    return function.Function(
+        spec=function.FunctionSpec(
+            name=name,
+            parameters=[],
+            return_=function.ReturnSpec(type_=str, description=None),
+            description=None,
+        ),
+        callable_=auth.no_auth(lambda: name),
+    )
+
+
+def _collection(name: str, *function_names: str) -> function.FunctionCollection:
+    return function.FunctionCollection(
+        name=name, description=None, function_names=set(function_names)
+    )
+
+
+def _registry(**kwargs) -> registry.Registry:
+    return registry.Registry(
+        [
+            _Provider(
+                [_fn("a"), _fn("b"), _fn("c"), _fn("d")],
+                [_collection("ab", "a", "b", "missing"), _collection("bd", "d", "b")],
+            )
+        ],
+        **kwargs,
+    )
+
+
+def _names(registry_: registry.Registry) -> list[str]:
+    return [fn.spec.name for fn in registry_.list_()]
+
+
+def test_filter_collections_keeps_provider_order():
+    assert _names(_registry(filter_collections=["bd"])) == ["b", "d"]
+    assert _names(_registry(filter_collections="ab")) == ["a", "b"]
+
+
+def test_collections_of():
+    registry_ = _registry()
+    assert sorted(registry_.collections_of("b")) == ["ab", "bd"]
+    assert registry_.collections_of("c") == []
+    assert registry_.collections_of("missing") == []
+
+
+def test_register_and_unregister_bump_version():
+    registry_ = _registry()
+    version = registry_.version
+    registry_.register(_fn("e"))
+    assert registry_.version > version
+    assert _names(registry_) == ["a", "b", "c", "d", "e"]
+    version = registry_.version
+    registry_.unregister("a")
+    assert registry_.version > version
+    assert "a" not in registry_
+    with pytest.raises(KeyError):
+        registry_.get("a")
+
+
+def test_views_select_in_order_and_share_indexes():
+    registry_ = _registry()
+    view = registry_.view(collections=["bd"], names=["c", "missing"])
+    assert _names(view) == ["b", "c", "d"]
+    assert sorted(view.collections_of("b")) == ["ab", "bd"]
+    assert _names(registry_.view()) == _names(registry_)
+    assert _names(view.view(names=["d", "a"])) == ["d"]
+
+
+def test_views_have_unique_versions():
+    registry_ = _registry()
+    other = _registry()
+    views = [
+        registry_.view(),
+        registry_.view(names=["a"]),
+        registry_.view(),
+        other.view(),
+    ]
+    versions = [registry_.version, other.version] + [v.version for v in views]
+    assert len(set(versions)) == len(versions)
+    version = views[0].version
+    registry_.register(_fn("e"))
+    assert views[0].version == version
+    assert registry_.version not in versions
+
+
+def test_views_are_immutable_snapshots():
+    registry_ = _registry()
+    view = registry_.view()
+    with pytest.raises(RuntimeError):
+        view.register(_fn("e"))
+    with pytest.raises(RuntimeError):
+        view.unregister("a")
+    registry_.register(_fn("e"))
+    registry_.unregister("a")
+    assert _names(view) == ["a", "b", "c", "d"]
+    # NOTE: functions registered after the view keep their position in new views.
+    assert _names(registry_.view(names=["e", "b"])) == ["b", "e"]
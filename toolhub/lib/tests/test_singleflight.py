@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from toolhub.lib import auth
+from toolhub.lib import deadline
+from toolhub.lib import singleflight
+
+_AUTH_CTX = auth.StandardAuthContext()
+
+
+def test_acall_cancelled_leader_doesnt_fail_live_follower(get_fn):
+    single_flight = singleflight.SingleFlight()
+    n_calls = 0
+
+    async def ainvoke(*_args) -> str:
+        nonlocal n_calls
+        n_calls += 1
+        await asyncio.sleep(0.2)
+        return "result"
+
+    async def leader() -> str:
+        with deadline.scope(0.05):
+            # NOTE: as the hub does; cancels the leader at its deadline.
+            return await asyncio.wait_for(
+                single_flight.acall(ainvoke, get_fn, _AUTH_CTX, {}),
+                deadline.remaining_s(),
+            )
+
+    async def follower() -> str:
+        await asyncio.sleep(0.01)
+        with deadline.scope(5):
+            return await single_flight.acall(ainvoke, get_fn, _AUTH_CTX, {})
+
+    async def main() -> list:
+        return await asyncio.gather(leader(), follower(), return_exceptions=True)
+
+    leader_result, follower_result = asyncio.run(main())
+    assert isinstance(leader_result, asyncio.TimeoutError)
+    assert follower_result == "result"
+    assert n_calls == 2
+    assert single_flight.stats.abandoned == 1
+
+
+def test_acall_follower_waits_within_its_own_deadline(get_fn):
+    single_flight = singleflight.SingleFlight()
+
+    async def ainvoke(*_args) -> str:
+        await asyncio.sleep(0.2)
+        return "result"
+
+    async def follower() -> str:
+        await asyncio.sleep(0.01)
+        with deadline.scope(0.05):
+            return await single_flight.acall(ainvoke, get_fn, _AUTH_CTX, {})
+
+    async def main() -> list:
+        return await asyncio.gather(
+            single_flight.acall(ainvoke, get_fn, _AUTH_CTX, {}),
+            follower(),
+            return_exceptions=True,
+        )
+
+    leader_result, follower_result = asyncio.run(main())
+    assert leader_result == "result"
+    assert isinstance(follower_result, asyncio.TimeoutError)
+
+
+def test_call_leader_out_of_time_doesnt_fail_live_follower(get_fn):
+    single_flight = singleflight.SingleFlight()
+    leading = threading.Event()
+    n_calls = 0
+
+    def invoke(*_args) -> str:
+        nonlocal n_calls
+        n_calls += 1
+        leading.set()
+        time.sleep(0.2)
+        # NOTE: as the HTTP layer does, with timeouts capped by the deadline.
+        deadline.check()
+        return "result"
+
+    def leader() -> None:
+        with deadline.scope(0.05):
+            with pytest.raises(deadline.DeadlineExceeded):
+                single_flight.call(invoke, get_fn, _AUTH_CTX, {})
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    leading.wait()
+    with deadline.scope(5):
+        assert single_flight.call(invoke, get_fn, _AUTH_CTX, {}) == "result"
+    thread.join()
+    assert n_calls == 2
+    assert single_flight.stats.coalesced == 1
+    assert single_flight.stats.abandoned == 1
+
+
+def test_call_shares_leader_errors(get_fn):
+    single_flight = singleflight.SingleFlight()
+    leading = threading.Event()
+    n_calls = 0
+
+    def invoke(*_args) -> str:
+        nonlocal n_calls
+        n_calls += 1
+        leading.set()
+        time.sleep(0.1)
+        raise ValueError("upstream error")
+
+    def leader() -> None:
+        with pytest.raises(ValueError):
+            single_flight.call(invoke, get_fn, _AUTH_CTX, {})
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    leading.wait()
+    with pytest.raises(ValueError):
+        single_flight.call(invoke, get_fn, _AUTH_CTX, {})
+    thread.join()
+    assert n_calls == 1
@@ -0,0 +1,195 @@
+# Runs OpenAI assistant threads with the tools of a hub, on an event loop. Tool
+# calls start as soon as a run requires action, and runs are followed with the
+# streaming runs API when the installed openai package supports it, or else
+# polled at intervals that adapt to the run's progress. Many threads can run
+# concurrently on one loop, e.g. with asyncio.gather over `AssistantRunner.run`.
+import asyncio
+import inspect
+from typing import Any, Callable
+
+import openai
+from openai.types.beta.threads.required_action_function_tool_call import (
+    RequiredActionFunctionToolCall,
+)
+from openai.types.beta.threads.run import Run
+
+from toolhub.lib import auth
+from toolhub.lib import hub
+from toolhub.openai import openai_assistant_hub
+
+# NOTE: "incomplete" is missing from the Run.status of older openai packages.
+TERMINAL_RUN_STATUSES = frozenset(
+    {"cancelled", "failed", "completed", "expired", "incomplete"}
+)
+_REQUIRES_ACTION_RUN_STATUS = "requires_action"
+
+_DEFAULT_MAX_TOOL_ITERATIONS = 7
+_DEFAULT_MIN_POLL_S = 0.2
+_DEFAULT_MAX_POLL_S = 2.0
+# Growth of the polling interval while the run's status doesn't change.
+_POLL_BACKOFF = 1.5
+
+OnToolOutputs = Callable[
+    [list[RequiredActionFunctionToolCall], list[openai_assistant_hub.ToolOutput]],
+    None,
+]
+
+
+def _supports_streaming(client: openai.AsyncOpenAI) -> bool:
+    """Returns: whether the openai package supports the streaming runs API."""
+    return "stream" in inspect.signature(client.beta.threads.runs.create).parameters
+
+
+def _tool_output(
+    call: RequiredActionFunctionToolCall,
+    result: openai_assistant_hub.ToolOutput | hub.ToolCallErrors,
+) -> openai_assistant_hub.ToolOutput:
+    if isinstance(result, hub.ToolCallErrors):
+        errors_fmt = "\n".join(str(e) for e in result.errors)
+        return openai_assistant_hub.ToolOutput(
+            tool_call_id=call.id, output=f"Failure:\n{errors_fmt}"
+        )
+    return result
+
+
+class AssistantRunner:
+    """Runs assistant threads to completion, executing their tool calls with a hub.
+
+    The tool calls of a required action all start at once, through
+    `Hub.acall_tools`. Their outputs are submitted as soon as the last one is
+    ready, since the API takes the outputs of a required action in a single
+    submission.
+
+    Args:
+        max_tool_iterations: most required actions served per run; the run is
+            cancelled at the next one.
+        min_poll_s: polling interval after the run's status changes, when not
+            streaming.
+        max_poll_s: longest polling interval, reached while the status doesn't
+            change.
+        deadline_s: time budget of the tool calls of each required action, if any;
+            calls that run out of time report a failure to the assistant.
+        on_tool_outputs: called with the tool calls and outputs of each
+            submission, e.g. to log them.
+        stream: whether to use the streaming runs API; by default, if the openai
+            package supports it.
+    """
+
+    def __init__(
+        self,
+        hub_: openai_assistant_hub.OpenAIAssistantHub,
+        client: openai.AsyncOpenAI,
+        max_tool_iterations: int = _DEFAULT_MAX_TOOL_ITERATIONS,
+        min_poll_s: float = _DEFAULT_MIN_POLL_S,
+        max_poll_s: float = _DEFAULT_MAX_POLL_S,
+        deadline_s: float | None = None,
+        on_tool_outputs: OnToolOutputs | None = None,
+        stream: bool | None = None,
+    ):
+        assert 0 < min_poll_s <= max_poll_s, ValueError(
+            f"expected 0 < min_poll_s <= max_poll_s, got {min_poll_s}, {max_poll_s}"
+        )
+        self.hub = hub_
+        self.client = client
+        self.max_tool_iterations = max_tool_iterations
+        self.min_poll_s = min_poll_s
+        self.max_poll_s = max_poll_s
+        self.deadline_s = deadline_s
+        self.on_tool_outputs = on_tool_outputs
+        self.stream = _supports_streaming(client) if stream is None else stream
+
+    async def run(
+        self,
+        auth_ctx: auth.AuthContext,
+        thread_id: str,
+        assistant_id: str,
+        **run_params: Any,
+    ) -> Run:
+        """Returns: the run of the assistant on the thread, once it has ended.
+
+        Args:
+            run_params: further parameters of the run, e.g. instructions; tools
+                default to the hub's tools_spec().
+        """
+        run_params.setdefault("tools", self.hub.tools_spec())
+        runs = self.client.beta.threads.runs
+        if self.stream:
+            stream = await runs.create(
+                thread_id=thread_id,
+                assistant_id=assistant_id,
+                stream=True,
+                **run_params,
+            )
+            return await self._follow_stream(auth_ctx, thread_id, stream)
+        run = await runs.create(
+            thread_id=thread_id, assistant_id=assistant_id, **run_params
+        )
+        return await self._poll(auth_ctx, run, 0)
+
+    async def _tool_outputs(
+        self, auth_ctx: auth.AuthContext, run: Run
+    ) -> list[openai_assistant_hub.ToolOutput]:
+        calls = run.required_action.submit_tool_outputs.tool_calls
+        results = await self.hub.acall_tools(auth_ctx, calls, self.deadline_s)
+        tool_outputs = [_tool_output(c, r) for c, r in zip(calls, results)]
+        if self.on_tool_outputs:
+            self.on_tool_outputs(calls, tool_outputs)
+        return tool_outputs
+
+    async def _cancel(self, run: Run) -> Run:
+        # NOTE: the run stops at a required action; cancelling ends it.
+        return await self.client.beta.threads.runs.cancel(
+            run_id=run.id, thread_id=run.thread_id
+        )
+
+    async def _poll(self, auth_ctx: auth.AuthContext, run: Run, iterations: int) -> Run:
+        runs = self.client.beta.threads.runs
+        interval_s = self.min_poll_s
+        while run.status not in TERMINAL_RUN_STATUSES:
+            if run.status == _REQUIRES_ACTION_RUN_STATUS:
+                if iterations < self.max_tool_iterations:
+                    iterations += 1
+                    run = await runs.submit_tool_outputs(
+                        run_id=run.id,
+                        thread_id=run.thread_id,
+                        tool_outputs=await self._tool_outputs(auth_ctx, run),
+                    )
+                    interval_s = self.min_poll_s
+                    continue
+                run = await self._cancel(run)
+                if run.status != _REQUIRES_ACTION_RUN_STATUS:
+                    continue
+            await asyncio.sleep(interval_s)
+            status = run.status
+            run = await runs.retrieve(run_id=run.id, thread_id=run.thread_id)
+            interval_s = (
+                self.min_poll_s
+                if run.status != status
+                else min(self.max_poll_s, interval_s * _POLL_BACKOFF)
+            )
+        return run
+
+    async def _follow_stream(
+        self, auth_ctx: auth.AuthContext, thread_id: str, stream: Any
+    ) -> Run:
+        runs = self.client.beta.threads.runs
+        iterations = 0
+        while True:
+            run: Run | None = None
+            async for event in stream:
+                if getattr(event.data, "object", None) == "thread.run":
+                    run = event.data
+            if run is None:
+                raise RuntimeError(f"run stream of thread {thread_id} had no run")
+            if run.status != _REQUIRES_ACTION_RUN_STATUS:
+                # NOTE: e.g. a stream cut short; poll the run until it ends.
+                return await self._poll(auth_ctx, run, iterations)
+            if iterations == self.max_tool_iterations:
+                return await self._poll(auth_ctx, await self._cancel(run), iterations)
+            iterations += 1
+            stream = await runs.submit_tool_outputs(
+                run_id=run.id,
+                thread_id=run.thread_id,
+                tool_outputs=await self._tool_outputs(auth_ctx, run),
+                stream=True,
+            )
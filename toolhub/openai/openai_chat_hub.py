@@ -9,43 +9,23 @@ from openai.types.chat.chat_completion_tool_message_param import (
 )
 
 from toolhub.lib import hub
-from toolhub.openai import utils
+from toolhub.openai import openai_hub
 
 
 class OpenAIChatHub(
     Generic[hub.AuthContext],
-    hub.Hub[
+    openai_hub.OpenAIHub[
         hub.AuthContext,
         list[ChatCompletionToolParam],
         ChatCompletionMessageToolCallParam,
         ChatCompletionToolMessageParam,
     ],
 ):
-    def tools_spec(self) -> list[ChatCompletionToolParam]:
-        return [
-            dict(type="function", function=fn_def)
-            for fn_def in utils.fns_to_fn_defs(self.registry_.list_())
-        ]
-
-    def call_tools(
-        self,
-        auth_ctx: hub.AuthContext,
-        calls: list[ChatCompletionMessageToolCallParam],
-    ) -> list[ChatCompletionToolMessageParam | hub.ToolCallErrors]:
-        typed_results = []
-        for call in calls:
-            fn = self.registry_.get(call.function.name)
-            result = utils.call_fn_from_openai(auth_ctx, fn, call.function.arguments)
-            if isinstance(result, str):
-                typed_result = ChatCompletionToolMessageParam(
-                    role="tool",
-                    tool_call_id=call.id,
-                    content=result,
-                )
-            else:
-                assert isinstance(result, list)
-                for e in result:
-                    assert isinstance(e, Exception)
-                typed_result = hub.ToolCallErrors(result)
-            typed_results.append(typed_result)
-        return typed_results
+    def _tool_output(
+        self, call: ChatCompletionMessageToolCallParam, output: str
+    ) -> ChatCompletionToolMessageParam:
+        return ChatCompletionToolMessageParam(
+            role="tool",
+            tool_call_id=call.id,
+            content=output,
+        )
@@ -0,0 +1,150 @@
+import abc
+from typing import Any, Generic
+
+from toolhub.lib import function
+from toolhub.lib import hub
+from toolhub.openai import utils
+
+
+class OpenAIHub(
+    Generic[hub.AuthContext, hub.ToolsSpec, hub.ToolCall, hub.ToolOutput],
+    hub.Hub[hub.AuthContext, hub.ToolsSpec, hub.ToolCall, hub.ToolOutput],
+):
+    """Shared implementation of the hubs for the OpenAI APIs.
+
+    Subclasses only differ in the type of their tool calls' outputs.
+    """
+
+    _fn_def_cache: utils.FnDefCache | None = None
+    _decoders: dict[str, utils.ArgumentsDecoder] | None = None
+
+    def _build_tools_spec(
+        self, fns: list[function.Function] | None = None
+    ) -> hub.ToolsSpec:
+        if self._fn_def_cache is None:
+            self._fn_def_cache = utils.FnDefCache()
+        # NOTE: only the spec of the whole registry tells which definitions are
+        # stale; the spec of a subset keeps the others.
+        prune = fns is None
+        if fns is None:
+            fns = self.registry_.list_()
+        # NOTE: compile the argument decoders ahead of the calls.
+        for fn in fns:
+            self._decoder(fn)
+        fn_defs = self._fn_def_cache.fns_to_fn_defs(fns, prune=prune)
+        if self.max_tools_spec_tokens is not None:
+            fn_defs = self._fn_def_cache.compact(fn_defs, self.max_tools_spec_tokens)
+        return [dict(type="function", function=fn_def) for fn_def in fn_defs]
+
+    @abc.abstractmethod
+    def _tool_output(self, call: hub.ToolCall, output: str) -> hub.ToolOutput:
+        raise NotImplementedError()
+
+    def _decoder(self, fn: function.Function) -> utils.ArgumentsDecoder:
+        if self._decoders is None:
+            self._decoders = {}
+        decoder = self._decoders.get(fn.spec.name)
+        if decoder is None or decoder.fn_spec is not fn.spec:
+            decoder = self._decoders[fn.spec.name] = utils.ArgumentsDecoder(fn.spec)
+        return decoder
+
+    def _batches(self, calls: list[hub.ToolCall]) -> list[hub.Batch]:
+        batches = []
+        # Calls that can be served in bulk, with their typed parameters, per
+        # function name.
+        bulk_calls: dict[str, list[tuple[int, dict[str, Any]]]] = {}
+        for i, call in enumerate(calls):
+            name = call.function.name
+            fn = self.registry_.get(name) if name in self.registry_ else None
+            if fn is None or (bulk := function.bulk_counterpart(fn)) is None:
+                batches.append(hub.Batch([i]))
+                continue
+            try:
+                params, errors = self._decoder(fn)(call.function.arguments)
+            except Exception as e:
+                params, errors = {}, [e]
+            # NOTE: invalid calls report their errors as single calls.
+            if errors:
+                batches.append(hub.Batch([i]))
+            elif not bulk.accepts(params):
+                batches.append(hub.Batch([i], [params]))
+            else:
+                bulk_calls.setdefault(name, []).append((i, params))
+        for name, entries in bulk_calls.items():
+            max_calls = function.bulk_counterpart(self.registry_.get(name)).max_calls
+            for start in range(0, len(entries), max_calls):
+                indices, params_list = zip(*entries[start : start + max_calls])
+                batches.append(hub.Batch(list(indices), list(params_list)))
+        return batches
+
+    def _typed_result(
+        self,
+        call: hub.ToolCall,
+        result: str | list[Exception],
+    ) -> hub.ToolOutput | hub.ToolCallErrors:
+        if isinstance(result, str):
+            return self._tool_output(call, result)
+        assert isinstance(result, list)
+        for e in result:
+            assert isinstance(e, Exception)
+        return hub.ToolCallErrors(result)
+
+    def _call_tool(
+        self,
+        auth_ctx: hub.AuthContext,
+        call: hub.ToolCall,
+        params: dict[str, Any] | None = None,
+    ) -> hub.ToolOutput | hub.ToolCallErrors:
+        fn = self.registry_.get(call.function.name)
+        result = utils.call_fn_from_openai(
+            auth_ctx,
+            fn,
+            call.function.arguments,
+            self._decoder(fn),
+            self._invoke,
+            self.projector,
+            typed_parameters=params,
+        )
+        return self._typed_result(call, result)
+
+    async def _acall_tool(
+        self,
+        auth_ctx: hub.AuthContext,
+        call: hub.ToolCall,
+        params: dict[str, Any] | None = None,
+    ) -> hub.ToolOutput | hub.ToolCallErrors:
+        fn = self.registry_.get(call.function.name)
+        result = await utils.acall_fn_from_openai(
+            auth_ctx,
+            fn,
+            call.function.arguments,
+            self._decoder(fn),
+            self._ainvoke,
+            self.projector,
+            typed_parameters=params,
+        )
+        return self._typed_result(call, result)
+
+    def _call_tools_bulk(
+        self,
+        auth_ctx: hub.AuthContext,
+        calls: list[hub.ToolCall],
+        params_list: list[dict[str, Any]],
+    ) -> list[hub.ToolOutput | hub.ToolCallErrors]:
+        fn = self.registry_.get(calls[0].function.name)
+        results = utils.call_bulk_fn_from_openai(
+            auth_ctx, fn, params_list, self._invoke_bulk, self.projector
+        )
+        return [self._typed_result(call, r) for call, r in zip(calls, results)]
+
+    async def _acall_tools_bulk(
+        self,
+        auth_ctx: hub.AuthContext,
+        calls: list[hub.ToolCall],
+        params_list: list[dict[str, Any]],
+    ) -> list[hub.ToolOutput | hub.ToolCallErrors]:
+        fn = self.registry_.get(calls[0].function.name)
+        results = await utils.acall_bulk_fn_from_openai(
+            auth_ctx, fn, params_list, self._ainvoke_bulk, self.projector
+        )
+        return [self._typed_result(call, r) for call, r in zip(calls, results)]
@@ -0,0 +1,99 @@
+import datetime
+import json
+from typing import Any, get_args, get_origin
+
+import pydantic
+import pytest
+from dateutil import parser as dateutil_parser
+
+from toolhub.lib import function
+from toolhub.openai import utils as openai_utils
+
+
+class _Point(pydantic.BaseModel):
+    x: int
+    y: int
+
+
+_SPEC = function.FunctionSpec(
+    name="search",
+    parameters=[
+        function.ParameterSpec("query", str, None, True),
+        function.ParameterSpec("limit", int, None, False),
+        function.ParameterSpec("ratio", float, None, False),
+        function.ParameterSpec("verbose", bool, None, False),
+        function.ParameterSpec("ids", list[int], None, False),
+        function.ParameterSpec("since", datetime.date, None, False),
+        function.ParameterSpec("origin", _Point, None, False),
+        function.ParameterSpec("unsupported", set, None, False),
+    ],
+    return_=function.ReturnSpec(type_=dict, description=None),
+    description=None,
+)
+
+_ARGUMENTS = [
+    {"query": "acme"},
+    {"query": "acme", "limit": 10, "ratio": 0.5, "verbose": True},
+    {"query": 42, "limit": "15", "ratio": "2", "ids": ["1", 2]},
+    {"query": "acme", "since": "2024-03-01", "origin": {"x": 1, "y": "2"}},
+    {"limit": 10},
+    {"query": "acme", "limit": "ten", "ids": [1, "two"], "since": "not a date"},
+    {"query": "acme", "origin": {"x": 1}, "unsupported": [1]},
+    {"query": "acme", "ids": 3, "extra": "ignored"},
+]
+
+
+def _cast(type_: Any, o: Any) -> Any:
+    """The per-call cast that ArgumentsDecoder compiles ahead of the calls."""
+    if type_ in (None, bool, int, float, str):
+        return type_(o)
+    elif get_origin(type_) is list and get_args(type_) is not None:
+        (item_type,) = get_args(type_)
+        return [_cast(item_type, i) for i in o]
+    elif issubclass(type_, datetime.date):
+        return dateutil_parser.parse(o).date()
+    elif issubclass(type_, pydantic.BaseModel):
+        return type_.parse_obj(o)
+    else:
+        raise RuntimeError(f"Unsupported type {type_}")
+
+
+def _typed_parameters(
+    fn_spec: function.FunctionSpec, arguments: str
+) -> tuple[dict[str, Any], list[Exception]]:
+    parameters = json.loads(arguments)
+    typed_parameters = {}
+    errors: list[Exception] = []
+    for p in fn_spec.parameters:
+        if p.name in parameters:
+            try:
+                typed_parameters[p.name] = _cast(p.type_, parameters[p.name])
+            except Exception as e:
+                errors.append(
+                    ValueError(f"parameter {p.name} expected type {p.type_}: {e}")
+                )
+        elif p.required:
+            errors.append(ValueError(f"missing required parameter {p.name}"))
+    return typed_parameters, errors
+
+
+@pytest.mark.parametrize("arguments", _ARGUMENTS)
+def test_decoder_matches_per_call_casts(arguments):
+    arguments = json.dumps(arguments)
+    typed_parameters, errors = openai_utils.ArgumentsDecoder(_SPEC)(arguments)
+    expected_parameters, expected_errors = _typed_parameters(_SPEC, arguments)
+    assert typed_parameters == expected_parameters
+    assert [str(e) for e in errors] == [str(e) for e in expected_errors]
+
+
+def test_decoder_reports_invalid_parameters():
+    decoder = openai_utils.ArgumentsDecoder(_SPEC)
+    typed_parameters, errors = decoder(
+        json.dumps({"limit": "ten", "since": "2024-03-01", "unsupported": []})
+    )
+    assert typed_parameters == {"since": datetime.date(2024, 3, 1)}
+    assert [str(e).split(":")[0] for e in errors] == [
+        "missing required parameter query",
+        "parameter limit expected type <class 'int'>",
+        "parameter unsupported expected type <class 'set'>",
+    ]
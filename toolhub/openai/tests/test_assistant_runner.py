@@ -0,0 +1,247 @@
+import asyncio
+import types
+
+import pytest
+from openai.types.beta.threads.required_action_function_tool_call import (
+    Function,
+    RequiredActionFunctionToolCall,
+)
+
+from toolhub.lib import auth
+from toolhub.lib import hub
+from toolhub.openai import assistant_runner
+from toolhub.openai import openai_assistant_hub
+
+_AUTH_CTX = auth.StandardAuthContext()
+
+
+class _Runs:
+    """Runs API of a fake client, whose run goes through the given statuses."""
+
+    def __init__(self, statuses: list[str]):
+        self.statuses = statuses
+        self.n_retrieves = 0
+
+    def _run(self) -> types.SimpleNamespace:
+        return types.SimpleNamespace(
+            id="run", thread_id="thread", status=self.statuses[self.n_retrieves]
+        )
+
+    async def create(self, thread_id: str, assistant_id: str, **_params):
+        return self._run()
+
+    async def retrieve(self, run_id: str, thread_id: str):
+        self.n_retrieves += 1
+        return self._run()
+
+
+class _Hub:
+    """Hub whose tool calls echo their arguments, or fail on "fail"."""
+
+    def __init__(self):
+        self.calls: list[tuple[list[str], float | None]] = []
+
+    def tools_spec(self) -> list:
+        return []
+
+    async def acall_tools(self, auth_ctx, calls, deadline_s=None) -> list:
+        self.calls.append(([c.id for c in calls], deadline_s))
+        return [
+            hub.ToolCallErrors([RuntimeError("boom")])
+            if c.function.arguments == "fail"
+            else openai_assistant_hub.ToolOutput(
+                tool_call_id=c.id, output=c.function.arguments
+            )
+            for c in calls
+        ]
+
+
+def test_poll_stops_at_incomplete_runs():
+    runs = _Runs(["queued", "in_progress", "incomplete", "in_progress"])
+    client = types.SimpleNamespace(
+        beta=types.SimpleNamespace(threads=types.SimpleNamespace(runs=runs))
+    )
+    runner = assistant_runner.AssistantRunner(
+        _Hub(), client, min_poll_s=0.001, max_poll_s=0.001, stream=False
+    )
+    run = asyncio.run(runner.run(_AUTH_CTX, "thread", "assistant"))
+    assert run.status == "incomplete"
+    assert runs.n_retrieves == 2
+
+
+def _run(status: str, *arguments: str) -> types.SimpleNamespace:
+    """Returns: a run of the given status, requiring calls with arguments."""
+    tool_calls = [
+        RequiredActionFunctionToolCall(
+            id=f"call_{i}",
+            type="function",
+            function=Function(name="echo", arguments=a),
+        )
+        for i, a in enumerate(arguments)
+    ]
+    return types.SimpleNamespace(
+        object="thread.run",
+        id="run",
+        thread_id="thread",
+        status=status,
+        required_action=types.SimpleNamespace(
+            submit_tool_outputs=types.SimpleNamespace(tool_calls=tool_calls)
+        ),
+    )
+
+
+class _Stream:
+    """A run's stream of events, as an async iterator."""
+
+    def __init__(self, events: list):
+        self.events = events
+
+    async def __aiter__(self):
+        for data in self.events:
+            await asyncio.sleep(0)
+            yield types.SimpleNamespace(data=data)
+
+
+class _ScriptedRuns:
+    """Runs API of a fake client, whose requests return the script's runs in
+    turn; streaming requests return a stream of the script's list of runs."""
+
+    def __init__(self, script: list):
+        self.script = script
+        self.requests: list[tuple[str, dict]] = []
+
+    def _next(self, method: str, params: dict):
+        self.requests.append((method, params))
+        result = self.script[len(self.requests) - 1]
+        return _Stream(result) if params.get("stream") else result
+
+    async def create(self, **params):
+        return self._next("create", params)
+
+    async def retrieve(self, **params):
+        return self._next("retrieve", params)
+
+    async def submit_tool_outputs(self, **params):
+        return self._next("submit_tool_outputs", params)
+
+    async def cancel(self, **params):
+        return self._next("cancel", params)
+
+
+def _runner(runs: _ScriptedRuns, **kwargs) -> assistant_runner.AssistantRunner:
+    client = types.SimpleNamespace(
+        beta=types.SimpleNamespace(threads=types.SimpleNamespace(runs=runs))
+    )
+    return assistant_runner.AssistantRunner(
+        _Hub(), client, min_poll_s=0.001, max_poll_s=0.001, **kwargs
+    )
+
+
+def test_poll_submits_tool_outputs():
+    runs = _ScriptedRuns(
+        [
+            _run("requires_action", "1", "fail"),
+            _run("in_progress"),
+            _run("completed"),
+        ]
+    )
+    submissions = []
+    runner = _runner(
+        runs,
+        deadline_s=5.0,
+        on_tool_outputs=lambda calls, outputs: submissions.append(outputs),
+        stream=False,
+    )
+    run = asyncio.run(runner.run(_AUTH_CTX, "thread", "assistant"))
+    assert run.status == "completed"
+    assert runner.hub.calls == [(["call_0", "call_1"], 5.0)]
+    assert [method for method, _ in runs.requests] == [
+        "create",
+        "submit_tool_outputs",
+        "retrieve",
+    ]
+    tool_outputs = [
+        {"tool_call_id": "call_0", "output": "1"},
+        {"tool_call_id": "call_1", "output": "Failure:\nboom"},
+    ]
+    assert runs.requests[1][1] == dict(
+        run_id="run", thread_id="thread", tool_outputs=tool_outputs
+    )
+    assert submissions == [tool_outputs]
+
+
+def test_poll_cancels_runs_past_max_tool_iterations():
+    runs = _ScriptedRuns(
+        [
+            _run("requires_action", "1"),
+            _run("requires_action", "2"),
+            _run("cancelling"),
+            _run("cancelled"),
+        ]
+    )
+    runner = _runner(runs, max_tool_iterations=1, stream=False)
+    run = asyncio.run(runner.run(_AUTH_CTX, "thread", "assistant"))
+    assert run.status == "cancelled"
+    assert runner.hub.calls == [(["call_0"], None)]
+    assert [method for method, _ in runs.requests] == [
+        "create",
+        "submit_tool_outputs",
+        "cancel",
+        "retrieve",
+    ]
+
+
+def test_follows_streams_of_runs():
+    message = types.SimpleNamespace(object="thread.message")
+    runs = _ScriptedRuns(
+        [
+            [_run("queued"), message, _run("requires_action", "1")],
+            [_run("in_progress"), message, _run("requires_action", "2")],
+            [_run("in_progress"), _run("completed")],
+        ]
+    )
+    runner = _runner(runs, stream=True)
+    run = asyncio.run(runner.run(_AUTH_CTX, "thread", "assistant"))
+    assert run.status == "completed"
+    assert runner.hub.calls == [(["call_0"], None), (["call_0"], None)]
+    assert [(method, params["stream"]) for method, params in runs.requests] == [
+        ("create", True),
+        ("submit_tool_outputs", True),
+        ("submit_tool_outputs", True),
+    ]
+    assert runs.requests[2][1]["tool_outputs"] == [
+        {"tool_call_id": "call_0", "output": "2"}
+    ]
+
+
+def test_stream_cancels_runs_past_max_tool_iterations():
+    runs = _ScriptedRuns(
+        [
+            [_run("requires_action", "1")],
+            [_run("requires_action", "2")],
+            _run("cancelled"),
+        ]
+    )
+    runner = _runner(runs, max_tool_iterations=1, stream=True)
+    run = asyncio.run(runner.run(_AUTH_CTX, "thread", "assistant"))
+    assert run.status == "cancelled"
+    assert [method for method, _ in runs.requests] == [
+        "create",
+        "submit_tool_outputs",
+        "cancel",
+    ]
+
+
+def test_stream_polls_runs_cut_short():
+    runs = _ScriptedRuns([[_run("queued"), _run("in_progress")], _run("completed")])
+    runner = _runner(runs, stream=True)
+    run = asyncio.run(runner.run(_AUTH_CTX, "thread", "assistant"))
+    assert run.status == "completed"
+    assert [method for method, _ in runs.requests] == ["create", "retrieve"]
+
+
+def test_stream_without_runs_fails():
+    runs = _ScriptedRuns([[types.SimpleNamespace(object="thread.message")]])
+    runner = _runner(runs, stream=True)
+    with pytest.raises(RuntimeError, match="had no run"):
+        asyncio.run(runner.run(_AUTH_CTX, "thread", "assistant"))
@@ -0,0 +1,122 @@
+import copy
+import json
+
+import pytest
+
+from toolhub.lib import auth
+from toolhub.lib import function
+from toolhub.lib import projection
+from toolhub.openai import utils as openai_utils
+
+_SHARED_DESCRIPTION = (
+    "The identifier of the organization, as returned by the search endpoints,"
+    " e.g. a permalink or a UUID."
+)
+
+
+def _fn(i: int) -> function.Function:
+    parameters = [
+        function.ParameterSpec(
+            name="organization_id",
+            type_=str,
+            description=_SHARED_DESCRIPTION,
+            required=True,
+        ),
+        function.ParameterSpec(
+            name="limit",
+            type_=int,
+            description=f"Most results of lookup {i}.  " + "Pagination note. " * 20,
+            required=False,
+        ),
+        function.ParameterSpec(
+            name="verbose", type_=bool, description=None, required=False
+        ),
+    ]
+    return function.Function(
+        spec=function.FunctionSpec(
+            name=f"lookup_{i}",
+            parameters=parameters,
+            return_=function.ReturnSpec(
+                type_=dict, description="The organization's details. " * 10
+            ),
+            description=f"Looks up the details of organization kind {i}. " * 8,
+        ),
+        callable_=auth.no_auth(lambda **_: None),
+    )
+
+
+_FN_DEFS = openai_utils.fns_to_fn_defs([_fn(i) for i in range(12)])
+
+
+def _tokens(fn_defs) -> int:
+    return sum(
+        projection.estimate_tokens(
+            json.dumps(dict(type="function", function=d), separators=(",", ":"))
+        )
+        for d in fn_defs
+    )
+
+
+def test_fitting_specs_are_kept_as_is():
+    compacted = openai_utils.compact_fn_defs(_FN_DEFS, _tokens(_FN_DEFS))
+    assert all(a is b for a, b in zip(compacted, _FN_DEFS))
+
+
+def test_compacts_within_budget_as_far_as_possible():
+    full = _tokens(_FN_DEFS)
+    tightest = _tokens(openai_utils.compact_fn_defs(_FN_DEFS, 0))
+    assert tightest < full // 3
+    for max_tokens in range(tightest, full, (full - tightest) // 10):
+        compacted = openai_utils.compact_fn_defs(_FN_DEFS, max_tokens)
+        assert _tokens(compacted) <= max_tokens
+        # NOTE: the spec must remain valid for the API.
+        assert [d["name"] for d in compacted] == [d["name"] for d in _FN_DEFS]
+        for fn_def in json.loads(json.dumps(compacted)):
+            assert fn_def["parameters"]["required"] == ["organization_id"]
+            assert "organization_id" in fn_def["parameters"]["properties"]
+
+
+def test_compacts_the_least_relevant_tools_first():
+    full = _tokens(_FN_DEFS)
+    compacted = openai_utils.compact_fn_defs(_FN_DEFS, full - 50)
+    assert compacted[0] is _FN_DEFS[0]
+    assert compacted[-1] is not _FN_DEFS[-1]
+
+
+def test_tightest_drops_optional_parameters_of_the_lower_half_only():
+    compacted = openai_utils.compact_fn_defs(_FN_DEFS, 0)
+    for i, fn_def in enumerate(compacted):
+        properties = fn_def["parameters"]["properties"]
+        assert ("limit" in properties) == (i < len(compacted) // 2)
+        assert "Returns:" not in fn_def["description"]
+
+
+def test_refers_to_repeated_descriptions():
+    compacted = openai_utils.compact_fn_defs(_FN_DEFS, _tokens(_FN_DEFS) - 1)
+    properties = compacted[-1]["parameters"]["properties"]
+    assert properties["organization_id"]["description"] == (
+        "As lookup_0.organization_id."
+    )
+    assert "This parameter is a required" not in json.dumps(compacted[-1])
+    # NOTE: the description referred to stays whole.
+    assert compacted[0] is _FN_DEFS[0]
+
+
+@pytest.mark.parametrize("max_tokens", [0, 500, 1500])
+def test_is_deterministic_and_does_not_modify_its_input(max_tokens):
+    fn_defs = copy.deepcopy(_FN_DEFS)
+    compacted = openai_utils.compact_fn_defs(fn_defs, max_tokens)
+    assert fn_defs == _FN_DEFS
+    assert openai_utils.compact_fn_defs(copy.deepcopy(_FN_DEFS), max_tokens) == (
+        compacted
+    )
+
+
+def test_fn_def_cache_memoizes_compaction():
+    cache = openai_utils.FnDefCache()
+    fn_defs = cache.fns_to_fn_defs([_fn(i) for i in range(3)])
+    compacted = cache.compact(fn_defs, 100)
+    assert cache.compact(fn_defs, 100) is compacted
+    assert cache.compact(list(fn_defs), 100) is compacted
+    assert cache.compact(copy.deepcopy(fn_defs), 100) == compacted
+    assert cache.compact(copy.deepcopy(fn_defs), 100) is not compacted
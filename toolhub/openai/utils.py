@@ -1,14 +1,18 @@
+import collections
+import copy
 import datetime
 from dateutil import parser as dateutil_parser
 import json
 import pydantic
-from typing import Any, get_args, get_origin, Type
+from typing import Any, Callable, get_args, get_origin, Type
 
 
 from openai.types.shared_params.function_definition import FunctionDefinition
 
 from toolhub.lib import auth
+from toolhub.lib import bounded_json
 from toolhub.lib import function
+from toolhub.lib import projection
 
 
 _MAX_RESULT_LENGTH = 1024
@@ -20,6 +24,19 @@ _PRIMITIVE_TYPE_MAP = {
     str: "string",
 }
 _MAX_N_TOOLS = 127
+_REQUIRED_NOTE = ". This parameter is a required."
+# (max parameter description, max function description, keep the Returns:
+# description) per compaction level, from 0 (as is); see compact_fn_defs.
+_COMPACTION_LEVELS = [
+    (None, None, True),
+    (None, None, True),
+    (200, 300, True),
+    (80, 150, False),
+    (40, 80, False),
+    (0, 80, False),
+]
+# Compacted specs memoized per FnDefCache.
+_MAX_COMPACTED = 32
 
 
 def _map_type(type_: Type) -> dict[str, Any]:
@@ -42,29 +59,83 @@ def _map_type(type_: Type) -> dict[str, Any]:
         raise RuntimeError(f"Unsupported type {type_}")
 
 
-def _cast(type_: Type, o: Any) -> Any:
+def _compile_cast(type_: Type) -> Callable[[Any], Any]:
+    """Returns: a function casting a JSON-decoded value to type_."""
     if type_ in _PRIMITIVE_TYPE_MAP:
-        return type_(o)
+        return type_
     elif get_origin(type_) is list and get_args(type_) is not None:
         (item_type,) = get_args(type_)
-        return [_cast(item_type, i) for i in o]
+        cast_item = _compile_cast(item_type)
+        return lambda o: [cast_item(i) for i in o]
     elif issubclass(type_, datetime.date):
-        d = dateutil_parser.parse(o)
-        return d.date()
+        return lambda o: dateutil_parser.parse(o).date()
     elif issubclass(type_, datetime.datetime):
-        return dateutil_parser.parse(json.loads(o))
+        return lambda o: dateutil_parser.parse(json.loads(o))
     elif issubclass(type_, pydantic.BaseModel):
-        return type_.parse_obj(o)
+        return type_.parse_obj
 
     # TODO: if type is an enum, parameter["enum"] = type.values
     else:
         raise RuntimeError(f"Unsupported type {type_}")
 
 
-def _output_str(result: Any) -> str:
+def _failing_cast(e: Exception) -> Callable[[Any], Any]:
+    def _impl(_o: Any) -> Any:
+        raise e
+
+    return _impl
+
+
+class ArgumentsDecoder:
+    """Decodes the JSON arguments of a call to typed parameters of a function.
+
+    The cast of each parameter is compiled once, so decoding a call is a single
+    pass over the parameters.
+    """
+
+    def __init__(self, fn_spec: function.FunctionSpec):
+        self.fn_spec = fn_spec
+        self._parameters: list[tuple[str, Type, bool, Callable[[Any], Any]]] = []
+        for p in fn_spec.parameters:
+            try:
+                cast = _compile_cast(p.type_)
+            except Exception as e:
+                # NOTE: report unsupported types per call, as parameter errors.
+                cast = _failing_cast(e)
+            self._parameters.append((p.name, p.type_, p.required, cast))
+
+    def __call__(self, arguments: str) -> tuple[dict[str, Any], list[Exception]]:
+        """Returns: the typed parameters, and the errors of invalid parameters."""
+        parameters = json.loads(arguments)
+
+        typed_parameters = {}
+        errors: list[Exception] = []
+        for name, type_, required, cast in self._parameters:
+            if name in parameters:
+                try:
+                    typed_parameters[name] = cast(parameters[name])
+                except Exception as e:
+                    errors.append(
+                        ValueError(f"parameter {name} expected type {type_}: {e}")
+                    )
+            elif required:
+                errors.append(ValueError(f"missing required parameter {name}"))
+        return typed_parameters, errors
+
+
+def _output_str(
+    result: Any,
+    projector: projection.Projector | None = None,
+    function_name: str | None = None,
+) -> str:
+    """Returns: the result as the output of a tool call, rendered by projector, or
+    else within _MAX_RESULT_LENGTH; JSON results stay well-formed, with notes of
+    what was omitted."""
     if isinstance(result, pydantic.BaseModel):
-        return result.model_dump_json()  # type: ignore[attr-defined] # https://docs.pydantic.dev/2.5/api/base_model/#pydantic.main.BaseModel.model_dump_json
-    return str(result)
+        result = result.model_dump(mode="json")
+    if projector is not None:
+        return projector.render(result, function_name)
+    return bounded_json.dumps(result, _MAX_RESULT_LENGTH)
 
 
 def _fn_spec_to_fn_def(fn_spec: function.FunctionSpec) -> FunctionDefinition:
@@ -76,7 +147,7 @@ def _fn_spec_to_fn_def(fn_spec: function.FunctionSpec) -> FunctionDefinition:
 
         if p_spec.description:
             parameter["description"] = p_spec.description + (
-                ". This parameter is a required." if p_spec.required else ""
+                _REQUIRED_NOTE if p_spec.required else ""
             )
         properties[p_spec.name] = parameter
 
@@ -101,43 +172,288 @@ def _fn_spec_to_fn_def(fn_spec: function.FunctionSpec) -> FunctionDefinition:
     return rv
 
 
-def fns_to_fn_defs(fns: list[function.Function]) -> list[FunctionDefinition]:
+def _check_n_tools(fns: list[function.Function]) -> None:
     assert (
         len(fns) < _MAX_N_TOOLS
     ), f"OpenAI supports at most {_MAX_N_TOOLS} tools; please use a function filter"
+
+
+def fns_to_fn_defs(fns: list[function.Function]) -> list[FunctionDefinition]:
+    _check_n_tools(fns)
     return [_fn_spec_to_fn_def(fn.spec) for fn in fns]
 
 
+def _shorten(text: str, max_chars: int | None) -> str:
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    # NOTE: prefer cutting at the end of a sentence, or else of a word.
+    cut = text[: max_chars - 3]
+    for sep in (". ", " "):
+        if (i := cut.rfind(sep)) > max_chars // 2:
+            return cut[: i + 1].rstrip() + ("" if sep == ". " else "...")
+    return cut + "..."
+
+
+def _compact_fn_def(
+    fn_def: FunctionDefinition,
+    level: int,
+    references: dict[str, str],
+) -> FunctionDefinition:
+    """Returns: fn_def compacted per level; see compact_fn_defs.
+
+    Args:
+        references: the name of the tool parameter to refer to, per repeated
+            parameter description.
+    """
+    if level == 0:
+        return fn_def
+    max_param_chars, max_fn_chars, keep_returns = _COMPACTION_LEVELS[level]
+    description = " ".join(fn_def.get("description", "").split())
+    if not keep_returns:
+        description = description.split("Returns: ", 1)[0].rstrip()
+    parameters = copy.deepcopy(fn_def["parameters"])
+    required = set(parameters.get("required", ()))
+    drop_optional = level == len(_COMPACTION_LEVELS) - 1
+    properties = {}
+    for name, parameter in parameters["properties"].items():
+        if drop_optional and name not in required:
+            continue
+        if param_description := parameter.get("description"):
+            # NOTE: "required" already tells which parameters are required.
+            param_description = " ".join(param_description.split())
+            param_description = param_description.removesuffix(_REQUIRED_NOTE)
+            ref = references.get(param_description)
+            if max_param_chars == 0:
+                parameter.pop("description")
+            elif ref is None:
+                parameter["description"] = _shorten(param_description, max_param_chars)
+            elif ref == f"{fn_def['name']}.{name}":
+                # NOTE: kept whole, since other parameters refer to it.
+                parameter["description"] = param_description
+            else:
+                parameter["description"] = f"As {ref}."
+        properties[name] = parameter
+    parameters["properties"] = properties
+    return FunctionDefinition(
+        name=fn_def["name"],
+        parameters=parameters,
+        description=_shorten(description, max_fn_chars),
+    )
+
+
+def _fn_def_tokens(
+    fn_def: FunctionDefinition, count_tokens: Callable[[str], int]
+) -> int:
+    return count_tokens(
+        json.dumps(dict(type="function", function=fn_def), separators=(",", ":"))
+    )
+
+
+def compact_fn_defs(
+    fn_defs: list[FunctionDefinition],
+    max_tokens: int,
+    count_tokens: Callable[[str], int] = projection.estimate_tokens,
+) -> list[FunctionDefinition]:
+    """Returns: fn_defs compacted to fit max_tokens, as far as possible.
+
+    fn_defs are ranked, most relevant first. Compaction goes level by level, and
+    within a level from the least relevant tool up, until the spec fits:
+    whitespace is collapsed, the required-parameter notes are dropped and
+    descriptions repeated across parameters refer to their first occurrence; then
+    descriptions are shortened ever more, and the Returns: descriptions dropped;
+    finally, the lower half of the tools lose their optional parameters and
+    parameter descriptions. The result only depends on the arguments, so that
+    the prompt prefix stays stable, e.g. for provider-side prompt caching.
+
+    Args:
+        count_tokens: counts the tokens of a text, e.g. with the model's tokenizer;
+            estimated from its length by default.
+    """
+    counts: collections.Counter[str] = collections.Counter()
+    references: dict[str, str] = {}
+    for fn_def in fn_defs:
+        for name, parameter in fn_def["parameters"]["properties"].items():
+            if description := parameter.get("description"):
+                description = " ".join(description.split()).removesuffix(_REQUIRED_NOTE)
+                counts[description] += 1
+                references.setdefault(description, f"{fn_def['name']}.{name}")
+    # NOTE: a reference is only worth it in place of a longer description.
+    references = {
+        d: ref
+        for d, ref in references.items()
+        if counts[d] > 1 and len(d) > len(ref) + 4
+    }
+
+    compacted = list(fn_defs)
+    tokens = [_fn_def_tokens(fn_def, count_tokens) for fn_def in fn_defs]
+    total = sum(tokens)
+    for level in range(1, len(_COMPACTION_LEVELS)):
+        for i in reversed(range(len(fn_defs))):
+            if total <= max_tokens:
+                return compacted
+            if level == len(_COMPACTION_LEVELS) - 1 and i < len(fn_defs) // 2:
+                # NOTE: only the least relevant tools lose their optional
+                # parameters.
+                break
+            compacted[i] = _compact_fn_def(fn_defs[i], level, references)
+            n = _fn_def_tokens(compacted[i], count_tokens)
+            total += n - tokens[i]
+            tokens[i] = n
+    return compacted
+
+
+class FnDefCache:
+    """Memoizes the definition of each function spec, so that recomputing the
+    definitions of a changed set of functions only converts the changed specs."""
+
+    def __init__(self):
+        self._name_to_spec_def: dict[
+            str, tuple[function.FunctionSpec, FunctionDefinition]
+        ] = {}
+        # (definitions, compacted definitions) per (names, max_tokens), in order of
+        # use.
+        self._compacted: collections.OrderedDict[
+            tuple[tuple[str, ...], int],
+            tuple[list[FunctionDefinition], list[FunctionDefinition]],
+        ] = collections.OrderedDict()
+
+    def fns_to_fn_defs(
+        self, fns: list[function.Function], prune: bool = True
+    ) -> list[FunctionDefinition]:
+        """
+        Args:
+            prune: whether to drop the definitions of the functions not in fns.
+        """
+        _check_n_tools(fns)
+        name_to_spec_def = {}
+        for fn in fns:
+            spec_def = self._name_to_spec_def.get(fn.spec.name)
+            if spec_def is None or spec_def[0] is not fn.spec:
+                spec_def = (fn.spec, _fn_spec_to_fn_def(fn.spec))
+            name_to_spec_def[fn.spec.name] = spec_def
+        if prune:
+            self._name_to_spec_def = name_to_spec_def
+        else:
+            self._name_to_spec_def.update(name_to_spec_def)
+        return [fn_def for _, fn_def in name_to_spec_def.values()]
+
+    def compact(
+        self, fn_defs: list[FunctionDefinition], max_tokens: int
+    ) -> list[FunctionDefinition]:
+        """Returns: compact_fn_defs(fn_defs, max_tokens), memoized while the
+        definitions are unchanged; callers must not modify the result."""
+        key = (tuple(fn_def["name"] for fn_def in fn_defs), max_tokens)
+        cached = self._compacted.get(key)
+        if cached is None or any(a is not b for a, b in zip(cached[0], fn_defs)):
+            cached = (fn_defs, compact_fn_defs(fn_defs, max_tokens))
+            self._compacted[key] = cached
+            if len(self._compacted) > _MAX_COMPACTED:
+                self._compacted.popitem(last=False)
+        self._compacted.move_to_end(key)
+        return cached[1]
+
+
 def call_fn_from_openai(
     auth_ctx: auth.AuthContext,
     fn: function.Function,
     arguments: str,
+    decoder: ArgumentsDecoder | None = None,
+    invoke: function.Invoke = function.call,
+    projector: projection.Projector | None = None,
+    typed_parameters: dict[str, Any] | None = None,
 ) -> str | list[Exception]:
-    parameters = json.loads(arguments)
+    """
+    Args:
+        decoder: the precompiled decoder of fn's arguments, if any.
+        invoke: calls fn with the typed parameters, e.g. through a cache.
+        projector: renders the result within a token budget, if set.
+        typed_parameters: the parameters decoded from arguments, if already
+            decoded.
+    """
+    if typed_parameters is None:
+        typed_parameters, errors = (decoder or ArgumentsDecoder(fn.spec))(arguments)
+        if errors:
+            return errors
 
-    typed_parameters = {}
-    errors: list[Exception] = []
-    for p in fn.spec.parameters:
-        if p.name in parameters:
-            try:
-                typed_parameter = _cast(p.type_, parameters[p.name])
-            except Exception as e:
-                errors.append(
-                    ValueError(f"parameter {p.name} expected type {p.type_}: {e}")
-                )
-                continue
-            typed_parameters[p.name] = typed_parameter
-        elif p.required:
-            errors.append(ValueError(f"missing required parameter {p.name}"))
-    if errors:
-        return errors
+    try:
+        return _output_str(
+            invoke(fn, auth_ctx, typed_parameters), projector, fn.spec.name
+        )
+    except Exception as e:
+        return [e]
+
+
+async def acall_fn_from_openai(
+    auth_ctx: auth.AuthContext,
+    fn: function.Function,
+    arguments: str,
+    decoder: ArgumentsDecoder | None = None,
+    ainvoke: function.AInvoke = function.acall,
+    projector: projection.Projector | None = None,
+    typed_parameters: dict[str, Any] | None = None,
+) -> str | list[Exception]:
+    """
+    Args:
+        decoder: the precompiled decoder of fn's arguments, if any.
+        ainvoke: calls fn with the typed parameters, e.g. through a cache.
+        projector: renders the result within a token budget, if set.
+        typed_parameters: the parameters decoded from arguments, if already
+            decoded.
+    """
+    if typed_parameters is None:
+        typed_parameters, errors = (decoder or ArgumentsDecoder(fn.spec))(arguments)
+        if errors:
+            return errors
 
     try:
-        result = fn.callable_(auth_ctx)(**typed_parameters)
-        output = _output_str(result)
+        return _output_str(
+            await ainvoke(fn, auth_ctx, typed_parameters), projector, fn.spec.name
+        )
     except Exception as e:
         return [e]
 
-    if (n_extra := len(result) - _MAX_RESULT_LENGTH) > 0:
-        output = output[:_MAX_RESULT_LENGTH] + f"... {n_extra} characters omitted"
-    return output
+
+def _bulk_outputs(
+    fn: function.Function,
+    results: list[Any],
+    projector: projection.Projector | None,
+) -> list[str | list[Exception]]:
+    outputs: list[str | list[Exception]] = []
+    for result in results:
+        if isinstance(result, Exception):
+            outputs.append([result])
+            continue
+        try:
+            outputs.append(_output_str(result, projector, fn.spec.name))
+        except Exception as e:
+            outputs.append([e])
+    return outputs
+
+
+def call_bulk_fn_from_openai(
+    auth_ctx: auth.AuthContext,
+    fn: function.Function,
+    params_list: list[dict[str, Any]],
+    invoke_bulk: function.InvokeBulk = function.call_bulk,
+    projector: projection.Projector | None = None,
+) -> list[str | list[Exception]]:
+    """Returns: the output or errors of each call of fn, by its typed parameters,
+    from a single call of its bulk counterpart; see `call_fn_from_openai`.
+
+    Raises: the error of the bulk call itself, for the hub to fall back to single
+    calls.
+    """
+    results = invoke_bulk(fn, auth_ctx, params_list)
+    return _bulk_outputs(fn, results, projector)
+
+
+async def acall_bulk_fn_from_openai(
+    auth_ctx: auth.AuthContext,
+    fn: function.Function,
+    params_list: list[dict[str, Any]],
+    ainvoke_bulk: function.AInvokeBulk = function.acall_bulk,
+    projector: projection.Projector | None = None,
+) -> list[str | list[Exception]]:
+    """Async counterpart of `call_bulk_fn_from_openai`."""
+    results = await ainvoke_bulk(fn, auth_ctx, params_list)
+    return _bulk_outputs(fn, results, projector)